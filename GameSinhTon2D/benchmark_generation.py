@@ -0,0 +1,43 @@
+"""
+Benchmark - Sinh bản đồ rất lớn theo tile với 1..N tiến trình
+
+Chạy:
+    python benchmark_generation.py --size 4096 --max-workers 8
+
+In thời gian, tốc độ tăng so với 1 tiến trình và kiểm tra bản đồ giống hệt nhau
+với mọi số tiến trình (cùng seed).
+"""
+import os
+import time
+import hashlib
+import argparse
+from world import generate_island_map_tiled
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sinh bản đồ theo tile")
+    parser.add_argument("--size", type=int, default=4096, help="Cạnh bản đồ (ô)")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3, help="Lấy thời gian tốt nhất trong N lần")
+    args = parser.parse_args()
+
+    print(f"Bản đồ {args.size}x{args.size}, seed {args.seed}, CPU: {os.cpu_count()}")
+    baseline = None
+    reference_hash = None
+
+    for workers in range(1, args.max_workers + 1):
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            grid = generate_island_map_tiled(args.size, args.size, args.seed, workers)
+            best = min(best, time.perf_counter() - start)
+
+        digest = hashlib.sha1(grid.data).hexdigest()[:12]
+        if reference_hash is None:
+            reference_hash = digest
+            baseline = best
+        same = "OK" if digest == reference_hash else "KHÁC!"
+        print(f"  {workers:2d} tiến trình: {best:6.2f}s  x{baseline / best:4.2f}  [{digest} {same}]")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Chunked World - Bản đồ quần đảo chia chunk, sinh lười quanh camera/agent
+"""
+import random
+from settings import *
+from world import generate_chunk
+from tile_index import TileIndex
+from connectivity import Connectivity
+from tile_journal import TileJournal
+from coast_index import CoastIndex
+from item_registry import ItemRegistry, ITEM_TILE_TYPES
+
+class ChunkRow:
+    """View một hàng của ChunkedWorld để giữ cú pháp map_data[row][col]"""
+    __slots__ = ("world", "row")
+
+    def __init__(self, world, row):
+        self.world = world
+        self.row = row
+
+    def __getitem__(self, col):
+        return self.world.get_tile(col, self.row)
+
+    def __setitem__(self, col, tile):
+        self.world.set_tile(col, self.row, tile)
+
+    def __len__(self):
+        return self.world.width
+
+
+class ChunkedWorld:
+    def __init__(self, width=ARCHIPELAGO_WIDTH, height=ARCHIPELAGO_HEIGHT, seed=None, chunk_size=CHUNK_SIZE):
+        self.width = width
+        self.height = height
+        self.chunk_size = chunk_size
+        self.seed = seed if seed is not None else random.getrandbits(32)
+
+        self.chunks = {}            # {(chunk_x, chunk_y): bytearray}
+        self.touched_chunks = set() # Chunk đã bị sửa - không được giải phóng
+        
+        # Chỉ mục theo loại tile trên các chunk đã sinh (slot lưu bằng dict)
+        self.tile_index = TileIndex(width, height, dense=False)
+        
+        # Sổ vật phẩm trên các chunk đã sinh
+        self.items = ItemRegistry(width, height)
+        
+        # Nhãn vùng liên thông (chỉ gán cho đảo được hỏi tới) - flood fill chỉ đọc chunk đã sinh,
+        # chunk sinh sau nối vào vùng kề qua add_chunk
+        # Chunk bị giải phóng đều chưa sửa nên sinh lại y hệt -> nhãn vẫn đúng
+        self.connectivity = Connectivity(self, dense=False)
+        
+        # Ô cát sát nước - xét khi sinh chunk (chunk kề đã sinh được xét lại dải giáp ranh)
+        self.coast = CoastIndex(self, dense=False)
+        
+        # Nhật ký thay đổi tile (chỉ ghi khi sửa ô, không ghi khi sinh chunk)
+        self.journal = TileJournal(width)
+
+        # Thống kê
+        self.chunks_generated = 0
+        self.chunks_evicted = 0
+
+    # ==================== TRUY CẬP TILE ====================
+    def __getitem__(self, row):
+        return ChunkRow(self, row)
+
+    def __len__(self):
+        return self.height
+
+    def _get_chunk(self, chunk_x, chunk_y):
+        """Lấy chunk, sinh mới nếu chưa có"""
+        key = (chunk_x, chunk_y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = generate_chunk(self.seed, chunk_x, chunk_y, self.chunk_size, self.width, self.height)
+            self.chunks[key] = chunk
+            self.chunks_generated += 1
+            self._index_chunk(key, chunk, self.tile_index.add)
+            self._index_chunk(key, chunk, self.items.add, ITEM_TILE_TYPES)
+            self.coast.add_chunk(key, chunk)
+            self.connectivity.add_chunk(key)
+        return chunk
+
+    def _index_chunk(self, key, chunk, update, tile_types=None):
+        """Gọi update(idx, tile_type) cho mọi ô được đánh chỉ mục (hoặc thuộc tile_types) trong chunk"""
+        size = self.chunk_size
+        x0, y0 = key[0] * size, key[1] * size
+        for tile_type in tile_types or self.tile_index.lists:
+            needle = bytes((tile_type,))
+            i = chunk.find(needle)
+            while i != -1:
+                col, row = x0 + i % size, y0 + i // size
+                if col < self.width and row < self.height:
+                    update(row * self.width + col, tile_type)
+                i = chunk.find(needle, i + 1)
+
+    def get_tile(self, col, row):
+        size = self.chunk_size
+        chunk = self._get_chunk(col // size, row // size)
+        return chunk[(row % size) * size + (col % size)]
+
+    def set_tile(self, col, row, tile):
+        size = self.chunk_size
+        key = (col // size, row // size)
+        chunk = self._get_chunk(*key)
+        i = (row % size) * size + (col % size)
+        old = chunk[i]
+        if old == tile:
+            return
+        chunk[i] = tile
+        self.touched_chunks.add(key)
+        self.tile_index.move(row * self.width + col, old, tile)
+        self.items.move(row * self.width + col, old, tile)
+        self.connectivity.on_change(row * self.width + col, old, tile)
+        self.coast.on_change(row * self.width + col, old, tile)
+        self.journal.record(row * self.width + col, old, tile)
+
+    def get_row_slice(self, row, col0, col1):
+        """bytes chứa tile của hàng row, cột [col0, col1) - ghép từ các chunk"""
+        size = self.chunk_size
+        chunk_y, local_row = row // size, row % size
+        parts = []
+        col = col0
+        while col < col1:
+            chunk = self._get_chunk(col // size, chunk_y)
+            start = local_row * size + col % size
+            count = min(size - col % size, col1 - col)
+            parts.append(chunk[start:start + count])
+            col += count
+        return b"".join(parts)
+
+    def in_bounds(self, col, row):
+        return 0 <= col < self.width and 0 <= row < self.height
+
+    # Chỉ số phẳng giống TileGrid (idx = row * width + col)
+    def index(self, col, row):
+        return row * self.width + col
+
+    def pos(self, idx):
+        return idx % self.width, idx // self.width
+
+    def get_idx(self, idx):
+        return self.get_tile(idx % self.width, idx // self.width)
+
+    def set_idx(self, idx, tile):
+        self.set_tile(idx % self.width, idx // self.width, tile)
+
+    def peek_idx(self, idx, default=TILE_WATER):
+        """Như get_idx nhưng không sinh chunk - ô chưa sinh trả về default (nước = chặn đường)"""
+        size = self.chunk_size
+        col, row = idx % self.width, idx // self.width
+        chunk = self.chunks.get((col // size, row // size))
+        if chunk is None:
+            return default
+        return chunk[(row % size) * size + (col % size)]
+
+    def peek_tile(self, col, row, default=TILE_WATER):
+        return self.peek_idx(row * self.width + col, default)
+
+    def neighbors4(self, idx):
+        """Chỉ số phẳng của 4 ô lân cận nằm trong bản đồ"""
+        w = self.width
+        col = idx % w
+        result = []
+        if col > 0:
+            result.append(idx - 1)
+        if col < w - 1:
+            result.append(idx + 1)
+        if idx >= w:
+            result.append(idx - w)
+        if idx + w < w * self.height:
+            result.append(idx + w)
+        return result
+
+    def is_loaded(self, col, row):
+        """Kiểm tra ô đã nằm trong chunk được sinh chưa"""
+        return (col // self.chunk_size, row // self.chunk_size) in self.chunks
+
+    def iter_loaded_tiles(self):
+        """Duyệt (col, row, tile) trong các chunk đã sinh"""
+        size = self.chunk_size
+        for (chunk_x, chunk_y), chunk in list(self.chunks.items()):
+            x0, y0 = chunk_x * size, chunk_y * size
+            for i, tile in enumerate(chunk):
+                col = x0 + i % size
+                row = y0 + i // size
+                if col < self.width and row < self.height:
+                    yield col, row, tile
+
+    def get_loaded_bounds(self):
+        """Hình chữ nhật (col0, row0, col1, row1) bao các chunk đã sinh"""
+        if not self.chunks:
+            return 0, 0, 0, 0
+        size = self.chunk_size
+        xs = [key[0] for key in self.chunks]
+        ys = [key[1] for key in self.chunks]
+        return (min(xs) * size, min(ys) * size,
+                min(self.width, (max(xs) + 1) * size), min(self.height, (max(ys) + 1) * size))
+
+    # ==================== STREAMING ====================
+    def ensure_around(self, col, row, radius=CHUNK_LOAD_RADIUS):
+        """Sinh trước các chunk trong bán kính radius (tính theo chunk) quanh ô (col, row)"""
+        size = self.chunk_size
+        center_x, center_y = col // size, row // size
+        max_x = (self.width - 1) // size
+        max_y = (self.height - 1) // size
+        for chunk_y in range(max(0, center_y - radius), min(max_y, center_y + radius) + 1):
+            for chunk_x in range(max(0, center_x - radius), min(max_x, center_x + radius) + 1):
+                self._get_chunk(chunk_x, chunk_y)
+
+    def evict_far(self, positions, radius=CHUNK_EVICT_RADIUS):
+        """
+        Giải phóng các chunk chưa bị sửa nằm xa mọi vị trí trong positions
+
+        Args:
+            positions: Danh sách (col, row) của camera và các agent
+            radius: Khoảng cách (theo chunk, Chebyshev) được giữ lại
+
+        Returns:
+            int: Số chunk đã giải phóng
+        """
+        size = self.chunk_size
+        centers = [(col // size, row // size) for col, row in positions]
+        evicted = 0
+        for key in list(self.chunks):
+            if key in self.touched_chunks:
+                continue
+            if all(max(abs(key[0] - cx), abs(key[1] - cy)) > radius for cx, cy in centers):
+                self._index_chunk(key, self.chunks[key], self.tile_index.remove)
+                self._index_chunk(key, self.chunks[key], self.items.remove, ITEM_TILE_TYPES)
+                self.coast.remove_chunk(key)
+                del self.chunks[key]
+                evicted += 1
+        self.chunks_evicted += evicted
+        return evicted
+
+    def stream(self, camera_tile, agent_tiles=()):
+        """Gọi mỗi frame: sinh chunk quanh camera/agent và giải phóng chunk xa"""
+        positions = [camera_tile] + list(agent_tiles)
+        for col, row in positions:
+            self.ensure_around(col, row)
+        self.evict_far(positions)
@@ -0,0 +1,132 @@
+"""
+Coast Index - Tập ô cát sát nước (bờ biển), nơi thuyền cứu hộ có thể cập bến
+Dựng một lần khi tạo bản đồ (TileGrid) hoặc khi sinh chunk (ChunkedWorld);
+sau đó chỉ kiểm tra lại ô bị ghi và 4 ô kề khi cát hoặc nước thay đổi.
+"""
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class CoastIndex:
+    def __init__(self, store, dense=True):
+        """
+        Args:
+            store: TileGrid hoặc ChunkedWorld (cần width, height, get_idx, neighbors4)
+            dense: True = bản đồ đầy đủ (dựng bằng build), False = theo chunk (add_chunk/remove_chunk)
+        """
+        self.store = store
+        self.dense = dense
+        self.coastal = set()   # Chỉ số phẳng các ô cát có nước kề 4 hướng (bản đồ dày)
+        self.chunk_sets = {}   # {chunk key: set chỉ số phẳng} (bản đồ chunk)
+        # Chỉ thay đổi cát/nước mới làm đổi bờ biển
+        self.affects = bytearray(256)
+        self.affects[TILE_SAND] = 1
+        self.affects[TILE_WATER] = 1
+
+    @classmethod
+    def for_grid(cls, grid):
+        """Tập bờ biển dựng từ tile hiện tại của TileGrid (TileGrid gắn vào observers)"""
+        coast = cls(grid)
+        coast.build(grid.data)
+        return coast
+
+    def build(self, data):
+        """Dựng tập bờ biển từ bytearray tile của cả bản đồ (gọi 1 lần khi tạo bản đồ)"""
+        w, h = self.store.width, self.store.height
+        if np is not None and w and h:
+            tiles = np.frombuffer(data, dtype=np.uint8).reshape(h, w)
+            water = tiles == TILE_WATER
+            near_water = np.zeros((h, w), dtype=bool)
+            near_water[1:, :] |= water[:-1, :]
+            near_water[:-1, :] |= water[1:, :]
+            near_water[:, 1:] |= water[:, :-1]
+            near_water[:, :-1] |= water[:, 1:]
+            self.coastal = set(np.flatnonzero((tiles == TILE_SAND) & near_water).tolist())
+            return
+        self.coastal = {idx for idx in self.store.tile_index.lists[TILE_SAND] if self._is_coastal(idx)}
+
+    # ==================== KIỂM TRA MỘT Ô ====================
+    def _set_for(self, idx):
+        if self.dense:
+            return self.coastal
+        size = self.store.chunk_size
+        key = (idx % self.store.width // size, idx // self.store.width // size)
+        return self.chunk_sets.get(key)
+
+    def _is_coastal(self, idx):
+        """Ô cát có nước kề 4 hướng (bản đồ chunk: chỉ xét ô kề đã được sinh)"""
+        store = self.store
+        if store.get_idx(idx) != TILE_SAND:
+            return False
+        w = store.width
+        for nb in store.neighbors4(idx):
+            if not self.dense and not store.is_loaded(nb % w, nb // w):
+                continue
+            if store.get_idx(nb) == TILE_WATER:
+                return True
+        return False
+
+    def _recheck(self, idx):
+        coastal = self._set_for(idx)
+        if coastal is None:
+            return  # Chunk chưa sinh - sẽ được xét khi sinh
+        if self._is_coastal(idx):
+            coastal.add(idx)
+        else:
+            coastal.discard(idx)
+
+    def on_change(self, idx, old, new):
+        """Gọi mỗi lần ô idx đổi từ old sang new (sau khi đã ghi)"""
+        if not (self.affects[old] or self.affects[new]):
+            return
+        self._recheck(idx)
+        for nb in self.store.neighbors4(idx):
+            self._recheck(nb)
+
+    # ==================== BẢN ĐỒ CHUNK ====================
+    def add_chunk(self, key, chunk):
+        """Chunk key vừa được sinh: xét các ô cát của nó và dải ô giáp ranh của các chunk kề đã sinh"""
+        store = self.store
+        size = store.chunk_size
+        w = store.width
+        x0, y0 = key[0] * size, key[1] * size
+        self.chunk_sets[key] = set()
+        needle = bytes((TILE_SAND,))
+        i = chunk.find(needle)
+        while i != -1:
+            col, row = x0 + i % size, y0 + i // size
+            if col < w and row < store.height:
+                self._recheck(row * w + col)
+            i = chunk.find(needle, i + 1)
+
+        # Ô cát của chunk kề có thể vừa có nước kề nằm trong chunk mới
+        x1, y1 = min(x0 + size, w), min(y0 + size, store.height)
+        border = []
+        if y0 > 0:
+            border += [(col, y0 - 1) for col in range(x0, x1)]
+        if y1 < store.height:
+            border += [(col, y1) for col in range(x0, x1)]
+        if x0 > 0:
+            border += [(x0 - 1, row) for row in range(y0, y1)]
+        if x1 < w:
+            border += [(x1, row) for row in range(y0, y1)]
+        for col, row in border:
+            if store.is_loaded(col, row):
+                self._recheck(row * w + col)
+
+    def remove_chunk(self, key):
+        """Chunk key bị giải phóng"""
+        self.chunk_sets.pop(key, None)
+
+    # ==================== TRUY VẤN ====================
+    def positions(self):
+        """Danh sách (col, row) các ô cát sát nước (thứ tự cố định)"""
+        w = self.store.width
+        if self.dense:
+            indices = sorted(self.coastal)
+        else:
+            indices = sorted(idx for coastal in self.chunk_sets.values() for idx in coastal)
+        return [(idx % w, idx // w) for idx in indices]
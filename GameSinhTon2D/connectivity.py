@@ -0,0 +1,215 @@
+"""
+Connectivity - Nhãn vùng liên thông của các ô đi được
+Mỗi vùng được gán nhãn bằng một lần flood fill (lười - khi lần đầu được hỏi),
+sau đó truy vấn "cùng vùng?" là O(1). Ô mới đi được thì gộp vùng bằng union-find.
+"""
+from array import array
+from settings import *
+
+# Ô chặn đường (giống điều kiện di chuyển của Player.move và các BFS trong helper)
+BLOCKED_TILES = (TILE_WATER, TILE_TREE, TILE_ROCK)
+
+class Connectivity:
+    def __init__(self, store, dense=True):
+        """
+        Args:
+            store: TileGrid hoặc ChunkedWorld (cần width, height, peek_idx, neighbors4)
+            dense: True = nhãn lưu trong mảng width*height, False = lưu trong dict
+        """
+        self.store = store
+        self.dense = dense
+        self.blocked = bytearray(256)
+        for tile in BLOCKED_TILES:
+            self.blocked[tile] = 1
+        self.reset()
+
+    @classmethod
+    def for_grid(cls, grid):
+        """Nhãn vùng cho TileGrid - gán lười khi được hỏi (TileGrid gắn vào observers)"""
+        return cls(grid)
+
+    def reset(self):
+        """Xoá toàn bộ nhãn - các vùng sẽ được gán lại khi được hỏi"""
+        size = self.store.width * self.store.height
+        self.labels = array('i', [-1]) * size if self.dense else {}
+        self.parent = []  # Union-find trên nhãn vùng
+        self.size = []    # Số ô của vùng (chỉ đúng tại gốc)
+
+    # ==================== UNION-FIND ====================
+    def _find(self, label):
+        parent = self.parent
+        root = label
+        while parent[root] != root:
+            root = parent[root]
+        while parent[label] != root:  # Nén đường đi
+            parent[label], label = root, parent[label]
+        return root
+
+    def _union(self, a, b):
+        a, b = self._find(a), self._find(b)
+        if a == b:
+            return a
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return a
+
+    def _new_label(self):
+        label = len(self.parent)
+        self.parent.append(label)
+        self.size.append(0)
+        return label
+
+    def _get_label(self, idx):
+        return self.labels[idx] if self.dense else self.labels.get(idx, -1)
+
+    # ==================== GÁN NHÃN ====================
+    def _flood(self, start):
+        """Gán nhãn mới cho vùng chứa start; chạm vùng đã có nhãn thì gộp vào"""
+        store, labels, blocked = self.store, self.labels, self.blocked
+        label = self._new_label()
+        labels[start] = label
+        count = 1
+        stack = [start]
+        touched = []
+        while stack:
+            idx = stack.pop()
+            for nb in store.neighbors4(idx):
+                if blocked[store.peek_idx(nb)]:
+                    continue
+                other = self._get_label(nb)
+                if other == -1:
+                    labels[nb] = label
+                    count += 1
+                    stack.append(nb)
+                elif other != label:
+                    touched.append(other)
+        self.size[label] = count
+        for other in touched:
+            self._union(label, other)
+
+    def component_of(self, pos):
+        """
+        Mã vùng liên thông chứa ô pos
+
+        Returns:
+            int hoặc None nếu ô không đi được / ngoài bản đồ
+        """
+        col, row = pos
+        if not self.store.in_bounds(col, row):
+            return None
+        idx = row * self.store.width + col
+        if self.blocked[self.store.peek_idx(idx)]:
+            return None
+        label = self._get_label(idx)
+        if label == -1:
+            self._flood(idx)
+            label = self._get_label(idx)
+        return self._find(label)
+
+    def in_component(self, pos, comp):
+        """
+        Ô pos có thuộc vùng comp (mã từ component_of) không
+        Không gán nhãn vùng mới: mọi ô của comp đã có nhãn từ lần flood fill của comp
+        """
+        col, row = pos
+        if not self.store.in_bounds(col, row):
+            return False
+        label = self._get_label(row * self.store.width + col)
+        return label != -1 and self._find(label) == comp
+    
+    def same_component(self, a, b):
+        """Hai ô có đi tới nhau được không (không nhảy qua chướng ngại)"""
+        comp = self.component_of(a)
+        return comp is not None and comp == self.component_of(b)
+
+    def component_size(self, pos):
+        """Số ô đi được trong vùng chứa pos (0 nếu ô bị chặn)"""
+        comp = self.component_of(pos)
+        return self.size[comp] if comp is not None else 0
+
+    def component_at_least(self, pos, min_size):
+        """
+        Vùng chứa pos có ít nhất min_size ô không
+        Vùng đã có nhãn thì tra kích thước O(1); chưa có thì DFS dừng sau min_size ô (không gán nhãn)
+        """
+        col, row = pos
+        if not self.store.in_bounds(col, row):
+            return False
+        store, blocked = self.store, self.blocked
+        start = row * store.width + col
+        if blocked[store.peek_idx(start)]:
+            return False
+        label = self._get_label(start)
+        if label != -1:
+            return self.size[self._find(label)] >= min_size
+        seen = {start}
+        stack = [start]
+        while stack and len(seen) < min_size:
+            for nb in store.neighbors4(stack.pop()):
+                if nb not in seen and not blocked[store.peek_idx(nb)]:
+                    seen.add(nb)
+                    stack.append(nb)
+        return len(seen) >= min_size
+
+    # ==================== CẬP NHẬT KHI TILE ĐỔI ====================
+    def add_chunk(self, key):
+        """
+        Chunk key vừa được sinh (ChunkedWorld): flood fill chỉ đọc chunk đã sinh nên vùng kề
+        có nhãn có thể lan tiếp vào chunk mới - gán nhãn ngay các ô giáp ranh nối với vùng đó
+        """
+        store = self.store
+        size, w, h = store.chunk_size, store.width, store.height
+        x0, y0 = key[0] * size, key[1] * size
+        x1, y1 = min(x0 + size, w), min(y0 + size, h)
+        # (ô trong chunk mới, ô kề bên ngoài)
+        pairs = []
+        if y0 > 0:
+            pairs += [((col, y0), (col, y0 - 1)) for col in range(x0, x1)]
+        if y1 < h:
+            pairs += [((col, y1 - 1), (col, y1)) for col in range(x0, x1)]
+        if x0 > 0:
+            pairs += [((x0, row), (x0 - 1, row)) for row in range(y0, y1)]
+        if x1 < w:
+            pairs += [((x1 - 1, row), (x1, row)) for row in range(y0, y1)]
+        blocked = self.blocked
+        for (col, row), (out_col, out_row) in pairs:
+            idx, out = row * w + col, out_row * w + out_col
+            if self._get_label(out) == -1 or self._get_label(idx) != -1:
+                continue
+            if not blocked[store.peek_idx(idx)] and not blocked[store.peek_idx(out)]:
+                self._flood(idx)  # Chạm ô out nên tự gộp vào vùng của nó
+
+    def on_change(self, idx, old, new):
+        """Gọi mỗi lần ô idx đổi từ old sang new"""
+        was_blocked, now_blocked = self.blocked[old], self.blocked[new]
+        if was_blocked == now_blocked:
+            return
+        if now_blocked:
+            # Ô đi được bị chặn -> vùng có thể bị tách: gán nhãn lại khi cần
+            # (không xảy ra trong lúc chơi: lửa/mưa/nhặt đồ chỉ đổi giữa các ô đi được)
+            if self._get_label(idx) != -1:
+                self.reset()
+            return
+        # Ô bị chặn thành đi được (vd. cây cháy): nối vào các vùng kề đã có nhãn
+        store = self.store
+        neighbours = [nb for nb in store.neighbors4(idx) if not self.blocked[store.peek_idx(nb)]]
+        label = -1
+        for nb in neighbours:
+            other = self._get_label(nb)
+            if other == -1:
+                continue
+            if label == -1:
+                label = self._find(other)
+                self.labels[idx] = label
+                self.size[label] += 1
+            else:
+                label = self._union(label, other)
+        if label == -1:
+            return  # Chưa vùng kề nào có nhãn: ô được gán khi flood fill tới
+        # Vùng kề chưa có nhãn giờ nối với vùng đã gán -> flood fill ngay (chạm idx nên tự gộp),
+        # nếu không các ô của nó vẫn là -1 và in_component/component_size sai
+        for nb in neighbours:
+            if self._get_label(nb) == -1:
+                self._flood(nb)
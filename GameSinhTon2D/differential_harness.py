@@ -0,0 +1,325 @@
+"""
+Differential Harness - Chạy bản gốc (reference) và bản tối ưu (candidate) song song
+Cùng seed, cùng kịch bản đầu vào; so sánh trạng thái sau MỖI tick
+(tập lửa, tập cảnh báo, tile bản đồ, đường đi...), báo điểm lệch đầu tiên và tỉ lệ tăng tốc.
+
+Chạy (không cần cửa sổ - SDL dummy driver):
+    python differential_harness.py fire
+    python differential_harness.py paths --ticks 200 --level 5
+    python differential_harness.py fire --reference fire:FireSystem --candidate fire_np:FireSystemNP
+
+Engine được chỉ định dạng "module:Class". Mặc định mỗi kịch bản so bản gốc
+(fire.py, reference_engines.py) với bản tối ưu hiện có.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import copy
+import time
+import random
+import argparse
+import importlib
+from settings import *
+from level_manager import LevelManager
+from level_prefetch import build_level
+from pathfinding import make_cost_fn, PATH_BLOCKED_TILES
+
+TICK_MS = 100  # Mỗi tick = 100ms game_time
+
+# Cặp engine mặc định cho từng kịch bản: (reference, candidate)
+DEFAULT_PAIRS = {
+    "fire": ("fire:FireSystem", "fire_np:FireSystemNP"),
+    "rain": ("reference_engines:RainSystem", "rain:RainSystem"),
+    "boat": ("reference_engines:RescueSystem", "rescue:RescueSystem"),
+    "paths": ("reference_engines:PathHelper", "helper:PathHelper"),
+}
+
+# Số tick mặc định riêng (spawn_boat gốc chạy một DFS cho mỗi ô bờ biển - rất chậm)
+DEFAULT_TICKS = {"boat": 30}
+
+def load_class(spec):
+    """'module:Class' -> class"""
+    module_name, class_name = spec.split(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+def tick_seed(seed, tick):
+    """Seed cho random ở một tick - giống nhau cho cả hai bên"""
+    return seed * 1000003 + tick
+
+def make_spread_roll(seed):
+    """
+    Số ngẫu nhiên khi lan lửa theo (seed, ô, thời điểm) - không phụ thuộc thứ tự rút
+    -> hai engine lửa ra cùng quyết định cho cùng một ô (FireSystem.spread_roll)
+    """
+    def roll(pos, game_time):
+        return random.Random(f"{seed}:{pos[0]}:{pos[1]}:{game_time}").random()
+    return roll
+
+
+class Side:
+    """Trạng thái của một bên (reference hoặc candidate) + tổng thời gian chạy engine"""
+    def __init__(self, name, engine_class, world):
+        self.name = name
+        self.engine_class = engine_class
+        self.elapsed = 0.0
+        self.map_data, self.player, self.fire_system, self.rescue_system, self.path_helper = copy.deepcopy(world)
+        self.script_pos = (self.player.grid_x, self.player.grid_y)  # Vị trí player theo kịch bản
+
+    def timed(self, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        self.elapsed += time.perf_counter() - start
+        return result
+
+
+# ==================== KỊCH BẢN ====================
+def make_fire(engine_class, config, args):
+    """Engine lửa với xác suất lan của kịch bản và bộ rút số dùng chung cho hai bên"""
+    fire = engine_class(config)
+    if args.spread_chance is not None:
+        fire.spread_chance = args.spread_chance
+    fire.spread_roll = make_spread_roll(args.seed)
+    return fire
+
+def setup_fire(side, config, args):
+    side.engine = make_fire(side.engine_class, config, args)
+
+def step_fire(side, tick, game_time, script):
+    side.timed(side.engine.update, side.map_data, game_time)
+    # Kịch bản mưa: dập các ô đã chọn sẵn (giống nhau cho hai bên)
+    for pos in script.get("extinguish", ()):
+        side.timed(side.engine.extinguish_tile, pos, side.map_data)
+    return {
+        "fire_tiles": set(side.engine.fire_tiles),
+        "warning_tiles": set(side.engine.warning_tiles),
+        "map": map_bytes(side.map_data),
+    }
+
+def setup_rain(side, config, args):
+    side.engine = side.engine_class()
+    side.fire = make_fire(load_class(DEFAULT_PAIRS["fire"][0]), config, args)
+
+def step_rain(side, tick, game_time, script):
+    side.fire.update(side.map_data, game_time)
+    side.timed(side.engine.update, game_time, side.fire, side.map_data, [])
+    return {
+        "is_raining": side.engine.is_raining,
+        "rain_window": (side.engine.rain_start_time, side.engine.rain_duration),
+        "spreading_paused": side.fire.spreading_paused,
+        "storm_cells": [(cell.col, cell.row, cell.end_time) for cell in side.engine.storm_cells],
+        "fire_tiles": set(side.fire.fire_tiles),
+        "map": map_bytes(side.map_data),
+    }
+
+def setup_boat(side, config, args):
+    side.engine = None
+
+def step_boat(side, tick, game_time, script):
+    # Mỗi tick đặt thuyền lại trên bản đồ gốc (spawn_boat là thao tác một lần)
+    map_data = copy.deepcopy(side.map_data)
+    loaded = set(getattr(map_data, "chunks", ()))
+    rescue = side.engine_class()
+    side.timed(rescue.spawn_boat, map_data, side.script_pos)
+    # Hai bên chọn ngẫu nhiên trên cùng danh sách bờ biển (thứ tự hàng) với cùng seed
+    # -> phải ra đúng một ô; kiểm tra thêm ô đó hợp lệ với BFS độc lập
+    landing = None
+    if rescue.boat_position:
+        col, row = rescue.boat_position
+        map_data.set_tile(col, row, TILE_SAND)
+        landing = (is_coast(map_data, col, row), reachable(map_data, side.script_pos, (col, row)))
+    return {"boat_position": rescue.boat_position, "landing": landing,
+            "map": map_bytes(map_data, loaded or None)}
+
+def setup_paths(side, config, args):
+    side.engine = side.engine_class()
+    side.fire = make_fire(load_class(DEFAULT_PAIRS["fire"][0]), config, args)
+    side.path_length_only = args.path_length_only
+
+def step_paths(side, tick, game_time, script):
+    side.fire.update(side.map_data, game_time)
+    player_pos = script["player_pos"]
+    pieces = side.rescue_system.piece_positions
+    helper = side.engine
+    state = {}
+
+    all_paths = side.timed(helper.find_all_pieces_bfs, player_pos, side.map_data, pieces)
+    state["piece_paths"] = {pos: path_key(path, side) for pos, path in all_paths.items()}
+
+    escape = side.timed(helper.find_safe_path_bfs, player_pos, side.map_data, side.fire, game_time)
+    state["escape_path"] = path_key(escape, side)
+
+    if side.rescue_system.boat_position:
+        helper.escape_path = []
+        side.timed(helper.find_path_to_boat, side.map_data, player_pos, side.rescue_system,
+                   side.player, [], side.fire)
+        # Nhiều đường cùng chi phí nhỏ nhất đều hợp lệ -> so chi phí và tính hợp lệ của đường
+        state["boat_path"] = route_key(helper.escape_path, player_pos, side)
+    return state
+
+SCENARIOS = {
+    "fire": (setup_fire, step_fire),
+    "rain": (setup_rain, step_rain),
+    "boat": (setup_boat, step_boat),
+    "paths": (setup_paths, step_paths),
+}
+
+
+# ==================== TIỆN ÍCH ====================
+def map_bytes(map_data, keys=None):
+    """Ảnh chụp tile của bản đồ (TileGrid: toàn bộ; quần đảo: các chunk đã sinh hoặc trong keys)"""
+    if hasattr(map_data, "data"):
+        return bytes(map_data.data)
+    return {key: bytes(chunk) for key, chunk in map_data.chunks.items() if keys is None or key in keys}
+
+def is_coast(map_data, col, row):
+    """Ô cát có ô nước kề 4 hướng"""
+    if map_data.get_tile(col, row) != TILE_SAND:
+        return False
+    return any(map_data.in_bounds(col + dx, row + dy) and map_data.get_tile(col + dx, row + dy) == TILE_WATER
+               for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+def reachable(map_data, start, goal):
+    """BFS độc lập (không dùng Connectivity): goal đi tới được từ start không"""
+    blocked = (TILE_WATER, TILE_TREE, TILE_ROCK)
+    if map_data.get_tile(*start) in blocked:
+        return False
+    visited = {start}
+    queue = [start]
+    for col, row in queue:
+        if (col, row) == goal:
+            return True
+        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+            nxt = (col + dx, row + dy)
+            if nxt not in visited and map_data.in_bounds(*nxt) and map_data.get_tile(*nxt) not in blocked:
+                visited.add(nxt)
+                queue.append(nxt)
+    return False
+
+def route_key(path, start, side):
+    """(đường liền mạch, đi được, tới thuyền; tổng chi phí theo make_cost_fn) của đường tới thuyền"""
+    if not path:
+        return (False, 0)
+    cost_fn = make_cost_fn(side.fire)
+    map_data = side.map_data
+    prev = start
+    valid = path[-1] == side.rescue_system.boat_position
+    cost = 0
+    for pos in path:
+        tile = map_data.get_tile(*pos)
+        valid = valid and abs(pos[0] - prev[0]) + abs(pos[1] - prev[1]) == 1 and tile not in PATH_BLOCKED_TILES
+        cost += cost_fn(pos, tile)
+        prev = pos
+    return (valid, cost)
+
+def path_key(path, side):
+    """Đường đi để so sánh - chỉ độ dài nếu --path-length-only (nhiều đường ngắn nhất hợp lệ)"""
+    return len(path) if side.path_length_only else list(path)
+
+def describe_difference(ref_value, cand_value):
+    """Mô tả ngắn sự khác nhau của một trường"""
+    if isinstance(ref_value, set) and isinstance(cand_value, set):
+        only_ref = sorted(ref_value - cand_value)[:5]
+        only_cand = sorted(cand_value - ref_value)[:5]
+        return f"chỉ reference: {only_ref} | chỉ candidate: {only_cand}"
+    if isinstance(ref_value, bytes) and isinstance(cand_value, bytes) and len(ref_value) == len(cand_value):
+        diffs = [i for i in range(len(ref_value)) if ref_value[i] != cand_value[i]][:5]
+        return "ô lệch (chỉ số phẳng: ref->cand): " + ", ".join(
+            f"{i}: {ref_value[i]}->{cand_value[i]}" for i in diffs)
+    return f"reference={str(ref_value)[:200]} | candidate={str(cand_value)[:200]}"
+
+def make_script(scenario, tick, game_time, side, rng, args):
+    """Đầu vào kịch bản của tick (tính từ bên reference, dùng chung cho hai bên)"""
+    script = {}
+    if scenario == "fire" and args.rain_every and tick % args.rain_every == 0:
+        fire_tiles = sorted(side.engine.fire_tiles)
+        script["extinguish"] = rng.sample(fire_tiles, min(RAIN_EXTINGUISH_RATE, len(fire_tiles)))
+    if scenario == "paths":
+        # Player đi ngẫu nhiên trên các ô đi được
+        col, row = side.script_pos
+        dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        if side.map_data.in_bounds(col + dx, row + dy) and \
+                side.map_data.get_tile(col + dx, row + dy) not in [TILE_WATER, TILE_TREE, TILE_ROCK, TILE_FIRE]:
+            col, row = col + dx, row + dy
+        side.script_pos = (col, row)
+        script["player_pos"] = (col, row)
+    return script
+
+
+# ==================== CHẠY ====================
+def run(scenario, reference_spec, candidate_spec, args):
+    config = LevelManager().get_level_config(args.level)
+    config["seed"] = args.seed
+    config["fire_seed"] = args.seed
+    if args.world_mode:
+        config["world_mode"] = args.world_mode
+    random.seed(args.seed)
+    map_data, player, fire_system, rescue_system, path_helper, _ = build_level(config)
+    if scenario in ("boat", "paths"):
+        rescue_system.spawn_boat(map_data, (player.grid_x, player.grid_y))
+        rescue_system.boat_arrived = True  # find_path_to_boat chỉ tìm khi thuyền đã đến
+    world = (map_data, player, fire_system, rescue_system, path_helper)
+
+    setup, step = SCENARIOS[scenario]
+    reference = Side("reference", load_class(reference_spec), world)
+    candidate = Side("candidate", load_class(candidate_spec), world)
+    setup(reference, config, args)
+    setup(candidate, config, args)
+
+    script_rng = random.Random(args.seed)
+    print(f"Kịch bản '{scenario}': {reference_spec} vs {candidate_spec} | level {args.level}, seed {args.seed}, {args.ticks} tick")
+
+    for tick in range(1, args.ticks + 1):
+        game_time = tick * TICK_MS
+        script = make_script(scenario, tick, game_time, reference, script_rng, args)
+        states = []
+        for side in (reference, candidate):
+            # Như vòng lặp game: bỏ mục nhật ký đã đọc, đặt thời gian cho mục mới
+            side.map_data.journal.begin_frame(game_time)
+            random.seed(tick_seed(args.seed, tick))
+            states.append(step(side, tick, game_time, script))
+        ref_state, cand_state = states
+        for field in ref_state:
+            if ref_state[field] != cand_state.get(field):
+                print(f"LỆCH tại tick {tick} (game_time {game_time}ms), trường '{field}':")
+                print("   " + describe_difference(ref_state[field], cand_state.get(field)))
+                report_speed(reference, candidate)
+                return False
+
+    print(f"Giống nhau qua {args.ticks} tick.")
+    report_speed(reference, candidate)
+    return True
+
+def report_speed(reference, candidate):
+    ratio = reference.elapsed / candidate.elapsed if candidate.elapsed > 0 else float("inf")
+    print(f"Thời gian engine: reference {reference.elapsed * 1000:.1f}ms, "
+          f"candidate {candidate.elapsed * 1000:.1f}ms -> tăng tốc x{ratio:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="So sánh engine gốc và engine tối ưu theo từng tick")
+    parser.add_argument("scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--reference", help="module:Class bản gốc (mặc định theo kịch bản)")
+    parser.add_argument("--candidate", help="module:Class bản tối ưu (mặc định theo kịch bản)")
+    parser.add_argument("--ticks", type=int, help="Số tick (100ms/tick, mặc định 900 - boat: 30) - mưa đầu tiên ở tick 600")
+    parser.add_argument("--seed", type=int, default=12345)
+    parser.add_argument("--level", type=int, default=7)
+    parser.add_argument("--world-mode", choices=["island", "archipelago"])
+    parser.add_argument("--spread-chance", type=float,
+                        help="Ép xác suất lan lửa (mặc định theo level; hai bên rút số ngẫu nhiên chung theo ô)")
+    parser.add_argument("--rain-every", type=int, default=50, help="Kịch bản lửa: dập vài ô mỗi N tick (0 = tắt)")
+    parser.add_argument("--path-length-only", action="store_true",
+                        help="Chỉ so độ dài đường đi (các đường ngắn nhất khác nhau đều hợp lệ)")
+    args = parser.parse_args()
+
+    if args.ticks is None:
+        args.ticks = DEFAULT_TICKS.get(args.scenario, 900)
+    reference_spec = args.reference or DEFAULT_PAIRS[args.scenario][0]
+    candidate_spec = args.candidate or DEFAULT_PAIRS[args.scenario][1]
+    if args.world_mode == "archipelago" and "fire_np:" in reference_spec + candidate_spec:
+        parser.error("FireSystemNP chỉ chạy trên bản đồ dày (island) - chọn --candidate khác")
+    ok = run(args.scenario, reference_spec, candidate_spec, args)
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,41 @@
+import heapq
 import random
 from settings import *
+from world import get_map_size
+from fire_field import FireDistanceField, FireDensityGrid, FireArrivalMap
+from wetness import WetnessMap, np
+
+def create_fire_system(level_config=None, map_data=None):
+    """
+    Tạo FireSystem theo engine của level (level_config["fire_engine"])
+    
+    Returns:
+        FireSystemNP nếu chọn "numpy", có NumPy và map lưu dày (TileGrid), ngược lại FireSystem
+    """
+    engine = level_config.get("fire_engine", FIRE_ENGINE) if level_config else FIRE_ENGINE
+    if engine == "numpy" and hasattr(map_data, "data"):
+        from fire_np import FireSystemNP, np
+        if np is not None:
+            return FireSystemNP(level_config)
+    return FireSystem(level_config)
 
 class FireSystem:
     def __init__(self, level_config=None):
         self.fire_tiles = set()  # Set of (col, row) that are on fire
         self.warning_tiles = {}  # Dict {(col, row): warning_start_time}
+        self.warning_heap = []   # Min-heap (hạn bắt lửa, (col, row)) - chỉ lấy ra các ô đã đến hạn
         self.fire_intensity = {}  # Dict {(col, row): burn_time} - thời gian đã cháy
+        self.frontier = set()     # Ô đang cháy còn ô kề có thể bắt lửa - chỉ các ô này được lan
+        self.pending_writes = []  # Ô mới bắt lửa chưa ghi TILE_FIRE vào map (ghi ở lượt lan kế)
+        self.distance_field = None  # FireDistanceField - tạo khi biết kích thước map
+        self.density = None         # FireDensityGrid - số ô cháy kề 8 hướng
+        self.arrival = FireArrivalMap()  # Thời điểm lửa tới từng ô - sửa tăng dần mỗi lượt lan
+        self.wetness = None         # WetnessMap - độ ẩm sau mưa (cần NumPy), RainSystem làm ướt
+        self.spread_roll = None     # Hàm (pos, game_time) -> số [0, 1) thay RNG khi lan (differential_harness)
         self.last_spread_time = 0
         self.fire_started = False
+        self.map_width = MAP_WIDTH    # Cập nhật theo map_data trong update()
+        self.map_height = MAP_HEIGHT
         self.game_start_time = 0
         
         # Level-specific parameters
@@ -15,10 +43,12 @@ class FireSystem:
             self.spread_interval = level_config.get("fire_spread_interval", FIRE_SPREAD_INTERVAL)
             self.start_delay = level_config.get("fire_start_delay", FIRE_START_DELAY)
             self.spawn_points = level_config.get("fire_spawn_points", 1)
+            self.spread_chance = level_config.get("fire_spread_chance", FIRE_SPREAD_CHANCE)
         else:
             self.spread_interval = FIRE_SPREAD_INTERVAL
             self.start_delay = FIRE_START_DELAY
             self.spawn_points = 1
+            self.spread_chance = FIRE_SPREAD_CHANCE
         
         # Player damage tracking
         self.last_damage_time = 0
@@ -27,6 +57,8 @@ class FireSystem:
         
         # Rain control
         self.spreading_paused = False  # Tạm dừng lan rộng khi mưa
+        self.resume_time = 0           # Thời điểm mưa tạnh (lửa lan lại) - đặt bởi RainSystem
+        self.rain_cover = None         # RainCover của các ô mưa giông - lửa không lan trong vùng này
     
     def start_fire(self, map_data, game_time):
         """Bắt đầu đám cháy tại N vị trí ngẫu nhiên (dựa trên spawn_points)"""
@@ -35,22 +67,16 @@ class FireSystem:
         
         self.game_start_time = game_time
         
-        # Tìm các ô cỏ hoặc cây ngẫu nhiên để bắt đầu cháy
-        valid_tiles = []
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                if map_data[row][col] in [TILE_GRASS, TILE_TREE, TILE_FLOWER]:
-                    valid_tiles.append((col, row))
-        
-        if valid_tiles:
-            # Spawn multiple fire points
-            spawn_count = min(self.spawn_points, len(valid_tiles))
-            for i in range(spawn_count):
-                start_pos = random.choice(valid_tiles)
-                self.fire_tiles.add(start_pos)
-                self.fire_intensity[start_pos] = game_time
-                # Remove để tránh spawn chồng lên nhau
-                valid_tiles.remove(start_pos)
+        # Chọn các ô cỏ, cây hoặc hoa ngẫu nhiên từ chỉ mục tile để bắt đầu cháy
+        flammable_types = [TILE_GRASS, TILE_TREE, TILE_FLOWER]
+        index = map_data.tile_index
+        valid_count = sum(index.count(tile_type) for tile_type in flammable_types)
+        
+        if valid_count:
+            # Spawn multiple fire points (các vị trí khác nhau, không chồng lên nhau)
+            spawn_count = min(self.spawn_points, valid_count)
+            for i, start_pos in enumerate(index.sample_many(flammable_types, spawn_count)):
+                self.ignite(start_pos, game_time)
                 print(f"🔥 Điểm lửa {i+1}/{spawn_count} tại ({start_pos[0]}, {start_pos[1]})!")
             
             self.fire_started = True
@@ -64,7 +90,7 @@ class FireSystem:
                 if dx == 0 and dy == 0:
                     continue
                 new_col, new_row = col + dx, row + dy
-                if 0 <= new_col < MAP_WIDTH and 0 <= new_row < MAP_HEIGHT:
+                if 0 <= new_col < self.map_width and 0 <= new_row < self.map_height:
                     neighbors.append((new_col, new_row))
         return neighbors
     
@@ -72,28 +98,130 @@ class FireSystem:
         """Kiểm tra tile có thể cháy không"""
         return tile_type in [TILE_GRASS, TILE_TREE, TILE_FLOWER]
     
+    def may_become_flammable(self, tile_type):
+        """Tile cháy được, hoặc là vật phẩm sẽ thành cỏ khi được nhặt"""
+        return tile_type in [TILE_GRASS, TILE_TREE, TILE_FLOWER, TILE_HEALTH, TILE_STAMINA, TILE_PIECE]
+    
+    # ==================== FRONTIER (VIỀN ĐÁM CHÁY) ====================
+    def ignite(self, pos, game_time):
+        """Ô pos bắt đầu cháy: thêm vào tập lửa và viền, chờ ghi vào map"""
+        self.fire_tiles.add(pos)
+        self.fire_intensity[pos] = game_time
+        self.frontier.add(pos)
+        self.pending_writes.append(pos)
+        self.track_source(pos)
+    
+    def extinguish_tile(self, pos, map_data):
+        """Dập lửa tại pos (mưa): ô trở lại thành cỏ, các ô cháy xung quanh lại có thể lan vào"""
+        if pos not in self.fire_tiles:
+            return
+        self.fire_tiles.remove(pos)
+        self.frontier.discard(pos)
+        self.untrack_source(pos)
+        
+        col, row = pos
+        if map_data.get_tile(col, row) == TILE_FIRE:
+            map_data.set_tile(col, row, TILE_GRASS)
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            neighbor = (col + dx, row + dy)
+            if neighbor in self.fire_tiles:
+                self.frontier.add(neighbor)
+    
+    def has_unburnt_neighbor(self, pos, map_data):
+        """Ô cháy còn ô kề có thể bắt lửa (chưa cháy, chưa cảnh báo) -> vẫn thuộc viền"""
+        col, row = pos
+        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            new_col, new_row = col + dx, row + dy
+            if 0 <= new_col < self.map_width and 0 <= new_row < self.map_height:
+                neighbor = (new_col, new_row)
+                if neighbor in self.fire_tiles or neighbor in self.warning_tiles:
+                    continue
+                if self.may_become_flammable(map_data.get_tile(new_col, new_row)):
+                    return True
+        return False
+    
     def is_safe_zone(self, tile_type):
         """Kiểm tra tile có phải vùng an toàn (chặn lửa) không"""
         return tile_type in [TILE_WATER, TILE_SAND, TILE_ROCK]
     
+    def ensure_fire_fields(self, map_data):
+        """Tạo trường khoảng cách + lưới mật độ lửa theo kích thước map (lần update đầu tiên)"""
+        if self.distance_field is None:
+            dense = hasattr(map_data, "data")
+            self.distance_field = FireDistanceField(self.map_width, self.map_height, dense=dense)
+            self.density = FireDensityGrid(self.map_width, self.map_height, dense=dense)
+            self.wetness = WetnessMap(self.map_width, self.map_height) if np is not None else None
+    
+    def track_source(self, pos):
+        """Ô pos vừa bắt lửa: cập nhật các trường suy ra từ tập lửa"""
+        self.distance_field.add_source(pos)
+        self.density.add_source(pos)
+        self.arrival.note_change(pos)
+    
+    def untrack_source(self, pos):
+        """Ô pos hết cháy: cập nhật các trường suy ra từ tập lửa"""
+        self.distance_field.remove_source(pos)
+        self.density.remove_source(pos)
+        self.arrival.note_change(pos)
+    
+    def distance_to_fire(self, pos):
+        """Khoảng cách Manhattan từ pos tới ô lửa gần nhất (inf nếu chưa có lửa / rất xa)"""
+        if self.distance_field is None:
+            return float('inf')
+        return self.distance_field.distance_to_fire(pos)
+    
+    def tiles_at_distance(self, d):
+        """Các ô (col, row) cách lửa đúng d ô"""
+        if self.distance_field is None:
+            return set()
+        return self.distance_field.tiles_at_distance(d)
+    
+    def get_spread_sources(self):
+        """Ô cháy còn có thể lan sang ô kề (viền đám cháy)"""
+        return self.frontier
+    
+    def eta(self, pos):
+        """
+        game_time sớm nhất lửa tới ô pos (ước lượng khi mọi lần lan đều trúng)
+        Returns: 0 nếu đang cháy, inf nếu không cháy được / quá xa
+        """
+        if self.is_position_in_fire(pos):
+            return 0
+        warn_time = self.warning_tiles.get(pos)
+        if warn_time is not None:
+            return warn_time + FIRE_WARNING_TIME
+        return self.arrival.eta(pos)
+    
+    def fires_under(self, cover):
+        """Các ô đang cháy nằm trong vùng mưa cover (sắp xếp để thứ tự dập tất định)"""
+        return sorted(cover.select(self.fire_tiles))
+    
+    def get_fire_density(self, pos):
+        """Số ô cháy kề 8 hướng của pos - "áp lực lửa" cho damage, hiển thị, AI"""
+        if self.density is None:
+            return 0
+        return self.density.count_at(pos)
+    
     def update(self, map_data, game_time):
         """Cập nhật và lan rộng lửa"""
+        self.map_width, self.map_height = get_map_size(map_data)
+        self.ensure_fire_fields(map_data)
+        self.arrival.refresh(self, map_data, game_time)
+        
         if not self.fire_started:
             # Kiểm tra xem đã đến lúc bắt đầu cháy chưa (dùng start_delay từ level config)
             if game_time > self.start_delay:
                 self.start_fire(map_data, game_time)
             return
         
-        # Cập nhật warning tiles (kiểm tra tiles đã hết thời gian cảnh báo)
-        tiles_to_ignite = []
-        for pos, warn_time in list(self.warning_tiles.items()):
-            if game_time - warn_time >= FIRE_WARNING_TIME:
-                tiles_to_ignite.append(pos)
-        
-        # Đốt các tiles đã hết thời gian cảnh báo
-        for pos in tiles_to_ignite:
-            self.fire_tiles.add(pos)
-            self.fire_intensity[pos] = game_time
+        # Đốt các tiles đã hết thời gian cảnh báo - chỉ pop các hạn đã tới,
+        # chi phí mỗi frame không phụ thuộc số ô đang cảnh báo
+        heap = self.warning_heap
+        while heap and heap[0][0] <= game_time:
+            deadline, pos = heapq.heappop(heap)
+            if self.warning_tiles.get(pos) != deadline - FIRE_WARNING_TIME:
+                continue  # Mục cũ (ô đã bị bỏ cảnh báo)
+            self.ignite(pos, game_time)
             del self.warning_tiles[pos]
         
         # Kiểm tra thời gian lan lửa (dùng spread_interval từ level config)
@@ -106,31 +234,57 @@ class FireSystem:
         
         self.last_spread_time = game_time
         
-        # Lan lửa sang các ô lân cận (với warning)
+        # Lan lửa sang các ô lân cận (với warning) - chỉ duyệt viền đám cháy,
+        # chi phí theo chu vi chứ không theo diện tích
         new_warning_tiles = {}
-        for (col, row) in self.fire_tiles:
+        # Có spread_roll: gom số ô cháy kề mỗi ô rồi rút một lần 1 - (1 - p)^n
+        # (cùng phân phối, cùng cách rút với FireSystemNP)
+        rolled = {} if self.spread_roll is not None else None
+        cover = self.rain_cover
+        wetness = self.wetness if self.wetness is not None and self.wetness.active else None
+        for (col, row) in self.frontier:
+            # Ô đang bị mưa giông không lan
+            if cover is not None and cover.covers(col, row):
+                continue
             # Kiểm tra 4 hướng chính
             for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
                 new_col, new_row = col + dx, row + dy
                 
                 # Kiểm tra biên
-                if 0 <= new_col < MAP_WIDTH and 0 <= new_row < MAP_HEIGHT:
-                    tile = map_data[new_row][new_col]
+                if 0 <= new_col < self.map_width and 0 <= new_row < self.map_height:
+                    tile = map_data.get_tile(new_col, new_row)
                     pos = (new_col, new_row)
                     
-                    # Chỉ lan sang tiles có thể cháy
-                    if self.is_flammable(tile):
+                    # Chỉ lan sang tiles có thể cháy (và không đang bị mưa giông)
+                    if self.is_flammable(tile) and (cover is None or not cover.covers(new_col, new_row)):
                         if pos not in self.fire_tiles and pos not in self.warning_tiles:
-                            # 60% cơ hội lan sang (tăng từ 50%)
-                            if random.random() < 0.6:
+                            # 60% cơ hội lan sang (tăng từ 50%) - ô ẩm khó bắt lửa hơn
+                            chance = self.spread_chance
+                            if wetness is not None:
+                                chance *= 1.0 - WETNESS_SPREAD_FACTOR * wetness.at(new_col, new_row)
+                            if rolled is not None:
+                                rolled[pos] = (rolled[pos][0] + 1, chance) if pos in rolled else (1, chance)
+                            elif random.random() < chance:
                                 new_warning_tiles[pos] = game_time
+        if rolled:
+            for pos, (count, chance) in rolled.items():
+                if self.spread_roll(pos, game_time) < 1.0 - (1.0 - chance) ** count:
+                    new_warning_tiles[pos] = game_time
         
         # Thêm warning tiles mới
         self.warning_tiles.update(new_warning_tiles)
+        for pos in new_warning_tiles:
+            heapq.heappush(self.warning_heap, (game_time + FIRE_WARNING_TIME, pos))
+            self.arrival.note_change(pos)
+        
+        # Bỏ khỏi viền các ô không còn ô kề nào có thể bắt lửa
+        self.frontier = {pos for pos in self.frontier if self.has_unburnt_neighbor(pos, map_data)}
         
-        # Cập nhật map_data để hiển thị lửa
-        for (col, row) in self.fire_tiles:
-            map_data[row][col] = TILE_FIRE
+        # Cập nhật map_data để hiển thị lửa - chỉ ghi các ô mới bắt lửa
+        for (col, row) in self.pending_writes:
+            if (col, row) in self.fire_tiles:
+                map_data.set_tile(col, row, TILE_FIRE)
+        self.pending_writes = []
     
     def get_fire_intensity_at(self, pos, game_time):
         """Tính cường độ lửa tại vị trí (để xác định damage)"""
@@ -139,9 +293,8 @@ class FireSystem:
         
         burn_time = game_time - self.fire_intensity[pos]
         
-        # Đếm số ô lửa xung quanh (fire density)
-        neighbors = self.get_neighbors(pos[0], pos[1], distance=1)
-        fire_neighbors = sum(1 for n in neighbors if n in self.fire_tiles)
+        # Số ô lửa xung quanh (fire density) - đọc từ lưới mật độ
+        fire_neighbors = self.density.count_at(pos)
         
         # Lửa yếu: mới cháy (< 5s) hoặc ít lửa xung quanh
         if burn_time < 5000 or fire_neighbors < 2:
@@ -179,33 +332,57 @@ class FireSystem:
             
             return (True, damage, 3)
         
+        # Reset consecutive hits nếu thoát khỏi lửa
+        self.consecutive_hits = 0
+        
         # 2. Kiểm tra heat zones (warning zones)
-        min_distance = float('inf')
-        for fire_pos in self.fire_tiles:
-            distance = abs(fire_pos[0] - player_pos[0]) + abs(fire_pos[1] - player_pos[1])
-            min_distance = min(min_distance, distance)
+        return (False, 0, self.get_heat_level(player_pos, game_time))
+    
+    def get_heat_level(self, player_pos, game_time=None):
+        """
+        Mức nóng tại vị trí (chỉ đọc, không áp damage - dùng cho UI)
+        Xét khoảng cách tới lửa, và nếu có game_time thì xét cả thời điểm lửa sẽ tới ô này
+        Returns: 0=safe, 1=warning, 2=danger, 3=on_fire
+        """
+        if self.is_position_in_fire(player_pos):
+            return 3
         
-        # Reset consecutive hits nếu thoát khỏi lửa
-        if player_pos not in self.fire_tiles:
-            self.consecutive_hits = 0
+        # Khoảng cách tới lửa gần nhất - tra trường khoảng cách O(1)
+        min_distance = self.distance_to_fire(player_pos)
+        
+        # Thời gian còn lại trước khi lửa tới (ô cháy được)
+        time_left = self.eta(player_pos) - game_time if game_time is not None else float('inf')
         
         # Trả về heat level
-        if min_distance == float('inf'):
-            return (False, 0, 0)  # Safe
-        elif min_distance <= HEAT_WARNING_DISTANCE:
-            return (False, 0, 2)  # Danger zone (red warning)
-        elif min_distance <= HEAT_DANGER_DISTANCE:
-            return (False, 0, 1)  # Warning zone (yellow warning)
+        if min_distance <= HEAT_WARNING_DISTANCE or time_left <= FIRE_ETA_DANGER_TIME:
+            return 2  # Danger zone (red warning)
+        elif min_distance <= HEAT_DANGER_DISTANCE or time_left <= FIRE_ETA_WARNING_TIME:
+            return 1  # Warning zone (yellow warning)
         else:
-            return (False, 0, 0)  # Safe
+            return 0  # Safe
     
-    def get_warning_tiles_visual(self, game_time):
-        """Lấy danh sách tiles cần hiển thị warning (nhấp nháy)"""
+    def get_warning_tiles_visual(self, game_time, view=None):
+        """
+        Lấy set tiles cần hiển thị warning (nhấp nháy)
+        
+        Args:
+            view: (start_col, start_row, end_col, end_row) - chỉ lấy ô trong khung nhìn
+        """
         # Chỉ hiển thị nếu đang trong chu kỳ blink
         should_show = (game_time % (WARNING_BLINK_SPEED * 2)) < WARNING_BLINK_SPEED
-        if should_show:
-            return list(self.warning_tiles.keys())
-        return []
+        if not should_show:
+            return set()
+        warning_tiles = self.warning_tiles
+        if view is None:
+            return set(warning_tiles)
+        
+        # Duyệt bên nhỏ hơn: các ô cảnh báo, hoặc các ô trong khung nhìn
+        start_col, start_row, end_col, end_row = view
+        if len(warning_tiles) <= (end_col - start_col) * (end_row - start_row):
+            return {(col, row) for (col, row) in warning_tiles
+                    if start_col <= col < end_col and start_row <= row < end_row}
+        return {(col, row) for row in range(start_row, end_row) for col in range(start_col, end_col)
+                if (col, row) in warning_tiles}
     
     def is_tile_blocked_by_safe_zone(self, from_pos, to_pos, map_data):
         """Kiểm tra xem lửa có bị chặn bởi safe zone không"""
@@ -0,0 +1,404 @@
+"""
+Fire Field - Các trường dữ liệu suy ra từ tập ô đang cháy
+- FireDistanceField: khoảng cách (Manhattan) tới ô lửa gần nhất, BFS đa nguồn
+  cập nhật tăng dần; chỉ lưu tới FIRE_FIELD_MAX_DISTANCE - xa hơn coi như vô cực.
+- FireDensityGrid: số ô cháy kề 8 hướng của mỗi ô (mật độ lửa).
+- FireArrivalMap: thời điểm sớm nhất lửa tới mỗi ô (Dijkstra, sửa tăng dần mỗi lượt lan).
+"""
+import heapq
+import math
+from array import array
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - chỉ dùng cho FireDensityGrid.as_array()
+    np = None
+
+class FireDistanceField:
+    def __init__(self, width, height, dense=True, max_distance=FIRE_FIELD_MAX_DISTANCE):
+        """
+        Args:
+            width, height: Kích thước bản đồ
+            dense: True = mảng width*height (TileGrid), False = dict (ChunkedWorld)
+            max_distance: Khoảng cách lớn nhất được lưu (<= 254)
+        """
+        self.width = width
+        self.height = height
+        self.dense = dense
+        self.max_distance = max_distance
+        self.far = 255  # Giá trị "xa hơn max_distance"
+        self.dist = array('B', [self.far]) * (width * height) if dense else {}
+        # buckets[d] = set các ô (col, row) cách lửa đúng d ô
+        self.buckets = [set() for _ in range(max_distance + 1)]
+
+    # ==================== LƯU TRỮ ====================
+    def _get(self, idx):
+        return self.dist[idx] if self.dense else self.dist.get(idx, self.far)
+
+    def _set(self, idx, d):
+        """Đổi khoảng cách của ô idx và chuyển ô sang bucket mới"""
+        old = self._get(idx)
+        pos = (idx % self.width, idx // self.width)
+        if old != self.far:
+            self.buckets[old].discard(pos)
+        if d == self.far:
+            if self.dense:
+                self.dist[idx] = d
+            else:
+                self.dist.pop(idx, None)
+        else:
+            self.dist[idx] = d
+            self.buckets[d].add(pos)
+
+    def _neighbors(self, idx):
+        w = self.width
+        col = idx % w
+        if col > 0:
+            yield idx - 1
+        if col < w - 1:
+            yield idx + 1
+        if idx >= w:
+            yield idx - w
+        if idx + w < w * self.height:
+            yield idx + w
+
+    # ==================== CẬP NHẬT ====================
+    def add_source(self, pos):
+        """Ô pos bắt lửa: lan khoảng cách mới ra xung quanh (chỉ vùng được rút ngắn)"""
+        idx = pos[1] * self.width + pos[0]
+        if self._get(idx) == 0:
+            return
+        self._set(idx, 0)
+        frontier = [idx]
+        for d in range(1, self.max_distance + 1):
+            next_frontier = []
+            for cur in frontier:
+                for nb in self._neighbors(cur):
+                    if d < self._get(nb):
+                        self._set(nb, d)
+                        next_frontier.append(nb)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+    def remove_source(self, pos):
+        """
+        Ô pos hết cháy: xoá khoảng cách của các ô có thể đã tính qua pos
+        rồi điền lại từ viền vùng đó (chỉ xử lý vùng bị ảnh hưởng)
+        """
+        idx = pos[1] * self.width + pos[0]
+        if self._get(idx) != 0:
+            return
+
+        # 1. Vùng bị ảnh hưởng: chuỗi ô có khoảng cách tăng dần 1 bắt đầu từ pos
+        affected = {idx}
+        stack = [idx]
+        while stack:
+            cur = stack.pop()
+            d = self._get(cur) + 1
+            for nb in self._neighbors(cur):
+                if nb not in affected and self._get(nb) == d:
+                    affected.add(nb)
+                    stack.append(nb)
+
+        # 2. Viền còn giữ khoảng cách đúng làm nguồn điền lại
+        levels = [[] for _ in range(self.max_distance + 1)]
+        for cur in affected:
+            for nb in self._neighbors(cur):
+                if nb not in affected:
+                    d = self._get(nb)
+                    if d != self.far:
+                        levels[d].append(nb)
+        for cur in affected:
+            self._set(cur, self.far)
+
+        # 3. BFS theo từng mức khoảng cách
+        for d in range(self.max_distance):
+            for cur in levels[d]:
+                if self._get(cur) != d:
+                    continue
+                for nb in self._neighbors(cur):
+                    if d + 1 < self._get(nb):
+                        self._set(nb, d + 1)
+                        levels[d + 1].append(nb)
+
+    # ==================== TRUY VẤN ====================
+    def distance_to_fire(self, pos):
+        """Khoảng cách Manhattan tới ô lửa gần nhất (inf nếu xa hơn max_distance) - O(1)"""
+        col, row = pos
+        if not (0 <= col < self.width and 0 <= row < self.height):
+            return float('inf')
+        d = self._get(row * self.width + col)
+        return float('inf') if d == self.far else d
+
+    def tiles_at_distance(self, d):
+        """Set các ô (col, row) cách lửa đúng d ô - O(1), không được sửa set trả về"""
+        if 0 <= d <= self.max_distance:
+            return self.buckets[d]
+        return set()
+
+
+class FireDensityGrid:
+    def __init__(self, width, height, dense=True):
+        """
+        Số ô đang cháy trong 8 ô xung quanh mỗi ô (không tính chính nó)
+        Cập nhật khi ô bắt lửa / được dập tắt - đọc là O(1), không cấp phát
+
+        Args:
+            width, height: Kích thước bản đồ
+            dense: True = mảng width*height (TileGrid), False = dict (ChunkedWorld)
+        """
+        self.width = width
+        self.height = height
+        self.dense = dense
+        self.counts = bytearray(width * height) if dense else {}
+
+    def _update(self, pos, delta):
+        col, row = pos
+        counts, w = self.counts, self.width
+        for r in range(max(0, row - 1), min(self.height, row + 2)):
+            for c in range(max(0, col - 1), min(w, col + 2)):
+                if c == col and r == row:
+                    continue
+                idx = r * w + c
+                if self.dense:
+                    counts[idx] += delta
+                else:
+                    value = counts.get(idx, 0) + delta
+                    if value:
+                        counts[idx] = value
+                    else:
+                        del counts[idx]
+
+    def add_source(self, pos):
+        self._update(pos, 1)
+
+    def remove_source(self, pos):
+        self._update(pos, -1)
+
+    def count_at(self, pos):
+        """Số ô cháy kề 8 hướng (0 nếu ngoài bản đồ)"""
+        col, row = pos
+        if not (0 <= col < self.width and 0 <= row < self.height):
+            return 0
+        idx = row * self.width + col
+        return self.counts[idx] if self.dense else self.counts.get(idx, 0)
+
+    def as_array(self):
+        """
+        Mảng (height, width) uint8 dùng chung bộ nhớ với lưới đếm (heatmap, AI)
+
+        Returns:
+            numpy.ndarray, hoặc None nếu lưu dạng dict / không có NumPy
+        """
+        if not self.dense or np is None:
+            return None
+        return np.frombuffer(self.counts, dtype=np.uint8).reshape(self.height, self.width)
+
+
+class FireArrivalMap:
+    def __init__(self, horizon=FIRE_ETA_HORIZON):
+        """
+        Thời điểm sớm nhất lửa có thể tới mỗi ô cháy được (Dijkstra trên ô cỏ/cây/hoa)
+        Mô hình theo luật lan của FireSystem: ô cháy lan ở lượt lan kế tiếp (mỗi spread_interval,
+        không lan khi mưa), ô kề bị cảnh báo rồi bắt lửa sau FIRE_WARNING_TIME.
+        Giả sử mọi lần tung xúc xắc lan đều trúng -> ETA là ước lượng sớm nhất (an toàn cho người chơi).
+
+        Mỗi ô lưu số thứ tự lượt lan sẽ cảnh báo nó (không đổi khi lượt lan tới trễ vài ms),
+        nên sau mỗi lượt lan chỉ cần sửa quanh các ô vừa đổi: ô bắt lửa / bắt cảnh báo / hết cháy,
+        ô đổi loại (nhật ký tile) và ô lẽ ra đã bị cảnh báo nhưng lần lan trượt.
+        Tính lại toàn bộ khi lửa bắt đầu, mưa bắt đầu/tạnh hoặc lỡ nhật ký tile.
+
+        Args:
+            horizon: Chỉ tính các ô bắt lửa trong horizon ms tới
+        """
+        self.horizon = horizon
+        self.ticks = {}       # {(col, row): số lượt lan sẽ cảnh báo ô} - chỉ ô thường (không cháy, không cảnh báo)
+        self.parent = {}      # {(col, row): ô láng giềng cho giá trị đó}
+        self.deferred = []    # Heap (lượt lan, ô) chưa lan tiếp vì vượt horizon - lan tiếp ở lượt sau
+        self.expiry = []      # Heap (lượt lan, ô) - lượt đã qua mà ô chưa bị cảnh báo là lần lan trượt
+        self.changed = set()  # Ô vừa bắt lửa / bắt cảnh báo / hết cháy từ lần cập nhật trước
+        self.next_tick = 0    # Số thứ tự của lượt lan sắp tới
+        self.first_tick = 0   # game_time dự kiến của lượt lan sắp tới
+        self.interval = FIRE_SPREAD_INTERVAL
+        self.max_tick = -1    # Lượt lan cuối cùng còn trong horizon
+        self.cache_key = None
+        self.map_data = None
+        self.sub_id = None    # Mã subscriber của nhật ký tile của map_data
+        self.expanded = 0     # Số ô đã lan tiếp ở lần cập nhật gần nhất
+
+    def note_change(self, pos):
+        """Ô pos vừa bắt lửa, bắt cảnh báo hoặc hết cháy (gọi từ FireSystem)"""
+        self.changed.add(pos)
+
+    def refresh(self, fire_system, map_data, game_time):
+        """Cập nhật khi có lượt lan mới hoặc mưa bắt đầu/tạnh (tối đa một lần mỗi lượt lan)"""
+        key = (fire_system.fire_started, fire_system.last_spread_time, fire_system.spreading_paused)
+        if key == self.cache_key:
+            return
+        full = (self.cache_key is None or map_data is not self.map_data or
+                key[0] != self.cache_key[0] or key[2] != self.cache_key[2])
+        if not full and key[1] != self.cache_key[1]:
+            self.next_tick += 1  # Mỗi lần đổi last_spread_time là đúng một lượt lan
+        self.cache_key = key
+        changes = None if full else map_data.journal.drain(self.sub_id)
+        self._set_grid(fire_system, game_time)
+        if changes is None:
+            self.recompute(fire_system, map_data, game_time)
+        else:
+            self.update(fire_system, map_data, changes)
+
+    def _set_grid(self, fire_system, game_time):
+        """Lượt lan sắp tới (mưa thì lùi tới lúc tạnh), các lượt sau cách đều spread_interval"""
+        self.interval = fire_system.spread_interval
+        self.first_tick = max(fire_system.last_spread_time + self.interval, game_time)
+        if fire_system.spreading_paused:
+            self.first_tick = max(self.first_tick, fire_system.resume_time)
+        # Ô bị cảnh báo ở lượt n bắt lửa lúc thời điểm lượt n + FIRE_WARNING_TIME <= game_time + horizon
+        self.max_tick = self.next_tick + (game_time + self.horizon - FIRE_WARNING_TIME - self.first_tick) // self.interval
+
+    def _tick_of(self, t):
+        """Lượt lan đầu tiên từ thời điểm t"""
+        if t <= self.first_tick:
+            return self.next_tick
+        return self.next_tick + -(-(t - self.first_tick) // self.interval)
+
+    def _spread_tick(self, pos, fire_system):
+        """Lượt lan mà ô pos có thể cảnh báo ô kề (None nếu pos chưa có ETA)"""
+        if pos in fire_system.fire_tiles:
+            return self.next_tick
+        warn_time = fire_system.warning_tiles.get(pos)
+        if warn_time is not None:
+            return self._tick_of(warn_time + FIRE_WARNING_TIME)
+        n = self.ticks.get(pos)
+        return None if n is None else n + -(-FIRE_WARNING_TIME // self.interval)
+
+    def _neighbors(self, pos, width, height):
+        col, row = pos
+        for dx, dy in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            if 0 <= col + dx < width and 0 <= row + dy < height:
+                yield (col + dx, row + dy)
+
+    def recompute(self, fire_system, map_data, game_time):
+        """Tính lại toàn bộ từ các ô cháy còn lan được và các ô đang cảnh báo"""
+        if map_data is not self.map_data:
+            if self.map_data is not None:
+                self.map_data.journal.unsubscribe(self.sub_id)
+            self.map_data = map_data
+            self.sub_id = map_data.journal.subscribe()
+        else:
+            map_data.journal.drain(self.sub_id)  # Các thay đổi cũ đã nằm trong lần tính này
+        self.changed = set()
+        self.ticks, self.parent, self.expiry = {}, {}, []
+        heap = [(self.next_tick, pos) for pos in fire_system.get_spread_sources()]
+        heap += [(self._spread_tick(pos, fire_system), pos) for pos in fire_system.warning_tiles]
+        heapq.heapify(heap)
+        self._expand(heap, fire_system, map_data)
+
+    def update(self, fire_system, map_data, changes):
+        """
+        Sửa tăng dần sau một lượt lan: xét lại các ô gốc theo thứ tự lượt lan cũ, ô vẫn còn
+        láng giềng cho đúng giá trị cũ thì giữ nguyên; ô mất giá trị kéo theo các ô con của nó.
+        Sau đó lan lại từ láng giềng của các ô đã mất giá trị và từ phần còn dở vì horizon.
+        """
+        width, height = fire_system.map_width, fire_system.map_height
+        fire_tiles, warning_tiles = fire_system.fire_tiles, fire_system.warning_tiles
+        ticks, parent = self.ticks, self.parent
+
+        # 1. Gốc: ô đổi trạng thái lửa, ô đổi tính cháy được, ô lẽ ra đã bị cảnh báo (lần lan trượt)
+        roots = self.changed
+        self.changed = set()
+        for pos, old, new, _ in changes:
+            if fire_system.is_flammable(old) != fire_system.is_flammable(new):
+                roots.add(pos)
+        expiry = self.expiry
+        while expiry and expiry[0][0] < self.next_tick:
+            n, pos = heapq.heappop(expiry)
+            if ticks.get(pos) == n:
+                roots.add(pos)
+
+        # 2. Xét lại theo thứ tự giá trị cũ (giá trị luôn tăng dọc theo ô cha -> ô con)
+        heap = [(ticks.get(pos, -1), pos) for pos in roots]
+        heapq.heapify(heap)
+        seen = set()
+        lost = []
+        while heap:
+            _, pos = heapq.heappop(heap)
+            if pos in seen:
+                continue
+            seen.add(pos)
+            old = ticks.get(pos)
+            if pos in fire_tiles or pos in warning_tiles:
+                # Ô thành nguồn: ô con chỉ cần xét lại khi lượt lan từ nguồn khác giá trị của chúng
+                n = self._spread_tick(pos, fire_system)
+                if old is not None:
+                    del ticks[pos]
+                    del parent[pos]
+                lost.append(pos)
+                for nb in self._neighbors(pos, width, height):
+                    if parent.get(nb) == pos and ticks[nb] != n:
+                        heapq.heappush(heap, (ticks[nb], nb))
+                continue
+            if old is not None and old >= self.next_tick and \
+                    fire_system.is_flammable(map_data.get_tile(pos[0], pos[1])):
+                support = [(self._spread_tick(nb, fire_system), nb) for nb in self._neighbors(pos, width, height)]
+                best = min((item for item in support if item[0] is not None), default=None)
+                if best is not None and best[0] == old:
+                    parent[pos] = best[1]
+                    continue  # Vẫn có láng giềng cho đúng giá trị cũ
+            if old is not None:
+                del ticks[pos]
+                del parent[pos]
+            lost.append(pos)
+            for nb in self._neighbors(pos, width, height):
+                if parent.get(nb) == pos:
+                    heapq.heappush(heap, (ticks[nb], nb))
+
+        # 3. Lan lại: ô vừa thành nguồn lan từ chính nó, ô thường đã mất giá trị lan từ láng giềng
+        heap = self.deferred
+        for pos in lost:
+            if pos in fire_tiles or pos in warning_tiles:
+                heap.append((self._spread_tick(pos, fire_system), pos))
+                continue
+            for nb in self._neighbors(pos, width, height):
+                n = self._spread_tick(nb, fire_system)
+                if n is not None:
+                    heap.append((n, nb))
+        heapq.heapify(heap)
+        self._expand(heap, fire_system, map_data)
+
+    def _expand(self, heap, fire_system, map_data):
+        """Lan theo thứ tự lượt lan; dừng ở ô đầu tiên vượt horizon và giữ phần còn lại cho lượt sau"""
+        width, height = fire_system.map_width, fire_system.map_height
+        fire_tiles, warning_tiles = fire_system.fire_tiles, fire_system.warning_tiles
+        ticks, parent, expiry = self.ticks, self.parent, self.expiry
+        step = -(-FIRE_WARNING_TIME // self.interval)  # Ô bị cảnh báo ở lượt n cảnh báo ô kề ở lượt n + step
+        expanded = 0
+
+        while heap:
+            n, pos = heap[0]
+            if n > self.max_tick:
+                break  # Các mục còn lại cũng vượt horizon
+            heapq.heappop(heap)
+            if self._spread_tick(pos, fire_system) != n:
+                continue  # Mục cũ
+            expanded += 1
+            for nb in self._neighbors(pos, width, height):
+                if nb in fire_tiles or nb in warning_tiles or n >= ticks.get(nb, math.inf):
+                    continue
+                if not fire_system.is_flammable(map_data.get_tile(nb[0], nb[1])):
+                    continue  # Cát/đá/nước chặn lửa
+                ticks[nb], parent[nb] = n, pos
+                heapq.heappush(heap, (n + step, nb))
+                heapq.heappush(expiry, (n, nb))
+        self.deferred = heap
+        self.expanded = expanded
+
+    def eta(self, pos):
+        """game_time sớm nhất ô pos bắt lửa (inf nếu không cháy được / ngoài horizon / là ô nguồn)"""
+        n = self.ticks.get(pos)
+        if n is None:
+            return math.inf
+        return self.first_tick + (n - self.next_tick) * self.interval + FIRE_WARNING_TIME
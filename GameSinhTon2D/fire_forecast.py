@@ -0,0 +1,153 @@
+"""
+Fire Forecast - Dự báo lửa lan bằng Monte Carlo
+Chạy K lần mô phỏng ngẫu nhiên luật lan lửa của FireSystem.update cho N lượt lan tới,
+vector hoá trên mảng (K, H, W) -> xác suất bắt lửa và thời điểm bắt lửa kỳ vọng của từng ô.
+Chỉ xét khung lửa nới N + 1 ô (mỗi lượt lửa lan xa tối đa 1 ô).
+"""
+import math
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - PathHelper dùng lại BFS dự đoán khi không có
+    np = None
+
+FLAMMABLE_TILES = [TILE_GRASS, TILE_TREE, TILE_FLOWER]  # Giống FireSystem.is_flammable
+
+class FireForecaster:
+    def __init__(self, samples=FIRE_FORECAST_SAMPLES, ticks=FIRE_FORECAST_TICKS, seed=None):
+        """
+        Args:
+            samples: Số lần mô phỏng K
+            ticks: Số lượt lan lửa N được mô phỏng
+            seed: Seed cho bộ sinh số ngẫu nhiên (None = ngẫu nhiên)
+        """
+        self.samples = samples
+        self.ticks = ticks
+        self.rng = np.random.default_rng(seed)
+        self.flammable_lut = np.zeros(256, dtype=bool)
+        self.flammable_lut[FLAMMABLE_TILES] = True
+
+        # Kết quả lần dự báo gần nhất (trong khung origin)
+        self.cache_key = None
+        self.origin = (0, 0)        # (col0, row0) của khung
+        self.probability = None     # float32 (h, w): xác suất bắt lửa trong N lượt tới
+        self.expected_time = None   # float32 (h, w): thời điểm bắt lửa kỳ vọng (ms, game_time), inf nếu không cháy
+        self.computed_at = 0        # game_time tương ứng lượt lan kế tiếp
+
+    def forecast(self, fire_system, map_data):
+        """
+        Dự báo từ trạng thái hiện tại của fire_system
+        Kết quả được giữ tới lượt lan kế tiếp (tối đa một lần mô phỏng mỗi spread_interval)
+
+        Returns:
+            True nếu có kết quả (đã có lửa)
+        """
+        if not fire_system.fire_tiles:
+            self.probability = None
+            self.cache_key = None
+            return False
+        key = (id(fire_system), fire_system.last_spread_time)
+        if key == self.cache_key:
+            return True
+        self.cache_key = key
+        self._simulate(fire_system, map_data)
+        return True
+
+    def _simulate(self, fire_system, map_data):
+        K, N = self.samples, self.ticks
+        interval = fire_system.spread_interval
+        start = fire_system.last_spread_time + interval  # Lượt lan kế tiếp
+        margin = N + 1
+
+        # Khung = bao lửa + cảnh báo, nới margin ô
+        tiles = list(fire_system.fire_tiles) + list(fire_system.warning_tiles)
+        col0 = max(0, min(col for col, _ in tiles) - margin)
+        col1 = min(fire_system.map_width, max(col for col, _ in tiles) + margin + 1)
+        row0 = max(0, min(row for _, row in tiles) - margin)
+        row1 = min(fire_system.map_height, max(row for _, row in tiles) + margin + 1)
+        h, w = row1 - row0, col1 - col0
+
+        grid = np.frombuffer(b"".join(map_data.get_row_slice(row, col0, col1) for row in range(row0, row1)),
+                             dtype=np.uint8).reshape(h, w)
+        flammable = self.flammable_lut[grid]
+
+        # Trạng thái ban đầu (giống nhau cho K mẫu)
+        burning0 = np.zeros((h, w), dtype=bool)
+        for col, row in fire_system.fire_tiles:
+            burning0[row - row0, col - col0] = True
+        ignite0 = np.full((h, w), np.inf, dtype=np.float32)  # Thời điểm bắt lửa (ms)
+        for (col, row), warn_time in fire_system.warning_tiles.items():
+            ignite0[row - row0, col - col0] = warn_time + FIRE_WARNING_TIME
+        ignite0[burning0] = -np.inf
+
+        burning = np.repeat(burning0[None], K, axis=0)
+        ignite = np.repeat(ignite0[None], K, axis=0)
+        # Xác suất bắt cảnh báo theo số ô cháy kề: 1 - (1 - p)^n
+        chance = (1.0 - (1.0 - fire_system.spread_chance) ** np.arange(5)).astype(np.float32)
+        dry = None  # (1 - p_ô) theo độ ẩm - chỉ khi có ô ẩm trong khung
+        wetness = fire_system.wetness
+        if wetness is not None and wetness.active:
+            wet = wetness.window(slice(row0, row1), slice(col0, col1))
+            if wet.any():
+                dry = (1.0 - fire_system.spread_chance * (1.0 - WETNESS_SPREAD_FACTOR * wet)).astype(np.float32)
+
+        count = np.empty((K, h, w), dtype=np.int8)
+        for tick in range(N):
+            now = start + tick * interval
+            # Cảnh báo hết hạn -> cháy (FireSystem xét mỗi frame, trước lượt lan)
+            burning |= ignite <= now
+
+            # Số ô cháy kề 4 hướng
+            count.fill(0)
+            count[:, 1:, :] += burning[:, :-1, :]
+            count[:, :-1, :] += burning[:, 1:, :]
+            count[:, :, 1:] += burning[:, :, :-1]
+            count[:, :, :-1] += burning[:, :, 1:]
+
+            candidates = flammable & (ignite == np.inf) & (count > 0)
+            tile_chance = chance[count] if dry is None else 1.0 - dry ** count
+            hit = candidates & (self.rng.random((K, h, w), dtype=np.float32) < tile_chance)
+            ignite[hit] = now + FIRE_WARNING_TIME
+
+        # Ô đang cháy không tính vào dự báo
+        ignite[:, burning0] = np.inf
+        ignited = np.isfinite(ignite)
+        hits = ignited.sum(axis=0)
+        self.probability = (hits / K).astype(np.float32)
+        total = np.where(ignited, ignite, 0).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.expected_time = np.where(hits > 0, total / np.maximum(hits, 1), np.inf).astype(np.float32)
+        self.origin = (col0, row0)
+        self.computed_at = start
+
+    # ==================== TRUY VẤN ====================
+    def probability_at(self, pos):
+        """Xác suất ô pos bắt lửa trong N lượt lan tới (0 nếu ngoài khung dự báo)"""
+        if self.probability is None:
+            return 0.0
+        col, row = pos[0] - self.origin[0], pos[1] - self.origin[1]
+        h, w = self.probability.shape
+        if 0 <= col < w and 0 <= row < h:
+            return float(self.probability[row, col])
+        return 0.0
+
+    def expected_time_at(self, pos):
+        """Thời điểm bắt lửa kỳ vọng (game_time, ms) của ô pos, inf nếu không dự báo cháy"""
+        if self.probability is None:
+            return math.inf
+        col, row = pos[0] - self.origin[0], pos[1] - self.origin[1]
+        h, w = self.probability.shape
+        if 0 <= col < w and 0 <= row < h:
+            return float(self.expected_time[row, col])
+        return math.inf
+
+    def danger_tiles(self, threshold=FIRE_FORECAST_DANGER_PROB):
+        """{(col, row): xác suất} của các ô có xác suất bắt lửa >= threshold"""
+        if self.probability is None:
+            return {}
+        rows, cols = np.nonzero(self.probability >= threshold)
+        probs = self.probability[rows, cols].tolist()
+        col0, row0 = self.origin
+        return {(col + col0, row + row0): prob for col, row, prob in zip(cols.tolist(), rows.tolist(), probs)}
@@ -0,0 +1,226 @@
+"""
+Fire System (NumPy) - Engine lửa dạng automat tế bào trên mảng dày
+Trạng thái cháy, thời điểm cảnh báo và thời điểm bắt lửa nằm trong mảng (H, W);
+fire_tiles / warning_tiles vẫn được giữ đồng bộ để các hệ thống khác dùng như cũ.
+"""
+from settings import *
+from fire import FireSystem
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - create_fire_system() dùng FireSystem khi không có
+    np = None
+
+FLAMMABLE_TILES = [TILE_GRASS, TILE_TREE, TILE_FLOWER]
+if np is not None:
+    # Bảng tra mã tile -> cháy được (nhanh hơn np.isin trên cả bản đồ)
+    FLAMMABLE_LUT = np.zeros(256, dtype=bool)
+    FLAMMABLE_LUT[FLAMMABLE_TILES] = True
+
+class FireSystemNP(FireSystem):
+    def __init__(self, level_config=None):
+        super().__init__(level_config)
+        seed = level_config.get("fire_seed") if level_config else None
+        self.rng = np.random.default_rng(seed)
+
+        # Mảng trạng thái - cấp phát khi biết kích thước map (update đầu tiên)
+        self.burning = None      # bool: ô đang cháy
+        self.warn_time = None    # int64: thời điểm bắt đầu cảnh báo (-1 = không cảnh báo)
+        self.ignite_time = None  # int64: thời điểm bắt lửa (-1 = chưa từng cháy)
+        self.next_promotion = float('inf')  # Thời điểm sớm nhất có cảnh báo hết hạn
+        self.bounds = None       # [row0, row1, col0, col1] bao mọi ô từng cháy (không thu hẹp)
+        self.map_data = None     # TileGrid của lần update gần nhất (get_spread_sources đọc tile)
+
+    def _ensure_arrays(self, map_data):
+        shape = (map_data.height, map_data.width)
+        if self.burning is None or self.burning.shape != shape:
+            self.burning = np.zeros(shape, dtype=bool)
+            self.warn_time = np.full(shape, -1, dtype=np.int64)
+            self.ignite_time = np.full(shape, -1, dtype=np.int64)
+
+    def _grow_bounds(self, row0, row1, col0, col1):
+        if self.bounds is None:
+            self.bounds = [row0, row1, col0, col1]
+        else:
+            b = self.bounds
+            b[0], b[1], b[2], b[3] = min(b[0], row0), max(b[1], row1), min(b[2], col0), max(b[3], col1)
+
+    def _window(self):
+        """Vùng (slice hàng, slice cột) = khung lửa nới 1 ô - các phép mảng chỉ chạy trong đây"""
+        row0, row1, col0, col1 = self.bounds
+        return (slice(max(0, row0 - 1), min(self.map_height, row1 + 2)),
+                slice(max(0, col0 - 1), min(self.map_width, col1 + 2)))
+
+    # ==================== CẬP NHẬT TRẠNG THÁI ====================
+    def ignite(self, pos, game_time):
+        """Ô pos bắt đầu cháy"""
+        col, row = pos
+        self._grow_bounds(row, row, col, col)
+        self.burning[row, col] = True
+        self.ignite_time[row, col] = game_time
+        self.fire_tiles.add(pos)
+        self.pending_writes.append(pos)
+        self.track_source(pos)
+
+    def extinguish_tile(self, pos, map_data):
+        """Dập lửa tại pos (mưa): ô trở lại thành cỏ"""
+        if pos not in self.fire_tiles:
+            return
+        col, row = pos
+        self.fire_tiles.remove(pos)
+        self.burning[row, col] = False
+        self.untrack_source(pos)
+        if map_data.get_tile(col, row) == TILE_FIRE:
+            map_data.set_tile(col, row, TILE_GRASS)
+
+    def update(self, map_data, game_time):
+        """Cập nhật và lan rộng lửa (toàn bộ bằng phép toán mảng)"""
+        self.map_width, self.map_height = map_data.width, map_data.height
+        self.map_data = map_data
+        self._ensure_arrays(map_data)
+        self.ensure_fire_fields(map_data)
+        self.arrival.refresh(self, map_data, game_time)
+
+        if not self.fire_started:
+            # Kiểm tra xem đã đến lúc bắt đầu cháy chưa (dùng start_delay từ level config)
+            if game_time > self.start_delay:
+                self.start_fire(map_data, game_time)
+            return
+
+        # Cảnh báo -> cháy: so sánh mặt nạ với FIRE_WARNING_TIME
+        # (chỉ khi có cảnh báo đã hết hạn - các frame còn lại không quét mảng)
+        if game_time >= self.next_promotion:
+            # Cảnh báo chỉ nằm sát ô cháy -> luôn trong khung lửa nới 1 ô
+            rs, cs = self._window()
+            warn_time = self.warn_time[rs, cs]
+            warned = warn_time >= 0
+            promote = warned & (game_time - warn_time >= FIRE_WARNING_TIME)
+            rows, cols = np.nonzero(promote)
+            rows += rs.start
+            cols += cs.start
+            self.burning[rows, cols] = True
+            self.ignite_time[rows, cols] = game_time
+            warn_time[promote] = -1
+            if len(rows):
+                self._grow_bounds(int(rows.min()), int(rows.max()), int(cols.min()), int(cols.max()))
+            for pos in zip(cols.tolist(), rows.tolist()):
+                self.fire_tiles.add(pos)
+                del self.warning_tiles[pos]
+                self.pending_writes.append(pos)
+                self.track_source(pos)
+            remaining = warned & ~promote
+            self.next_promotion = warn_time[remaining].min() + FIRE_WARNING_TIME if remaining.any() else float('inf')
+
+        # Kiểm tra thời gian lan lửa (dùng spread_interval từ level config)
+        if game_time - self.last_spread_time < self.spread_interval:
+            return
+
+        # Kiểm tra xem có đang mưa không (tạm dừng lan rộng)
+        if self.spreading_paused:
+            return
+
+        self.last_spread_time = game_time
+
+        # Chỉ xét khung lửa nới 1 ô (ô ngoài khung không thể có hàng xóm đang cháy)
+        rs, cs = self._window()
+
+        # Ô có thể nhận cảnh báo: cháy được, chưa cháy, chưa cảnh báo
+        tiles = np.frombuffer(map_data.data, dtype=np.uint8).reshape(self.burning.shape)[rs, cs]
+        burning = self.burning[rs, cs]
+        candidates = FLAMMABLE_LUT[tiles] & ~burning & (self.warn_time[rs, cs] < 0)
+        if self.rain_cover is not None:
+            # Mưa giông: ô trong vùng mưa không lan và không bắt cảnh báo
+            raining = self.rain_cover.window(rs, cs)
+            burning = burning & ~raining
+            candidates &= ~raining
+
+        # Số ô cháy kề 4 hướng (dịch mặt nạ)
+        count = np.zeros(burning.shape, dtype=np.int8)
+        count[1:, :] += burning[:-1, :]
+        count[:-1, :] += burning[1:, :]
+        count[:, 1:] += burning[:, :-1]
+        count[:, :-1] += burning[:, 1:]
+        candidates &= count > 0
+
+        # Mỗi ô cháy kề tung xúc xắc riêng -> bắt cảnh báo với xác suất 1 - (1 - p)^n
+        # Gộp thành một lần rút số ngẫu nhiên cho cả mảng
+        rows, cols = np.nonzero(candidates)
+        if len(rows):
+            p = self.spread_chance
+            if self.wetness is not None and self.wetness.active:
+                # Ô ẩm khó bắt lửa hơn
+                p = p * (1.0 - WETNESS_SPREAD_FACTOR * self.wetness.window(rs, cs)[rows, cols])
+            chance = 1.0 - (1.0 - p) ** count[rows, cols]
+            rows, cols = rows + rs.start, cols + cs.start
+            if self.spread_roll is not None:
+                rolls = np.array([self.spread_roll(pos, game_time) for pos in zip(cols.tolist(), rows.tolist())])
+            else:
+                rolls = self.rng.random(len(rows))
+            hit = rolls < chance
+            rows, cols = rows[hit], cols[hit]
+            self.warn_time[rows, cols] = game_time
+            for pos in zip(cols.tolist(), rows.tolist()):
+                self.warning_tiles[pos] = game_time
+                self.arrival.note_change(pos)
+            if len(rows):
+                self.next_promotion = min(self.next_promotion, game_time + FIRE_WARNING_TIME)
+
+        # Cập nhật map_data để hiển thị lửa - chỉ ghi các ô mới bắt lửa
+        for (col, row) in self.pending_writes:
+            if self.burning[row, col]:
+                map_data.set_tile(col, row, TILE_FIRE)
+        self.pending_writes = []
+
+    # ==================== TRUY VẤN ====================
+    def fires_under(self, cover):
+        """Các ô đang cháy trong vùng mưa - AND mặt nạ mưa với mảng burning"""
+        if self.bounds is None:
+            return []
+        rs, cs = self._window()
+        rows, cols = np.nonzero(self.burning[rs, cs] & cover.window(rs, cs))
+        return sorted(zip((cols + cs.start).tolist(), (rows + rs.start).tolist()))
+    
+    def get_spread_sources(self):
+        """Viền đám cháy dựng bằng một mặt nạ: ô cháy có ô kề 4 hướng cháy được, chưa cháy, chưa cảnh báo"""
+        if self.bounds is None:
+            return set()
+        rs, cs = self._window()
+        tiles = np.frombuffer(self.map_data.data, dtype=np.uint8).reshape(self.burning.shape)[rs, cs]
+        burning = self.burning[rs, cs]
+        unburnt = FLAMMABLE_LUT[tiles] & ~burning & (self.warn_time[rs, cs] < 0)
+        near = np.zeros(burning.shape, dtype=bool)
+        near[1:, :] |= unburnt[:-1, :]
+        near[:-1, :] |= unburnt[1:, :]
+        near[:, 1:] |= unburnt[:, :-1]
+        near[:, :-1] |= unburnt[:, 1:]
+        rows, cols = np.nonzero(burning & near)
+        return set(zip((cols + cs.start).tolist(), (rows + rs.start).tolist()))
+
+    def get_fire_intensity_at(self, pos, game_time):
+        """Tính cường độ lửa tại vị trí (để xác định damage)"""
+        col, row = pos
+        if not self.burning[row, col]:
+            return 0
+
+        burn_time = game_time - self.ignite_time[row, col]
+
+        # Số ô lửa xung quanh (8 hướng, không tính chính nó) - đọc từ lưới mật độ
+        fire_neighbors = self.density.count_at(pos)
+
+        # Lửa yếu: mới cháy (< 5s) hoặc ít lửa xung quanh
+        if burn_time < 5000 or fire_neighbors < 2:
+            return FIRE_DAMAGE_LIGHT
+        # Lửa trung bình: cháy lâu hoặc nhiều lửa xung quanh
+        elif burn_time < 15000 or fire_neighbors < 5:
+            return FIRE_DAMAGE_MEDIUM
+        # Lửa mạnh: trung tâm đám cháy
+        else:
+            return FIRE_DAMAGE_HEAVY
+
+    def is_position_in_fire(self, pos):
+        """Kiểm tra vị trí có đang cháy không (chỉ ô thực sự đang cháy)"""
+        col, row = pos
+        if self.burning is None or not (0 <= col < self.map_width and 0 <= row < self.map_height):
+            return False
+        return bool(self.burning[row, col])
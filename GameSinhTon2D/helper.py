@@ -4,6 +4,9 @@ Helper System - Sử dụng BFS và DFS để hỗ trợ người chơi
 import pygame
 from collections import deque
 from settings import *
+from world import get_map_size
+from fire_forecast import FireForecaster, np
+from pathfinding import GridSearch, make_cost_fn
 
 class PathHelper:
     def __init__(self):
@@ -18,57 +21,34 @@ class PathHelper:
         self.escape_path_visible = False
         self.escape_path_time = 0
         
-        # BFS: Dự đoán lửa lan
+        # Dự đoán lửa lan: Monte Carlo (cần NumPy), không có thì BFS
         self.danger_tiles = set()
+        self.danger_probability = {}  # {(col, row): xác suất bắt lửa} - rỗng khi dùng BFS
+        self.forecaster = FireForecaster() if np is not None else None
+        
+        # BFS / A* dùng chung (mảng ô cha phẳng, bộ đệm dùng lại giữa các lần tìm)
+        self.search = GridSearch()
     
     # ==================== BFS: TÌM MẢNH GHÉP ====================
-    def find_all_pieces_bfs(self, player_pos, map_data, piece_positions):
+    def find_all_pieces_bfs(self, player_pos, map_data, piece_positions, first_only=False):
         """
-        Thuật toán BFS tìm đường đến TẤT CẢ các mảnh ghép
-        Trả về: dict{piece_pos: path} - đường đi từ player đến mỗi piece
+        Một lần BFS từ player tới các mảnh ghép (đường ngắn nhất tới từng mảnh)
+        
+        Args:
+            first_only: True = dừng ở mảnh ghép gần nhất, False = tới khi gặp hết các mảnh
+        
+        Returns:
+            dict{piece_pos: path} - đường đi từ player đến mỗi piece tìm được
         """
         if not piece_positions:
             return {}
         
-        start_col, start_row = player_pos
-        all_paths = {}
-        
-        # Tìm đường đến từng mảnh ghép
-        for target_piece in piece_positions:
-            # Queue: (col, row, path) - BFS dùng queue
-            queue = deque([(start_col, start_row, [])])
-            visited = set()
-            visited.add((start_col, start_row))
-            found_path = None
-            
-            while queue:
-                col, row, path = queue.popleft()  # FIFO - lấy từ đầu
-                
-                # Kiểm tra đã đến mảnh ghép đích chưa
-                if (col, row) == target_piece:
-                    found_path = path  # BFS đảm bảo đường ngắn nhất
-                    break
-                
-                # Duyệt 4 hướng: phải, xuống, trái, lên
-                for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-                    nx, ny = col + dx, row + dy
-                    
-                    if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                        if (nx, ny) not in visited:
-                            tile = map_data[ny][nx]
-                            # Có thể đi qua: cỏ, cát, hoa, mảnh ghép, health
-                            if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
-                                visited.add((nx, ny))
-                                new_path = path + [(nx, ny)]
-                                queue.append((nx, ny, new_path))
-            
-            if found_path:
-                all_paths[target_piece] = found_path
-        
-        return all_paths
+        # Chỉ dựng lại đường đi của các mảnh tìm được (từ mảng ô cha)
+        found = self.search.bfs(map_data, player_pos, goals=piece_positions, first_only=first_only)
+        return {piece: self.search.path_to(piece) for piece in found}
     
     def activate_piece_finder(self, player, map_data, piece_positions, game_time, game_log):
-        """Kích hoạt DFS tìm mảnh ghép GẦN NHẤT - Cần Stamina >= 30"""
+        """Kích hoạt tìm đường tới mảnh ghép GẦN NHẤT - Cần Stamina >= 30"""
         # Kiểm tra còn mảnh ghép không
         if not piece_positions:
             game_log.append("Đã thu thập đủ mảnh ghép! Sẵn sàng bắn tín hiệu!")
@@ -88,31 +68,27 @@ class PathHelper:
         player.max_stamina -= HELPER_STAMINA_COST  # Không thể hồi lại
         
         player_pos = (player.grid_x, player.grid_y)
-        all_paths = self.find_all_pieces_bfs(player_pos, map_data, piece_positions)
-        
-        # Tìm đường đi NGẮN NHẤT (đến mảnh ghép gần nhất)
         self.piece_path = []
         self.piece_targets = []
-        
-        if all_paths:
-            # Chọn đường ngắn nhất
-            nearest_piece = None
-            shortest_path = None
-            for piece_pos, path in all_paths.items():
-                if shortest_path is None or len(path) < len(shortest_path):
-                    shortest_path = path
-                    nearest_piece = piece_pos
-            
-            if shortest_path:
-                self.piece_path = shortest_path
-                self.piece_targets = [nearest_piece]
+        # Mảnh gần nhất theo đường chim bay (lưới thô của sổ vật phẩm) - cùng vùng thì A* thẳng tới đó
+        target = map_data.items.nearest(player_pos, TILE_PIECE)
+        if target is not None and map_data.connectivity.same_component(player_pos, target):
+            self.piece_path = self.route(map_data, player_pos, target)
+            self.piece_targets = [target]
+        if not self.piece_path:
+            # Mảnh đó không tới được: BFS dừng ở mảnh ghép đầu tiên gặp được = mảnh gần nhất
+            nearest = self.find_all_pieces_bfs(player_pos, map_data, piece_positions, first_only=True)
+            self.piece_targets = []
+            for piece_pos, path in nearest.items():
+                self.piece_path = path
+                self.piece_targets = [piece_pos]
         
         if self.piece_path:
             self.piece_path_visible = True
             self.piece_path_time = game_time
             steps = len(self.piece_path)
             remaining = len(piece_positions)
-            game_log.append(f"[BFS] Đường đến mảnh ghép: {steps} bước ({remaining} còn lại)")
+            game_log.append(f"Đường đến mảnh ghép: {steps} bước ({remaining} còn lại)")
         else:
             game_log.append("Không tìm được đường đến mảnh ghép!")
         
@@ -121,48 +97,39 @@ class PathHelper:
         return True
     
     # ==================== BFS: THOÁT HIỂM ====================
-    def find_safe_path_bfs(self, player_pos, map_data, fire_tiles):
+    def find_safe_path_bfs(self, player_pos, map_data, fire_system, game_time=0):
         """
         Thuật toán BFS tìm đường ngắn nhất đến vùng an toàn
-        Vùng an toàn = cách xa lửa ít nhất 3 ô
+        Vùng an toàn = cách xa lửa ít nhất 3 ô (tra trường khoảng cách lửa O(1)/ô)
+        Bỏ qua ô sẽ cháy trước khi player đi tới (thời điểm lửa tới - fire_system.eta)
         """
-        start_col, start_row = player_pos
-        
-        # Queue: (col, row, path)
-        queue = deque([(start_col, start_row, [])])
-        visited = set()
-        visited.add((start_col, start_row))
+        # Đã an toàn = cách xa lửa >= 4 ô (khoảng cách Manhattan)
+        found = self.search.bfs(map_data, player_pos,
+                                is_goal=lambda pos, dist: fire_system.distance_to_fire(pos) >= 4,
+                                can_enter=self.fire_gate(fire_system, game_time))
+        return self.search.path_to(found[0]) if found else []
+    
+    def route(self, map_data, start, goal, cost_fn=None, fire_system=None, game_time=0):
+        """
+        Đường đi điểm-tới-điểm bằng A* (start, goal đã biết)
         
-        while queue:
-            col, row, path = queue.popleft()
-            
-            # Kiểm tra đã an toàn chưa (cách xa lửa >= 3 ô)
-            is_safe = True
-            for fire_col, fire_row in fire_tiles:
-                distance = abs(col - fire_col) + abs(row - fire_row)
-                if distance < 4:  # Khoảng cách Manhattan < 4
-                    is_safe = False
-                    break
-            
-            if is_safe and path:  # Đã an toàn và có đường đi
-                return path
-            
-            # Duyệt 4 hướng
-            for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-                nx, ny = col + dx, row + dy
-                
-                if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                    if (nx, ny) not in visited:
-                        tile = map_data[ny][nx]
-                        # Có thể đi qua (tránh lửa)
-                        if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
-                            visited.add((nx, ny))
-                            new_path = path + [(nx, ny)]
-                            queue.append((nx, ny, new_path))
+        Args:
+            cost_fn: hàm (pos, tile) -> chi phí bước (xem pathfinding.make_cost_fn), None = đường ngắn nhất
+            fire_system: Có thì tránh các ô sẽ cháy trước khi player đi tới
         
-        return []
+        Returns:
+            list (col, row) không gồm start - số ô đã mở rộng ở self.search.expanded
+        """
+        gate = self.fire_gate(fire_system, game_time) if fire_system else None
+        return self.search.route(map_data, start, goal, cost_fn, gate)
     
-    def activate_escape_finder(self, player, map_data, fire_tiles, game_time, game_log):
+    def fire_gate(self, fire_system, game_time):
+        """Điều kiện vào ô cho BFS: lửa chưa tới ô trước khi player đi dist bước tới đó"""
+        def can_enter(pos, dist):
+            return fire_system.eta(pos) > game_time + dist * PLAYER_STEP_TIME
+        return can_enter
+    
+    def activate_escape_finder(self, player, map_data, fire_system, game_time, game_log):
         """Kích hoạt BFS thoát hiểm - Cần HP <= 50"""
         # Kiểm tra điều kiện HP
         if player.stats["HP"] > HELPER_ESCAPE_HP_THRESHOLD:
@@ -172,7 +139,7 @@ class PathHelper:
             return False
         
         player_pos = (player.grid_x, player.grid_y)
-        self.escape_path = self.find_safe_path_bfs(player_pos, map_data, fire_tiles)
+        self.escape_path = self.find_safe_path_bfs(player_pos, map_data, fire_system, game_time)
         
         if self.escape_path:
             self.escape_path_visible = True
@@ -195,6 +162,8 @@ class PathHelper:
         if not fire_tiles:
             return
         
+        map_width, map_height = get_map_size(map_data)
+        
         # BFS từ mỗi ô lửa
         for fire_pos in fire_tiles:
             queue = deque([(fire_pos[0], fire_pos[1], 0)])
@@ -210,17 +179,32 @@ class PathHelper:
                 for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
                     nx, ny = col + dx, row + dy
                     
-                    if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
+                    if 0 <= nx < map_width and 0 <= ny < map_height:
                         if (nx, ny) not in visited:
-                            tile = map_data[ny][nx]
+                            tile = map_data.peek_tile(nx, ny)
                             # Lửa có thể lan sang cỏ, cây, hoa
                             if tile in [TILE_GRASS, TILE_TREE, TILE_FLOWER]:
                                 visited.add((nx, ny))
                                 self.danger_tiles.add((nx, ny))
                                 queue.append((nx, ny, dist + 1))
     
+    # ==================== MONTE CARLO: DỰ BÁO LỬA LAN ====================
+    def forecast_fire_spread(self, fire_system, map_data):
+        """
+        Cập nhật danger_tiles từ dự báo Monte Carlo (chạy lại tối đa một lần mỗi lượt lan lửa)
+        Không có NumPy thì dùng BFS dự đoán 2 bước
+        """
+        if self.forecaster is None:
+            self.predict_fire_spread_bfs(fire_system.fire_tiles, map_data, depth=2)
+            return
+        key = self.forecaster.cache_key
+        self.forecaster.forecast(fire_system, map_data)
+        if key != self.forecaster.cache_key or not self.danger_probability:
+            self.danger_probability = self.forecaster.danger_tiles()
+            self.danger_tiles = set(self.danger_probability)
+    
     # ==================== UPDATE ====================
-    def update(self, game_time, fire_tiles, map_data, player_pos):
+    def update(self, game_time, fire_system, map_data, player_pos):
         """Cập nhật trạng thái helper mỗi frame"""
         # Xóa các ô đường đi mà player đã đi qua (DFS path)
         if self.piece_path_visible and self.piece_path:
@@ -255,17 +239,14 @@ class PathHelper:
                 self.escape_path = []
         
         # Tự động dự đoán lửa lan nếu lửa gần player
-        if fire_tiles:
-            player_col, player_row = player_pos
-            min_dist = float('inf')
-            for fire_col, fire_row in fire_tiles:
-                dist = abs(player_col - fire_col) + abs(player_row - fire_row)
-                min_dist = min(min_dist, dist)
+        if fire_system.fire_tiles:
+            min_dist = fire_system.distance_to_fire(player_pos)
             
             if min_dist <= 5:  # Lửa trong phạm vi 5 ô
-                self.predict_fire_spread_bfs(fire_tiles, map_data, depth=2)
+                self.forecast_fire_spread(fire_system, map_data)
             else:
                 self.danger_tiles = set()
+                self.danger_probability = {}
     
     # ==================== GETTERS ====================
     def get_piece_path(self):
@@ -284,6 +265,10 @@ class PathHelper:
         """Trả về các ô nguy hiểm (để vẽ cảnh báo)"""
         return self.danger_tiles
     
+    def get_danger_probability(self, pos):
+        """Xác suất ô pos bắt lửa theo dự báo (1.0 nếu ô được BFS đánh dấu)"""
+        return self.danger_probability.get(pos, 1.0)
+    
     # ==================== PUBLIC API (Called from main.py) ====================
     def find_path_to_piece(self, map_data, player_pos, rescue_system, player, game_log):
         """
@@ -300,12 +285,13 @@ class PathHelper:
         Tìm lối thoát hiểm bằng BFS
         """
         game_time = pygame.time.get_ticks()
-        fire_tiles = fire_system.fire_tiles
-        self.activate_escape_finder(player, map_data, fire_tiles, game_time, game_log)
+        self.activate_escape_finder(player, map_data, fire_system, game_time, game_log)
     
-    def find_path_to_boat(self, map_data, player_pos, rescue_system, player, game_log):
+    def find_path_to_boat(self, map_data, player_pos, rescue_system, player, game_log, fire_system=None):
         """
-        Phím 3 - Tìm đường đến thuyền cứu hộ bằng BFS
+        Phím 3 - Tìm đường đến thuyền cứu hộ bằng A* có trọng số
+        (cát đi chậm hơn cỏ - PATH_TILE_COSTS; có fire_system thì phạt ô gần lửa
+        và bỏ qua các ô sẽ cháy trước khi player đi tới)
         """
         if not rescue_system.boat_arrived:
             game_log.append("Thuyền chưa đến! Hãy thu thập mảnh ghép trước.")
@@ -319,45 +305,18 @@ class PathHelper:
                 game_log.pop(0)
             return
         
-        # Sử dụng BFS tìm đường đến thuyền
-        from collections import deque
-        
-        start_col, start_row = player_pos
-        target_col, target_row = rescue_system.boat_position
-        
-        queue = deque([(start_col, start_row, [])])
-        visited = set()
-        visited.add((start_col, start_row))
-        
-        boat_path = []
-        
-        while queue:
-            col, row, path = queue.popleft()
-            
-            # Đã đến thuyền
-            if (col, row) == (target_col, target_row):
-                boat_path = path
-                break
-            
-            # Duyệt 4 hướng
-            for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
-                nx, ny = col + dx, row + dy
-                
-                if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                    if (nx, ny) not in visited:
-                        tile = map_data[ny][nx]
-                        # Có thể đi qua
-                        if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
-                            visited.add((nx, ny))
-                            new_path = path + [(nx, ny)]
-                            queue.append((nx, ny, new_path))
+        # Đích đã biết -> A* có trọng số (tránh ô sẽ cháy trước khi tới nếu có fire_system)
+        game_time = pygame.time.get_ticks()
+        boat_path = self.route(map_data, player_pos, rescue_system.boat_position,
+                               cost_fn=make_cost_fn(fire_system),
+                               fire_system=fire_system, game_time=game_time)
         
         if boat_path:
             # Hiển thị đường đi đến thuyền (dùng escape_path để hiển thị)
             self.escape_path = boat_path
             self.escape_path_visible = True
             self.escape_path_time = pygame.time.get_ticks()
-            game_log.append(f"[BFS] Đường đến thuyền: {len(boat_path)} bước")
+            game_log.append(f"[A*] Đường đến thuyền: {len(boat_path)} bước ({self.search.expanded} ô đã xét)")
         else:
             game_log.append("Không tìm được đường đến thuyền!")
         
@@ -366,8 +325,7 @@ class PathHelper:
     
     def predict_fire_spread(self, map_data, fire_system, player, game_log):
         """
-        Wrapper cho predict_fire_spread_bfs - Phím 4
-        Dự đoán vùng lửa sắp lan tới
+        Phím 4: Dự đoán vùng lửa sắp lan tới (Monte Carlo, không có NumPy thì BFS)
         """
         fire_tiles = fire_system.fire_tiles
         
@@ -377,10 +335,13 @@ class PathHelper:
                 game_log.pop(0)
             return
         
-        self.predict_fire_spread_bfs(fire_tiles, map_data, depth=2)
+        self.forecast_fire_spread(fire_system, map_data)
         
         danger_count = len(self.danger_tiles)
-        if danger_count > 0:
+        if danger_count > 0 and self.forecaster is not None:
+            seconds = FIRE_FORECAST_TICKS * fire_system.spread_interval // 1000
+            game_log.append(f"[Monte Carlo] Cảnh báo: {danger_count} ô có thể cháy trong ~{seconds}s!")
+        elif danger_count > 0:
             game_log.append(f"[BFS] Cảnh báo: {danger_count} ô sắp cháy!")
         else:
             game_log.append("An toàn! Chưa có nguy cơ lửa lan.")
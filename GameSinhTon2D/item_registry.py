@@ -0,0 +1,146 @@
+"""
+Item Registry - Sổ vật phẩm trên bản đồ (mảnh ghép, hồi máu, hồi stamina)
+Tra theo vị trí O(1), nhóm theo loại, và lưới thô (ITEM_GRID_CELL ô mỗi cạnh) để
+tìm vật phẩm gần nhất / liệt kê vật phẩm trong một hình chữ nhật mà không quét bản đồ.
+Cập nhật từ đường ghi tile duy nhất của bản đồ (set_idx / set_tile, sinh chunk).
+"""
+from settings import *
+
+ITEM_TILE_TYPES = (TILE_PIECE, TILE_HEALTH, TILE_STAMINA)
+NEAREST_SCAN_LIMIT = 64  # Ít vật phẩm hơn mức này: so trực tiếp cả nhóm thay vì duyệt lưới
+
+class ItemRegistry:
+    def __init__(self, width, height, cell_size=ITEM_GRID_CELL):
+        """
+        Args:
+            width, height: Kích thước bản đồ (chỉ số phẳng idx = row * width + col)
+            cell_size: Cạnh một ô lưới thô (ô bản đồ)
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.items = {}                                       # {(col, row): loại tile}
+        self.buckets = {tile_type: set() for tile_type in ITEM_TILE_TYPES}  # {loại: set (col, row)}
+        self.grid = {}                                        # {(cell_x, cell_y): set (col, row)}
+
+    @classmethod
+    def for_grid(cls, grid):
+        """Sổ dựng từ chỉ mục tile của TileGrid (TileGrid gắn vào observers)"""
+        registry = cls(grid.width, grid.height)
+        registry.build(grid.tile_index)
+        return registry
+
+    def build(self, tile_index):
+        """Nạp mọi vật phẩm từ chỉ mục tile (gọi 1 lần khi tạo bản đồ)"""
+        for tile_type in ITEM_TILE_TYPES:
+            for idx in tile_index.lists.get(tile_type, ()):
+                self.add(idx, tile_type)
+
+    # ==================== CẬP NHẬT ====================
+    def add(self, idx, tile_type):
+        bucket = self.buckets.get(tile_type)
+        if bucket is None:
+            return
+        pos = (idx % self.width, idx // self.width)
+        self.items[pos] = tile_type
+        bucket.add(pos)
+        cell = (pos[0] // self.cell_size, pos[1] // self.cell_size)
+        self.grid.setdefault(cell, set()).add(pos)
+
+    def remove(self, idx, tile_type):
+        bucket = self.buckets.get(tile_type)
+        if bucket is None:
+            return
+        pos = (idx % self.width, idx // self.width)
+        if self.items.pop(pos, None) is None:
+            return
+        bucket.discard(pos)
+        cell = (pos[0] // self.cell_size, pos[1] // self.cell_size)
+        members = self.grid[cell]
+        members.discard(pos)
+        if not members:
+            del self.grid[cell]
+
+    def move(self, idx, old_type, new_type):
+        """Cập nhật khi ô idx đổi từ old_type sang new_type"""
+        self.remove(idx, old_type)
+        self.add(idx, new_type)
+
+    on_change = move  # Observer của TileGrid
+
+    # ==================== TRUY VẤN ====================
+    def item_at(self, pos):
+        """Loại vật phẩm tại pos, None nếu không có"""
+        return self.items.get(pos)
+
+    def contains(self, pos, tile_type):
+        return self.items.get(pos) == tile_type
+
+    def count(self, tile_type):
+        return len(self.buckets.get(tile_type, ()))
+
+    def positions(self, tile_type):
+        """Danh sách (col, row) vật phẩm loại tile_type (thứ tự cố định - sắp xếp, không dùng mỗi frame)"""
+        return sorted(self.buckets.get(tile_type, ()))
+
+    def bucket(self, tile_type):
+        """Tập (col, row) vật phẩm loại tile_type - tập gốc, không chép/sắp xếp; không ghi tile khi đang duyệt"""
+        return self.buckets.get(tile_type, frozenset())
+
+    def nearest(self, pos, tile_type, max_distance=None):
+        """
+        Vật phẩm loại tile_type gần pos nhất (khoảng cách Manhattan)
+        Duyệt lưới thô theo từng vòng ô lưới quanh pos, dừng khi vòng kế không thể gần hơn
+
+        Returns:
+            (col, row) hoặc None
+        """
+        bucket = self.buckets.get(tile_type)
+        if not bucket:
+            return None
+        col, row = pos
+        if len(bucket) <= NEAREST_SCAN_LIMIT:
+            best = min(bucket, key=lambda item: (abs(item[0] - col) + abs(item[1] - row), item[1], item[0]))
+            if max_distance is not None and abs(best[0] - col) + abs(best[1] - row) > max_distance:
+                return None
+            return best
+        size = self.cell_size
+        cx, cy = col // size, row // size
+        max_ring = max(self.width, self.height) // size + 1
+        best, best_key = None, None
+        for ring in range(max_ring + 1):
+            # Mọi ô của vòng ring cách pos ít nhất (ring - 1) * size + 1 ô
+            floor = (ring - 1) * size + 1
+            if best_key is not None and best_key[0] < floor:
+                break
+            if max_distance is not None and floor > max_distance:
+                break
+            for gx in range(cx - ring, cx + ring + 1):
+                for gy in ((cy - ring, cy + ring) if abs(gx - cx) != ring else range(cy - ring, cy + ring + 1)):
+                    for item in self.grid.get((gx, gy), ()):
+                        if self.items[item] != tile_type:
+                            continue
+                        key = (abs(item[0] - col) + abs(item[1] - row), item[1], item[0])
+                        if best_key is None or key < best_key:
+                            best, best_key = item, key
+        if best is not None and max_distance is not None and best_key[0] > max_distance:
+            return None
+        return best
+
+    def in_rect(self, col0, row0, col1, row1, tile_type=None):
+        """
+        Vật phẩm trong hình chữ nhật [col0, col1) x [row0, row1) - chỉ duyệt các ô lưới giao nó
+
+        Returns:
+            list ((col, row), loại tile)
+        """
+        size = self.cell_size
+        result = []
+        for gy in range(row0 // size, (row1 - 1) // size + 1):
+            for gx in range(col0 // size, (col1 - 1) // size + 1):
+                for item in self.grid.get((gx, gy), ()):
+                    item_type = self.items[item]
+                    if col0 <= item[0] < col1 and row0 <= item[1] < row1 and \
+                            (tile_type is None or item_type == tile_type):
+                        result.append((item, item_type))
+        return result
@@ -1,6 +1,7 @@
 """
 Level Manager - Quản lý màn chơi và độ khó
 """
+import random
 from settings import *
 from score import load_level_progress, save_level_progress
 
@@ -8,16 +9,21 @@ class LevelManager:
     def __init__(self):
         self.current_level = 1
         self.max_level_reached = load_level_progress()  # Load from file
+        self.level_seeds = {}  # {level: seed} - chơi lại giữ nguyên seed (cùng hòn đảo)
         print(f"🎮 Level Manager initialized: Level {self.max_level_reached} unlocked")
         
-    def get_level_config(self):
+    def get_level_config(self, level=None):
         """
         Trả về cấu hình cho level hiện tại
         
+        Args:
+            level: Số level (None = level hiện tại) - dùng để dựng trước level kế tiếp
+        
         Returns:
             dict: Cấu hình level với các parameters
         """
-        level = self.current_level
+        if level is None:
+            level = self.current_level
         
         # Base configuration
         config = {
@@ -27,8 +33,11 @@ class LevelManager:
             "fire_spawn_points": 1,  # Số điểm lửa khởi đầu
             "map_width": MAP_WIDTH,
             "map_height": MAP_HEIGHT,
+            "world_mode": WORLD_MODE,  # "island" hoặc "archipelago" (chia chunk)
             "pieces_required": TOTAL_PIECES,
             "boat_arrival_time": BOAT_ARRIVAL_TIME,
+            "seed": self.get_seed(level),
+            "fire_engine": FIRE_ENGINE,  # "sets" hoặc "numpy"
         }
         
         # Level 1: Tutorial (Easy)
@@ -55,6 +64,7 @@ class LevelManager:
             config["fire_start_delay"] = 1000
             config["fire_spawn_points"] = 3        # 3 điểm lửa
             config["pieces_required"] = 5          # Cần nhiều mảnh hơn
+            config["fire_engine"] = "numpy"        # Đám cháy lớn -> engine mảng
             
         # Level 11+: Master
         else:
@@ -63,9 +73,29 @@ class LevelManager:
             config["fire_spawn_points"] = 4        # 4 điểm lửa
             config["pieces_required"] = 6
             config["boat_arrival_time"] = 8000     # Thuyền đến chậm hơn
+            config["fire_engine"] = "numpy"
         
         return config
     
+    def get_seed(self, level):
+        """
+        Seed sinh bản đồ của level
+        
+        Returns:
+            int: LEVEL_SEED cố định (kết hợp số level) hoặc seed ngẫu nhiên giữ đến khi reroll_seed()
+        """
+        if LEVEL_SEED is not None:
+            return LEVEL_SEED * 100 + level
+        if level not in self.level_seeds:
+            self.level_seeds[level] = random.getrandbits(32)
+        return self.level_seeds[level]
+    
+    def reroll_seed(self, level=None):
+        """Đổi sang hòn đảo mới cho level (không có tác dụng khi LEVEL_SEED cố định)"""
+        if level is None:
+            level = self.current_level
+        self.level_seeds.pop(level, None)
+    
     def get_level_name(self):
         """Trả về tên level"""
         level = self.current_level
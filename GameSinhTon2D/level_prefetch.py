@@ -0,0 +1,196 @@
+"""
+Level Prefetch - Dựng trước level kế tiếp trong thread nền
+Khi vào màn WIN / GAMEOVER, level "tiếp theo" và "chơi lại" được dựng sẵn
+để nút bấm chỉ cần lấy ra, không bị khựng frame.
+"""
+import random
+import threading
+from settings import *
+from world import generate_island_map, get_map_size
+from map_cache import load_cached_island, save_cached_island
+from chunk_world import ChunkedWorld
+from player import Player
+from fire import create_fire_system
+from rescue import RescueSystem
+from helper import PathHelper
+from turtle import spawn_turtles
+
+def get_level_rng(seed, stream):
+    """Bộ sinh ngẫu nhiên riêng cho từng phần của level (None = dùng random chung)"""
+    if seed is None:
+        return random
+    return random.Random(f"{seed}:{stream}")
+
+def load_level_map(config, seed):
+    """
+    Bản đồ của level cho seed (đọc cache nếu có)
+
+    Returns:
+        tuple: (map_data, piece_positions) - piece_positions None nếu mảnh ghép chưa được đặt
+    """
+    if config["world_mode"] == "archipelago":
+        # Quần đảo chia chunk - chỉ sinh các chunk quanh người chơi
+        return ChunkedWorld(ARCHIPELAGO_WIDTH, ARCHIPELAGO_HEIGHT, seed=seed), None
+    # Đảo đã sinh với seed này -> chỉ cần đọc file
+    cached = load_cached_island(seed, config["map_width"], config["map_height"], config["pieces_required"])
+    if cached:
+        return cached
+    return generate_island_map(config["map_width"], config["map_height"], seed), None
+
+def find_start_position(map_data):
+    """Đi chéo từ tâm tới ô đi được đầu tiên thuộc vùng đủ lớn (không kẹt giữa các cây)"""
+    map_width, map_height = get_map_size(map_data)
+    connectivity = map_data.connectivity
+    start_x, start_y = map_width // 2, map_height // 2
+    first_walkable = None
+    while map_data.in_bounds(start_x, start_y):
+        if map_data[start_y][start_x] not in [TILE_WATER, TILE_TREE]:
+            first_walkable = first_walkable or (start_x, start_y)
+            # Chỉ đếm tới START_MIN_COMPONENT_SIZE ô - không flood cả vùng trên bản đồ rất lớn
+            if connectivity.component_at_least((start_x, start_y), START_MIN_COMPONENT_SIZE):
+                break
+        start_x += 1
+        start_y += (start_x % 2)
+    else:
+        start_x, start_y = first_walkable or (map_width // 2, map_height // 2)
+
+    if isinstance(map_data, ChunkedWorld):
+        # Sinh trước vùng quanh điểm xuất phát để đặt mảnh ghép, lửa, quái
+        map_data.ensure_around(start_x, start_y)
+    return start_x, start_y
+
+def build_level(config):
+    """
+    Dựng toàn bộ đối tượng của một level (không đụng tới pygame display)
+
+    Args:
+        config: Cấu hình level từ LevelManager.get_level_config()
+
+    Returns:
+        tuple: (map_data, player, fire_system, rescue_system, path_helper, turtles)
+    """
+    seed = config.get("seed")
+
+    # Rescue System với level config
+    rescue_system = RescueSystem(
+        pieces_required=config["pieces_required"],
+        boat_time=config["boat_arrival_time"]
+    )
+
+    for attempt in range(LEVEL_MAX_REROLLS + 1):
+        if attempt and seed is not None:
+            # Đảo trước không đủ chỗ cho mảnh ghép: seed mới suy ra từ seed gốc (vẫn tái lập được)
+            seed = get_level_rng(config["seed"], f"reroll:{attempt}").getrandbits(32)
+        map_data, piece_positions = load_level_map(config, seed)
+        start_x, start_y = find_start_position(map_data)
+
+        if piece_positions is not None:
+            # Mảnh ghép đã nằm sẵn trong bản đồ từ cache (sổ vật phẩm dựng từ tile)
+            rescue_system.items = map_data.items
+            break
+        try:
+            # Cùng seed -> cùng vị trí mảnh ghép
+            rescue_system.place_pieces(map_data, get_level_rng(seed, "pieces"), start_pos=(start_x, start_y))
+        except ValueError:
+            if attempt == LEVEL_MAX_REROLLS:
+                raise
+            continue
+        if not isinstance(map_data, ChunkedWorld):
+            save_cached_island(map_data, seed, config["pieces_required"], rescue_system.piece_positions)
+        break
+
+    player = Player(start_x, start_y)
+
+    # Fire System với level config (engine set/dict hoặc NumPy tuỳ level)
+    fire_system = create_fire_system(config, map_data)
+
+    # Path Helper
+    path_helper = PathHelper()
+
+    # Quái rùa (số lượng = số level)
+    turtles = spawn_turtles(map_data, config["level"], get_level_rng(seed, "turtles"))
+
+    return map_data, player, fire_system, rescue_system, path_helper, turtles
+
+
+class LevelPrefetcher:
+    def __init__(self):
+        self.jobs = {}  # {key: {"config", "thread", "result", "error"}}
+
+        # Thống kê
+        self.hits = 0    # Level đã dựng xong khi bấm nút
+        self.waits = 0   # Đang dựng dở -> chờ thread xong (vẫn nhanh hơn dựng lại)
+        self.misses = 0  # Không có / sai cấu hình / lỗi -> dựng đồng bộ
+
+    def prefetch(self, key, config):
+        """
+        Bắt đầu dựng level trong thread nền
+
+        Args:
+            key: Tên slot ("next", "retry")
+            config: Cấu hình level cần dựng
+        """
+        job = self.jobs.get(key)
+        if job and job["config"] == config:
+            return  # Đã có (hoặc đang dựng) đúng level này
+
+        job = {"config": dict(config), "result": None, "error": None}
+
+        def worker():
+            try:
+                job["result"] = build_level(job["config"])
+            except Exception as e:
+                job["error"] = e
+
+        job["thread"] = threading.Thread(target=worker, name=f"prefetch-{key}", daemon=True)
+        self.jobs[key] = job
+        job["thread"].start()
+
+    def take(self, key, config, on_wait=None):
+        """
+        Lấy level đã dựng sẵn; fallback dựng đồng bộ nếu không dùng được
+
+        Args:
+            on_wait: Hàm gọi trước khi chặn chờ thread dựng dở (vd. vẽ màn hình chờ)
+
+        Returns:
+            tuple: Giống build_level(config)
+        """
+        job = self.jobs.pop(key, None)
+        result = None
+
+        if job is not None and job["config"] == config:
+            if job["thread"].is_alive():
+                # Chưa xong: chờ thread (phần đã dựng không bị bỏ phí)
+                if PREFETCH_DEBUG:
+                    print(f"⏳ Đang chờ dựng xong level '{key}'...")
+                if on_wait is not None:
+                    on_wait()
+                job["thread"].join()
+                if job["result"] is not None:
+                    self.waits += 1
+            elif job["result"] is not None:
+                self.hits += 1
+            result = job["result"]
+            if job["error"] is not None:
+                print(f"⚠️ Prefetch '{key}' lỗi: {job['error']}")
+
+        if result is None:
+            self.misses += 1
+            if on_wait is not None:
+                on_wait()
+            result = build_level(config)
+
+        if PREFETCH_DEBUG:
+            print(f"⚡ Prefetch '{key}': hit {self.hits} | chờ {self.waits} | miss {self.misses} "
+                  f"({self.get_hit_rate() * 100:.0f}% hit)")
+        return result
+
+    def cancel(self):
+        """Bỏ các level dựng sẵn (về menu, chọn level khác)"""
+        self.jobs.clear()
+
+    def get_hit_rate(self):
+        """Tỉ lệ lần lấy level đã dựng xong sẵn"""
+        total = self.hits + self.waits + self.misses
+        return self.hits / total if total else 0.0
@@ -7,18 +7,15 @@ sys.stdout.reconfigure(encoding='utf-8')
 
 from settings import *
 from utils import load_assets
-from world import generate_island_map
-from player import Player
+from world import get_map_size
+from chunk_world import ChunkedWorld
 from ui import UI
-from fire import FireSystem
-from rescue import RescueSystem
 from score import format_time, get_high_score_for_level, update_high_score
-from helper import PathHelper
 from level_manager import LevelManager
+from level_prefetch import LevelPrefetcher, build_level
 from rain import RainSystem
 from sound import SoundSystem
-from turtle import spawn_turtles
-from ui_menus import draw_main_menu_screen, draw_level_select_screen, draw_leaderboard_screen
+from ui_menus import draw_main_menu_screen, draw_level_select_screen, draw_leaderboard_screen, draw_loading_screen
 
 def main():
     pygame.init()
@@ -49,39 +46,34 @@ def main():
     # Rain System (global - persistent across levels)
     rain_system = RainSystem()
     
+    # Level Prefetcher - dựng trước level "tiếp theo"/"chơi lại" khi ở màn WIN/GAMEOVER
+    level_prefetcher = LevelPrefetcher()
+    
+    def get_next_level_number():
+        """Level sau khi bấm NEXT LEVEL (tối đa level 9)"""
+        return min(level_manager.current_level + 1, 9)
+    
     # Helper function to start a new level
-    def start_new_level():
-        """Khởi tạo level mới với cấu hình thích hợp"""
-        config = level_manager.get_level_config()
-        
-        # Generate map
-        map_data = generate_island_map(MAP_WIDTH, MAP_HEIGHT)
-        
-        # Setup Player Position
-        start_x, start_y = MAP_WIDTH // 2, MAP_HEIGHT // 2
-        while map_data[start_y][start_x] in [TILE_WATER, TILE_TREE]:
-            start_x += 1
-            start_y += (start_x % 2)
-        
-        player = Player(start_x, start_y)
-        
-        # Fire System với level config
-        fire_system = FireSystem(config)
+    def start_new_level(prefetch_key=None):
+        """
+        Khởi tạo level mới với cấu hình thích hợp
         
-        # Rescue System với level config
-        rescue_system = RescueSystem(
-            pieces_required=config["pieces_required"],
-            boat_time=config["boat_arrival_time"]
-        )
-        rescue_system.place_pieces(map_data)
-        
-        # Path Helper
-        path_helper = PathHelper()
-        
-        return map_data, player, fire_system, rescue_system, path_helper
+        Args:
+            prefetch_key: "next"/"retry" = lấy level dựng sẵn nếu có, None = dựng ngay
+        """
+        config = level_manager.get_level_config()
+        if prefetch_key is None:
+            level_prefetcher.cancel()
+            return build_level(config)
+        return level_prefetcher.take(prefetch_key, config, on_wait=show_loading_screen)
+    
+    def show_loading_screen():
+        """Vẽ màn hình chờ trước khi chặn main thread để dựng/chờ level"""
+        draw_loading_screen(screen_total, font_title, font_body)
+        pygame.display.flip()
     
     # Initialize first level
-    map_data, player, fire_system, rescue_system, path_helper = start_new_level()
+    map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level()
     
     ui_manager = UI(screen_total)
     
@@ -136,8 +128,8 @@ def main():
                     if 'campaign' in main_menu_buttons and main_menu_buttons['campaign'].collidepoint(mouse_pos):
                         # Start campaign - Level 1
                         level_manager.current_level = 1
-                        map_data, player, fire_system, rescue_system, path_helper = start_new_level()
-                        turtles = spawn_turtles(map_data, level_manager.current_level)
+                        level_manager.reroll_seed()
+                        map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level()
                         game_start_time = pygame.time.get_ticks()
                         current_state = GAME_STATE_PLAYING
                         sound_system.play_game_bgm()  # Chuyển sang nhạc gameplay
@@ -158,8 +150,8 @@ def main():
                         for level_num, btn_rect in level_select_buttons['levels'].items():
                             if btn_rect.collidepoint(mouse_pos):
                                 level_manager.current_level = level_num
-                                map_data, player, fire_system, rescue_system, path_helper = start_new_level()
-                                turtles = spawn_turtles(map_data, level_manager.current_level)
+                                level_manager.reroll_seed()
+                                map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level()
                                 game_start_time = pygame.time.get_ticks()
                                 current_state = GAME_STATE_PLAYING
                                 sound_system.play_game_bgm()  # Chuyển sang nhạc gameplay
@@ -176,13 +168,13 @@ def main():
                 elif current_state == GAME_STATE_GAMEOVER:
                     if retry_btn.collidepoint(mouse_pos):
                         # Retry current level
-                        map_data, player, fire_system, rescue_system, path_helper = start_new_level()
-                        turtles = spawn_turtles(map_data, level_manager.current_level)
+                        map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level("retry")
                         game_start_time = pygame.time.get_ticks()
                         current_state = GAME_STATE_PLAYING
                         sound_system.play_game_bgm()  # Chuyển sang nhạc gameplay
                         game_log = ["- Chơi lại!", "- Cố gắng lên!"]
                     elif home_btn.collidepoint(mouse_pos):
+                        level_prefetcher.cancel()
                         current_state = GAME_STATE_MAIN_MENU
                         sound_system.play_menu_bgm()  # Chuyển về nhạc menu
                 
@@ -198,24 +190,21 @@ def main():
                             game_log.append(f"🎉 Level {level_manager.max_level_reached} unlocked!")
                         
                         # Move to next level
-                        level_manager.current_level += 1
-                        if level_manager.current_level > 9:
-                            level_manager.current_level = 9
-                        map_data, player, fire_system, rescue_system, path_helper = start_new_level()
-                        turtles = spawn_turtles(map_data, level_manager.current_level)
+                        level_manager.current_level = get_next_level_number()
+                        map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level("next")
                         game_start_time = pygame.time.get_ticks()
                         current_state = GAME_STATE_PLAYING
                         sound_system.play_game_bgm()  # Chuyển sang nhạc gameplay
                         game_log = [f"- Level {level_manager.current_level}!", "- Tiếp tục nào!"]
                     elif win_retry_btn.collidepoint(mouse_pos):
                         # Replay current level
-                        map_data, player, fire_system, rescue_system, path_helper = start_new_level()
-                        turtles = spawn_turtles(map_data, level_manager.current_level)
+                        map_data, player, fire_system, rescue_system, path_helper, turtles = start_new_level("retry")
                         game_start_time = pygame.time.get_ticks()
                         current_state = GAME_STATE_PLAYING
                         sound_system.play_game_bgm()  # Chuyển sang nhạc gameplay
                         game_log = ["- Chơi lại!", "- Cải thiện kỷ lục!"]
                     elif win_home_btn.collidepoint(mouse_pos):
+                        level_prefetcher.cancel()
                         current_state = GAME_STATE_MAIN_MENU
                         sound_system.play_menu_bgm()  # Chuyển về nhạc menu
                 
@@ -249,7 +238,7 @@ def main():
                 elif event.key == pygame.K_2 or event.key == pygame.K_e:
                     path_helper.find_escape_route(map_data, (player.grid_x, player.grid_y), fire_system, player, game_log)
                 elif event.key == pygame.K_3:
-                    path_helper.find_path_to_boat(map_data, (player.grid_x, player.grid_y), rescue_system, player, game_log)
+                    path_helper.find_path_to_boat(map_data, (player.grid_x, player.grid_y), rescue_system, player, game_log, fire_system)
                 elif event.key == pygame.K_4:
                     path_helper.predict_fire_spread(map_data, fire_system, player, game_log)
                 
@@ -258,6 +247,13 @@ def main():
                     if rescue_system.can_board:
                         if rescue_system.board_boat():
                             current_state = GAME_STATE_WIN
+                            # Dựng trước level tiếp theo (đảo mới) và "chơi lại" (cùng đảo) trong lúc hiện màn WIN
+                            next_level = get_next_level_number()
+                            if next_level != level_manager.current_level:
+                                # Level cuối: "next" là chính level này -> giữ seed để "chơi lại" cùng đảo
+                                level_manager.reroll_seed(next_level)
+                            level_prefetcher.prefetch("next", level_manager.get_level_config(next_level))
+                            level_prefetcher.prefetch("retry", level_manager.get_level_config())
                             game_log.append("THẮNG! Bạn đã thoát đảo!")
                             if len(game_log) > 10:
                                 game_log.pop(0)
@@ -283,17 +279,32 @@ def main():
             target_cam_x = player.pixel_x - (VIEWPORT_WIDTH // 2) + (TILE_SIZE // 2)
             target_cam_y = player.pixel_y - (VIEWPORT_HEIGHT // 2) + (TILE_SIZE // 2)
             
+            # Quần đảo: camera ở quá xa (level mới, dịch chuyển) thì nhảy thẳng tới,
+            # tránh lướt qua và sinh hàng loạt chunk dọc đường
+            if isinstance(map_data, ChunkedWorld) and (abs(target_cam_x - camera_x) > VIEWPORT_WIDTH
+                                                       or abs(target_cam_y - camera_y) > VIEWPORT_HEIGHT):
+                camera_x, camera_y = target_cam_x, target_cam_y
+            
             camera_x += (target_cam_x - camera_x) * 0.1
             camera_y += (target_cam_y - camera_y) * 0.1
             
             # Kẹp camera
-            max_cam_x = (MAP_WIDTH * TILE_SIZE) - VIEWPORT_WIDTH
-            max_cam_y = (MAP_HEIGHT * TILE_SIZE) - VIEWPORT_HEIGHT
+            map_width, map_height = get_map_size(map_data)
+            max_cam_x = (map_width * TILE_SIZE) - VIEWPORT_WIDTH
+            max_cam_y = (map_height * TILE_SIZE) - VIEWPORT_HEIGHT
             camera_x = max(0, min(camera_x, max_cam_x))
             camera_y = max(0, min(camera_y, max_cam_y))
             
+            # Quần đảo chia chunk: sinh chunk quanh camera/agent, giải phóng chunk xa
+            if isinstance(map_data, ChunkedWorld):
+                camera_tile = (int(camera_x + VIEWPORT_WIDTH // 2) // TILE_SIZE,
+                               int(camera_y + VIEWPORT_HEIGHT // 2) // TILE_SIZE)
+                agent_tiles = [(player.grid_x, player.grid_y)] + [(t.grid_x, t.grid_y) for t in turtles]
+                map_data.stream(camera_tile, agent_tiles)
+            
             game_time = pygame.time.get_ticks()
             survival_time = game_time - game_start_time
+            map_data.journal.begin_frame(game_time)
             
             # Fire System Update
             fire_system.update(map_data, game_time)
@@ -310,11 +321,11 @@ def main():
                 # Đủ 4 mảnh - kích hoạt pháo
                 rescue_system.activate_flare(game_time, game_log)
             
-            rescue_system.update(game_time, map_data, game_log, fire_system)
+            rescue_system.update(game_time, map_data, game_log, fire_system, (player.grid_x, player.grid_y))
             rescue_system.check_near_boat(player, game_time)
             
             # Helper System Update
-            path_helper.update(game_time, fire_system.fire_tiles, map_data, (player.grid_x, player.grid_y))
+            path_helper.update(game_time, fire_system, map_data, (player.grid_x, player.grid_y))
             
             # Check player fire damage (Progressive System)
             should_damage, damage_amount, heat_level = fire_system.check_player_damage(player, game_time)
@@ -337,6 +348,8 @@ def main():
                 if player.stats["HP"] <= 0:
                     player.stats["HP"] = 0
                     current_state = GAME_STATE_GAMEOVER
+                    # Dựng trước level "chơi lại" trong lúc hiện màn GAMEOVER
+                    level_prefetcher.prefetch("retry", level_manager.get_level_config())
             
             # Heat zone warnings (không damage nhưng cảnh báo)
             elif heat_level == 2:
@@ -350,7 +363,11 @@ def main():
                 # Warning zone - cảnh báo
                 if game_time % 3000 < 100:  # Cảnh báo mỗi 3 giây
                     if not any("Cẩn thận" in msg for msg in game_log[-3:]):
-                        game_log.append("Cẩn thận! Lửa đang lan tới gần")
+                        eta = fire_system.eta((player.grid_x, player.grid_y))
+                        if eta != float('inf'):
+                            game_log.append(f"Cẩn thận! Lửa có thể tới đây sau ~{max(0, eta - game_time) // 1000}s")
+                        else:
+                            game_log.append("Cẩn thận! Lửa đang lan tới gần")
                         if len(game_log) > 10:
                             game_log.pop(0)
             
@@ -369,6 +386,7 @@ def main():
                 turtle.draw(ui_manager.viewport_area, camera_x, camera_y)
 
             ui_manager.draw_minimap(map_data, player)
+            ui_manager.draw_storms_on_minimap(rain_system.storm_cells)
             
             # Vẽ icon thuyền trên minimap nếu thuyền đã đến
             if rescue_system.boat_arrived:
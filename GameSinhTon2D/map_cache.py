@@ -0,0 +1,129 @@
+"""
+Map Cache - Định dạng file bản đồ nhị phân + cache trên đĩa theo seed
+
+Định dạng file (little-endian):
+    Header : magic "GST2DMAP" | format version (u16) | generator version (8 byte)
+             | width (u32) | height (u32) | seed (u64) | số placement (u32)
+    Tiles  : width * height byte mã tile (hàng nối tiếp, giống TileGrid.data)
+    Placements: mỗi mục (tile_type u8, col u32, row u32) - mảnh ghép, vật phẩm
+"""
+import os
+import mmap
+import struct
+import threading
+from settings import *
+from tile_grid import TileGrid
+from world import GENERATOR_VERSION
+
+MAP_FILE_MAGIC = b"GST2DMAP"
+MAP_FILE_FORMAT = 1
+HEADER = struct.Struct("<8sH8sIIQI")
+PLACEMENT = struct.Struct("<BII")
+
+# Thư mục cache - không phụ thuộc thư mục chạy game (test trỏ sang thư mục tạm)
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), MAP_CACHE_DIR)
+
+# Loại tile được ghi vào phần placements (ngoài mảnh ghép) - mọi nhóm ghi theo thứ tự sắp xếp
+PLACEMENT_TILE_TYPES = (TILE_HEALTH, TILE_STAMINA)
+
+def save_map(path, grid, seed, placements):
+    """
+    Ghi bản đồ ra file (ghi file tạm rồi đổi tên - không bao giờ để file dở)
+
+    Args:
+        path: Đường dẫn file
+        grid: TileGrid
+        seed: Seed đã sinh ra bản đồ
+        placements: list (tile_type, col, row)
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAP_FILE_MAGIC, MAP_FILE_FORMAT, GENERATOR_VERSION.encode("ascii"),
+                            grid.width, grid.height, seed, len(placements)))
+        f.write(grid.data)
+        for tile_type, col, row in placements:
+            f.write(PLACEMENT.pack(tile_type, col, row))
+    os.replace(tmp_path, path)
+
+def load_map(path):
+    """
+    Đọc file bản đồ qua mmap
+
+    Returns:
+        (TileGrid, seed, placements) hoặc None nếu file hỏng / khác phiên bản
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) < HEADER.size:
+                return None
+            magic, file_format, generator, width, height, seed, count = HEADER.unpack_from(mm, 0)
+            if magic != MAP_FILE_MAGIC or file_format != MAP_FILE_FORMAT:
+                return None
+            if generator.rstrip(b"\0").decode("ascii") != GENERATOR_VERSION:
+                return None
+
+            tiles_end = HEADER.size + width * height
+            if len(mm) != tiles_end + count * PLACEMENT.size:
+                return None
+
+            grid = TileGrid(width, height, mm[HEADER.size:tiles_end])
+            placements = [PLACEMENT.unpack_from(mm, tiles_end + i * PLACEMENT.size) for i in range(count)]
+    return grid, seed, placements
+
+# ==================== CACHE THEO SEED ====================
+def get_cache_path(seed, width, height, pieces_required):
+    """File cache cho (seed, kích thước, số mảnh ghép, phiên bản bộ sinh và cách đặt mảnh ghép)"""
+    name = f"island_{GENERATOR_VERSION}_pl{MAP_PLACEMENT_VERSION}_{width}x{height}_p{pieces_required}_{seed}.map"
+    return os.path.join(CACHE_DIR, name)
+
+def load_cached_island(seed, width, height, pieces_required):
+    """
+    Lấy đảo đã sinh trước đó từ cache
+
+    Returns:
+        (TileGrid, piece_positions) hoặc None nếu chưa có trong cache
+    """
+    if not MAP_CACHE_ENABLED or seed is None:
+        return None
+    path = get_cache_path(seed, width, height, pieces_required)
+    if not os.path.exists(path):
+        return None
+    try:
+        loaded = load_map(path)
+    except Exception as e:
+        print(f"Error loading cached map: {e}")
+        return None
+    if loaded is None:
+        return None
+
+    grid, file_seed, placements = loaded
+    if file_seed != seed or grid.width != width or grid.height != height:
+        return None
+    piece_positions = [(col, row) for tile_type, col, row in placements if tile_type == TILE_PIECE]
+    return grid, piece_positions
+
+def save_cached_island(grid, seed, pieces_required, piece_positions):
+    """Ghi đảo vừa sinh (kèm vị trí mảnh ghép) vào cache"""
+    if not MAP_CACHE_ENABLED or seed is None:
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        placements = [(TILE_PIECE, col, row) for col, row in piece_positions]
+        for tile_type in PLACEMENT_TILE_TYPES:
+            placements.extend((tile_type, col, row) for col, row in grid.tile_index.positions(tile_type))
+        save_map(get_cache_path(seed, grid.width, grid.height, pieces_required), grid, seed, placements)
+        prune_cache()
+    except Exception as e:
+        print(f"Error saving cached map: {e}")
+
+def prune_cache(max_files=MAP_CACHE_MAX_FILES):
+    """Xoá các file cache cũ nhất khi vượt quá max_files"""
+    paths = [os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR) if name.endswith(".map")]
+    if len(paths) <= max_files:
+        return
+    paths.sort(key=os.path.getmtime)
+    for path in paths[:len(paths) - max_files]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -4,6 +4,7 @@ Monster System - Hệ thống quái vật và combat
 import random
 import math
 from settings import *
+from world import get_map_size, get_spawn_bounds
 
 class Monster:
     def __init__(self, grid_x, grid_y, level=1):
@@ -76,7 +77,8 @@ class Monster:
     def can_move_to(self, grid_x, grid_y, map_data, fire_tiles):
         """Kiểm tra có thể di chuyển đến ô này không"""
         # Kiểm tra biên
-        if grid_x < 0 or grid_x >= MAP_WIDTH or grid_y < 0 or grid_y >= MAP_HEIGHT:
+        map_width, map_height = get_map_size(map_data)
+        if grid_x < 0 or grid_x >= map_width or grid_y < 0 or grid_y >= map_height:
             return False
         
         # Tránh lửa
@@ -154,13 +156,14 @@ class MonsterSystem:
         # Spawn quái
         spawn_attempts = 0
         max_attempts = 100
+        col0, row0, col1, row1 = get_spawn_bounds(map_data)
         
         while len(self.monsters) < monster_count and spawn_attempts < max_attempts:
             spawn_attempts += 1
             
             # Random vị trí
-            x = random.randint(5, MAP_WIDTH - 5)
-            y = random.randint(5, MAP_HEIGHT - 5)
+            x = random.randint(col0 + 5, col1 - 5)
+            y = random.randint(row0 + 5, row1 - 5)
             
             # Kiểm tra xa player (ít nhất 15 tiles)
             dx = abs(x - player_pos[0])
@@ -0,0 +1,184 @@
+"""
+Particles - Hiệu ứng hạt dạng struct-of-arrays (mỗi thuộc tính một mảng NumPy)
+- FireParticles: tàn lửa / khói, pool cấp phát sẵn, chỉ phát từ ô cháy trong viewport,
+  ngân sách hạt tự giảm khi frame chậm. Sprite vẽ sẵn, vẽ hàng loạt bằng Surface.blits.
+- RainParticles: giọt mưa trong vòng đệm, tích phân theo dt.
+"""
+import pygame
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - không có thì UI bỏ tàn lửa/khói, mưa dùng list đơn giản
+    np = None
+
+EMBER = 0
+SMOKE = 1
+
+class FireParticles:
+    def __init__(self, capacity=FIRE_PARTICLE_CAPACITY, seed=None):
+        """
+        Args:
+            capacity: Số hạt tối đa trong pool (cấp phát một lần)
+            seed: Seed cho bộ sinh số ngẫu nhiên
+        """
+        self.capacity = capacity
+        self.budget = float(capacity)  # Số hạt được phép sống - giảm khi frame chậm
+        self.rng = np.random.default_rng(seed)
+
+        # Struct-of-arrays: vị trí (pixel thế giới), vận tốc (px/s), tuổi/thọ (s), loại
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.zeros(capacity, dtype=np.float32)
+        self.vx = np.zeros(capacity, dtype=np.float32)
+        self.vy = np.zeros(capacity, dtype=np.float32)
+        self.age = np.zeros(capacity, dtype=np.float32)
+        self.life = np.ones(capacity, dtype=np.float32)
+        self.kind = np.zeros(capacity, dtype=np.uint8)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.spawn_carry = 0.0  # Phần lẻ số hạt cần phát (dồn sang frame sau)
+        self.sprites = self._build_sprites()
+
+    def _build_sprites(self):
+        """sprites[kind][bước mờ dần] - vẽ một lần, dùng lại mọi frame"""
+        steps = FIRE_PARTICLE_FADE_STEPS
+        sprites = ([], [])
+        for i in range(steps):
+            fade = 1.0 - i / steps
+            ember = pygame.Surface((4, 4), pygame.SRCALPHA)
+            ember.fill((255, 160 + int(60 * fade), 40, int(255 * fade)))
+            sprites[EMBER].append(ember)
+
+            radius = 5 + i * 2  # Khói nở dần
+            smoke = pygame.Surface((radius * 2, radius * 2), pygame.SRCALPHA)
+            pygame.draw.circle(smoke, (90, 90, 90, int(110 * fade)), (radius, radius), radius)
+            sprites[SMOKE].append(smoke)
+        return sprites
+
+    @property
+    def count(self):
+        return int(self.alive.sum())
+
+    def adjust_budget(self, frame_ms):
+        """Frame chậm hơn mục tiêu -> giảm ngân sách hạt, frame nhanh -> tăng dần trở lại"""
+        if frame_ms > FIRE_PARTICLE_TARGET_FRAME_MS:
+            self.budget = max(FIRE_PARTICLE_MIN_BUDGET, self.budget * 0.85)
+        else:
+            self.budget = min(self.capacity, self.budget + self.capacity * 0.02)
+
+    def emit(self, emitters, dt):
+        """
+        Phát hạt mới từ các ô cháy emitters (list (col, row) trong viewport)
+
+        Args:
+            dt: Thời gian frame (s)
+        """
+        if not emitters:
+            return
+        wanted = len(emitters) * FIRE_PARTICLE_RATE * dt + self.spawn_carry
+        free_budget = int(self.budget) - self.count
+        n = min(int(wanted), max(0, free_budget))
+        self.spawn_carry = wanted - int(wanted) if n == int(wanted) else 0.0
+        if n <= 0:
+            return
+        slots = np.flatnonzero(~self.alive)[:n]
+        n = len(slots)
+        rng = self.rng
+
+        tiles = np.asarray(emitters, dtype=np.float32)[rng.integers(0, len(emitters), n)]
+        self.x[slots] = (tiles[:, 0] + rng.random(n, dtype=np.float32)) * TILE_SIZE
+        self.y[slots] = (tiles[:, 1] + rng.random(n, dtype=np.float32) * 0.5 + 0.3) * TILE_SIZE
+        kind = (rng.random(n) < FIRE_PARTICLE_SMOKE_RATIO).astype(np.uint8)
+        self.kind[slots] = kind
+        smoke = kind == SMOKE
+        self.vx[slots] = rng.normal(0.0, 12.0, n).astype(np.float32)
+        self.vy[slots] = np.where(smoke, -25.0, -60.0) - rng.random(n, dtype=np.float32) * 30.0
+        self.life[slots] = np.where(smoke, 1.6, 0.8) + rng.random(n, dtype=np.float32) * 0.4
+        self.age[slots] = 0.0
+        self.alive[slots] = True
+
+    def update(self, emitters, dt, frame_ms):
+        """Điều chỉnh ngân sách, phát hạt, tích phân chuyển động (toàn bộ bằng phép toán mảng)"""
+        self.adjust_budget(frame_ms)
+        alive = self.alive
+        self.age[alive] += dt
+        self.x[alive] += self.vx[alive] * dt
+        self.y[alive] += self.vy[alive] * dt
+        # Tàn lửa bay lên nhanh dần, khói trôi ngang
+        self.vy[alive & (self.kind == EMBER)] -= 40.0 * dt
+        alive &= self.age < self.life
+        # Vượt ngân sách (frame chậm): bỏ bớt các hạt già nhất
+        excess = int(alive.sum()) - int(self.budget)
+        if excess > 0:
+            living = np.flatnonzero(alive)
+            oldest = living[np.argsort(self.age[living] / self.life[living])[-excess:]]
+            alive[oldest] = False
+        self.emit(emitters, dt)
+
+    def draw(self, surface, camera_x, camera_y):
+        """Vẽ mọi hạt còn sống bằng một lần Surface.blits"""
+        idx = np.flatnonzero(self.alive)
+        if len(idx) == 0:
+            return
+        steps = FIRE_PARTICLE_FADE_STEPS
+        step = np.minimum((self.age[idx] / self.life[idx] * steps).astype(np.int32), steps - 1)
+        xs = (self.x[idx] - camera_x).astype(np.int32).tolist()
+        ys = (self.y[idx] - camera_y).astype(np.int32).tolist()
+        sprites = self.sprites
+        surface.blits([(sprites[k][s], (x, y)) for k, s, x, y
+                       in zip(self.kind[idx].tolist(), step.tolist(), xs, ys)], doreturn=False)
+
+
+class RainParticles:
+    def __init__(self, capacity=RAIN_PARTICLE_CAPACITY, seed=None):
+        """
+        Giọt mưa trong vòng đệm (ring buffer) struct-of-arrays, toạ độ viewport
+        Giọt mới ghi đè giọt cũ nhất; giọt rơi khỏi màn hình chỉ bị bỏ qua khi vẽ.
+
+        Args:
+            capacity: Số giọt tối đa cùng lúc
+            seed: Seed cho bộ sinh số ngẫu nhiên
+        """
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.x = np.zeros(capacity, dtype=np.float32)
+        self.y = np.full(capacity, np.inf, dtype=np.float32)  # inf = ô trống
+        self.speed = np.zeros(capacity, dtype=np.float32)
+        self.head = 0           # Vị trí ghi giọt kế tiếp
+        self.spawn_carry = 0.0
+
+    def clear(self):
+        self.y.fill(np.inf)
+        self.head = 0
+        self.spawn_carry = 0.0
+
+    def spawn(self, n):
+        """Ghi n giọt mới (trên mép trên màn hình) vào vòng đệm"""
+        n = min(n, self.capacity)
+        slots = (self.head + np.arange(n)) % self.capacity
+        self.head = (self.head + n) % self.capacity
+        rng = self.rng
+        self.x[slots] = rng.integers(0, VIEWPORT_WIDTH + 1, n)
+        self.y[slots] = rng.integers(-50, 1, n)
+        self.speed[slots] = rng.integers(400, 601, n)
+
+    def update(self, dt, rate):
+        """
+        Tích phân theo dt (s) và phát rate giọt/giây
+
+        Args:
+            dt: Thời gian từ frame trước (s)
+            rate: Số giọt mới mỗi giây
+        """
+        self.y += self.speed * dt
+        wanted = rate * dt + self.spawn_carry
+        n = int(wanted)
+        self.spawn_carry = wanted - n
+        if n:
+            self.spawn(n)
+
+    def visible(self):
+        """(x, y) nguyên của các giọt đang trên màn hình"""
+        idx = np.flatnonzero(self.y <= VIEWPORT_HEIGHT)
+        return list(zip(self.x[idx].astype(np.int32).tolist(), self.y[idx].astype(np.int32).tolist()))
@@ -0,0 +1,241 @@
+"""
+Pathfinding - Bộ tìm đường dùng chung cho PathHelper
+- bfs: một lần BFS từ vị trí player tới một hoặc nhiều đích
+- route: A* điểm-tới-điểm (heuristic Manhattan, open list là binary heap), có trọng số ô tuỳ chọn
+Mỗi ô chỉ lưu chỉ số ô cha trong mảng phẳng (không chép đường đi theo từng ô), đường đi được
+dựng lại khi cần. Bộ đệm được dùng lại giữa các lần gọi (đánh dấu lượt bằng epoch, không xoá mảng).
+"""
+import heapq
+from array import array
+from collections import deque
+from settings import *
+from world import get_map_size
+
+# Ô không đi qua được khi tìm đường (giống các BFS cũ trong helper)
+PATH_BLOCKED_TILES = (TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK)
+
+def make_cost_fn(fire_system=None, tile_costs=PATH_TILE_COSTS):
+    """
+    Hàm chi phí cho GridSearch.route: trọng số theo loại ô (vd. cát chậm hơn cỏ),
+    cộng phạt các ô gần lửa nếu có fire_system
+
+    Returns:
+        hàm (pos, tile) -> chi phí (>= 1)
+    """
+    def cost(pos, tile):
+        value = tile_costs.get(tile, 1)
+        if fire_system is not None:
+            d = fire_system.distance_to_fire(pos)
+            if d < PATH_FIRE_AVOID_DISTANCE:
+                value += (PATH_FIRE_AVOID_DISTANCE - d) * PATH_FIRE_COST
+        return value
+    return cost
+
+class GridSearch:
+    def __init__(self):
+        self.blocked = bytearray(256)
+        for tile in PATH_BLOCKED_TILES:
+            self.blocked[tile] = 1
+        self.width = 0
+        self.dense = True
+        self.size = 0
+        self.parent = None   # Chỉ số ô cha (array 'i' - bản đồ dày, dict - bản đồ chunk)
+        self.dist = None     # Số bước từ ô xuất phát
+        self.stamp = None    # array 'I': ô thuộc lượt tìm hiện tại khi stamp[idx] == epoch
+        self.g = None        # array 'd': chi phí tốt nhất từ start (A*) - hợp lệ khi stamp khớp epoch
+        self.closed = None   # bytearray: ô A* đã mở rộng - chỉ các ô đã đánh dấu được xoá sau mỗi lượt
+        self.epoch = 0
+        self.start = None    # Chỉ số phẳng ô xuất phát của lượt gần nhất
+        self.expanded = 0    # Số ô đã lấy ra khỏi hàng đợi ở lượt gần nhất
+
+    def _prepare(self, map_data):
+        """Bắt đầu lượt tìm mới: cấp phát bộ đệm khi đổi kích thước bản đồ, còn lại chỉ tăng epoch"""
+        width, height = get_map_size(map_data)
+        self.width = width
+        self.dense = hasattr(map_data, "data")
+        if not self.dense:
+            self.parent, self.dist, self.g, self.closed = {}, {}, {}, set()
+            return
+        if self.size != width * height or not isinstance(self.parent, array):
+            self.size = width * height
+            self.parent = array('i', [-1]) * self.size
+            self.dist = array('i', [0]) * self.size
+            self.stamp = array('I', [0]) * self.size
+            self.g = array('d', [0.0]) * self.size
+            self.closed = bytearray(self.size)
+            self.epoch = 0
+        self.epoch += 1
+        if self.epoch >= 0xFFFFFFFF:
+            self.stamp = array('I', [0]) * self.size
+            self.epoch = 1
+
+    def _seen(self, idx):
+        if self.dense:
+            return self.stamp[idx] == self.epoch
+        return idx in self.parent
+
+    def bfs(self, map_data, start, goals=None, is_goal=None, can_enter=None, first_only=True):
+        """
+        BFS từ start; đích là ô thuộc goals hoặc thoả is_goal (ô xuất phát không tính là đích)
+
+        Args:
+            goals: set (col, row) các đích cụ thể
+            is_goal: hàm (pos, dist) -> bool cho đích theo điều kiện
+            can_enter: hàm (pos, dist) -> bool - điều kiện thêm để đi vào ô cách start dist bước
+            first_only: True = dừng ở đích đầu tiên (gần nhất), False = tới khi gặp hết goals
+
+        Returns:
+            list (col, row) các đích gặp được, theo thứ tự khoảng cách tăng dần
+        """
+        self._prepare(map_data)
+        width, height = self.width, get_map_size(map_data)[1]
+        size = width * height
+        tile_at = map_data.data.__getitem__ if self.dense else map_data.peek_idx
+        blocked = self.blocked
+        parent, dist, stamp, epoch, dense = self.parent, self.dist, self.stamp, self.epoch, self.dense
+        remaining = set(goals) if goals else set()
+
+        start_idx = start[1] * width + start[0]
+        self.start = start_idx
+        parent[start_idx] = -1
+        dist[start_idx] = 0
+        if dense:
+            stamp[start_idx] = epoch
+        queue = deque([start_idx])
+        found = []
+        expanded = 0
+
+        while queue:
+            idx = queue.popleft()
+            expanded += 1
+            col, row = idx % width, idx // width
+            d = dist[idx]
+            if idx != start_idx:
+                pos = (col, row)
+                if pos in remaining or (is_goal is not None and is_goal(pos, d)):
+                    found.append(pos)
+                    remaining.discard(pos)
+                    if first_only or (is_goal is None and not remaining):
+                        break
+
+            # 4 hướng theo thứ tự: phải, xuống, trái, lên (bỏ hướng ra ngoài biên)
+            for nb in (idx + 1 if col < width - 1 else -1, idx + width if idx + width < size else -1,
+                       idx - 1 if col > 0 else -1, idx - width):
+                if nb < 0:
+                    continue
+                if dense:
+                    if stamp[nb] == epoch:
+                        continue
+                elif nb in parent:
+                    continue
+                if blocked[tile_at(nb)]:
+                    continue
+                if can_enter is not None and not can_enter((nb % width, nb // width), d + 1):
+                    continue
+                if dense:
+                    stamp[nb] = epoch
+                parent[nb] = idx
+                dist[nb] = d + 1
+                queue.append(nb)
+
+        self.expanded = expanded
+        return found
+
+    def route(self, map_data, start, goal, cost_fn=None, can_enter=None):
+        """
+        A* từ start tới goal - heuristic Manhattan, open list là binary heap
+
+        Args:
+            cost_fn: hàm (pos, tile) -> chi phí bước vào ô (>= 1 để heuristic không ước lượng quá);
+                     None = mọi bước tốn 1 (đường ngắn nhất như BFS)
+            can_enter: hàm (pos, dist) -> bool - điều kiện thêm để đi vào ô cách start dist bước
+
+        Returns:
+            list (col, row) đường đi (không gồm start), rỗng nếu không tới được
+            self.expanded = số ô đã mở rộng (so sánh với BFS)
+        """
+        self._prepare(map_data)
+        width, height = self.width, get_map_size(map_data)[1]
+        size = width * height
+        tile_at = map_data.data.__getitem__ if self.dense else map_data.peek_idx
+        blocked = self.blocked
+        parent, dist, g, closed = self.parent, self.dist, self.g, self.closed
+        stamp, epoch, dense = self.stamp, self.epoch, self.dense
+        goal_col, goal_row = goal
+
+        start_idx = start[1] * width + start[0]
+        goal_idx = goal_row * width + goal_col
+        self.start = start_idx
+        parent[start_idx] = -1
+        dist[start_idx] = 0
+        g[start_idx] = 0.0
+        if dense:
+            stamp[start_idx] = epoch
+        h = abs(start[0] - goal_col) + abs(start[1] - goal_row)
+        heap = [(h, h, start_idx)]  # (f, h, idx) - cùng f thì ưu tiên ô gần đích hơn
+        touched = []                 # Ô đã đóng - xoá cờ closed sau lượt tìm
+        expanded = 0
+        reached = False
+
+        while heap:
+            _, _, idx = heapq.heappop(heap)
+            if (closed[idx] if dense else idx in closed):
+                continue  # Mục cũ trong heap (đã có đường rẻ hơn)
+            if dense:
+                closed[idx] = 1
+                touched.append(idx)
+            else:
+                closed.add(idx)
+            expanded += 1
+            if idx == goal_idx:
+                reached = idx != start_idx
+                break
+            col = idx % width
+            base_g, d = g[idx], dist[idx]
+            for nb in (idx + 1 if col < width - 1 else -1, idx + width if idx + width < size else -1,
+                       idx - 1 if col > 0 else -1, idx - width):
+                if nb < 0 or (closed[nb] if dense else nb in closed):
+                    continue
+                tile = tile_at(nb)
+                if blocked[tile]:
+                    continue
+                pos = (nb % width, nb // width)
+                if can_enter is not None and not can_enter(pos, d + 1):
+                    continue
+                new_g = base_g + (cost_fn(pos, tile) if cost_fn is not None else 1)
+                if dense:
+                    if stamp[nb] == epoch and new_g >= g[nb]:
+                        continue
+                    stamp[nb] = epoch
+                elif nb in g and new_g >= g[nb]:
+                    continue
+                g[nb] = new_g
+                parent[nb] = idx
+                dist[nb] = d + 1
+                nh = abs(pos[0] - goal_col) + abs(pos[1] - goal_row)
+                heapq.heappush(heap, (new_g + nh, nh, nb))
+
+        self.expanded = expanded
+        path = self.path_to(goal) if reached else []
+        for idx in touched:
+            closed[idx] = 0
+        return path
+
+    def path_to(self, pos):
+        """
+        Đường đi từ ô xuất phát tới pos của lượt tìm gần nhất (không gồm ô xuất phát)
+
+        Returns:
+            list (col, row), rỗng nếu pos chưa được gán nhãn
+        """
+        width = self.width
+        idx = pos[1] * width + pos[0]
+        if not self._seen(idx):
+            return []
+        path = []
+        parent = self.parent
+        while idx != self.start:
+            path.append((idx % width, idx // width))
+            idx = parent[idx]
+        path.reverse()
+        return path
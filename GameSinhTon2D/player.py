@@ -1,4 +1,5 @@
 from settings import *
+from world import get_map_size
 
 class Player:
     def __init__(self, start_x, start_y):
@@ -27,7 +28,8 @@ class Player:
         target_y = self.grid_y + dy
         
         # Kiểm tra biên map
-        if 0 <= target_x < MAP_WIDTH and 0 <= target_y < MAP_HEIGHT:
+        map_width, map_height = get_map_size(map_data)
+        if 0 <= target_x < map_width and 0 <= target_y < map_height:
             tile = map_data[target_y][target_x]
             
             # Kiểm tra vòng lửa thứ 2 (KHÔNG CHO ĐI VÀO)
@@ -121,9 +123,9 @@ class Player:
         fire_count = 0
         for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
             nx, ny = self.grid_x + dx, self.grid_y + dy
-            if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                if fire_system.is_position_in_fire((nx, ny)):
-                    fire_count += 1
+            # Ô ngoài biên không bao giờ cháy nên không cần kiểm tra biên
+            if fire_system.is_position_in_fire((nx, ny)):
+                fire_count += 1
         
         # Nếu 3/4 hướng bị lửa = bị bao vây
         return fire_count >= 3
@@ -132,23 +134,14 @@ class Player:
         """Dịch chuyển nhân vật ra vị trí an toàn cách lửa 5 ô"""
         import random
         
-        valid_positions = []
+        if not fire_system.fire_tiles:
+            return False
         
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                pos = (col, row)
-                tile = map_data[row][col]
-                
-                # Chỉ teleport đến ô có thể đi được
-                if tile in [TILE_GRASS, TILE_SAND, TILE_FLOWER]:
-                    # Kiểm tra cách lửa ít nhất 5 ô
-                    min_dist = float('inf')
-                    for fire_pos in fire_system.fire_tiles:
-                        dist = abs(fire_pos[0] - col) + abs(fire_pos[1] - row)
-                        min_dist = min(min_dist, dist)
-                    
-                    if min_dist == 3:  # ĐÚNG 3 ô cách lửa
-                        valid_positions.append(pos)
+        # Các ô cách lửa ĐÚNG 3 ô lấy thẳng từ trường khoảng cách lửa
+        # -> chỉ giữ ô có thể đi được
+        walkable = (TILE_GRASS, TILE_SAND, TILE_FLOWER)
+        valid_positions = [pos for pos in fire_system.tiles_at_distance(3)
+                           if map_data.get_tile(pos[0], pos[1]) in walkable]
         
         if valid_positions:
             new_pos = random.choice(valid_positions)
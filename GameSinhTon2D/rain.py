@@ -3,6 +3,9 @@ Rain System - Hệ thống thời tiết mưa để dập lửa
 """
 import random
 from settings import *
+from world import get_map_size
+from particles import RainParticles, np
+from storm import RainCover, spawn_storm_cell
 
 class RainSystem:
     def __init__(self):
@@ -11,7 +14,20 @@ class RainSystem:
         self.rain_duration = 0
         self.next_rain_check = RAIN_CHECK_INTERVAL  # Lần kiểm tra mưa tiếp theo
         self.last_extinguish_time = 0
-        self.rain_particles = []  # Danh sách hạt mưa cho visual effect
+        # Hạt mưa cho visual effect: vòng đệm NumPy, không có NumPy thì list [x, y, speed]
+        self.particles = RainParticles() if np is not None else None
+        self.rain_particles = []
+        self.last_particle_time = 0
+        
+        # Mưa giông cục bộ: các ô bão trôi, mặt nạ vùng mưa dựng lại mỗi frame
+        self.storm_cells = []
+        self.next_storm_check = STORM_CHECK_INTERVAL
+        self.last_storm_time = 0
+        self.last_storm_extinguish = 0
+        
+        # Độ ẩm: vùng mưa toàn cục làm ướt (chọn lúc bắt đầu mưa), thời điểm cập nhật trước
+        self.rain_region = None
+        self.last_wetness_time = 0
         
     def update(self, game_time, fire_system, map_data, game_log):
         """
@@ -39,6 +55,50 @@ class RainSystem:
                 # Chỉ cập nhật hạt mưa, KHÔNG dập lửa
                 # Lửa chỉ ngừng lan, không bị tắt
                 self.update_rain_particles(game_time)
+        
+        self.update_storms(game_time, fire_system, map_data, game_log)
+        self.update_wetness(game_time, fire_system)
+    
+    def update_storms(self, game_time, fire_system, map_data, game_log):
+        """
+        Cập nhật các ô mưa giông: tạo mới, trôi, tan; lửa trong vùng mưa ngừng lan và bị dập dần
+        """
+        # Xét tạo ô bão mới (gần đám cháy)
+        if game_time >= self.next_storm_check:
+            self.next_storm_check = game_time + STORM_CHECK_INTERVAL
+            if len(self.storm_cells) < STORM_MAX_CELLS and random.random() < STORM_CHANCE:
+                cell = spawn_storm_cell(fire_system, game_time)
+                if cell is not None:
+                    self.storm_cells.append(cell)
+                    game_log.append("Một đám mây giông đang kéo tới!")
+                    if len(game_log) > 10:
+                        game_log.pop(0)
+        
+        # Trôi theo thời gian thực giữa hai frame, bỏ các ô bão đã tan
+        dt = min(max(game_time - self.last_storm_time, 0), 100) / 1000.0
+        self.last_storm_time = game_time
+        for cell in self.storm_cells:
+            cell.move(dt)
+        alive = [cell for cell in self.storm_cells if cell.end_time > game_time]
+        if len(alive) < len(self.storm_cells):
+            game_log.append("Mây giông đã tan")
+            if len(game_log) > 10:
+                game_log.pop(0)
+        self.storm_cells = alive
+        
+        if not alive:
+            fire_system.rain_cover = None
+            return
+        map_width, map_height = get_map_size(map_data)
+        cover = RainCover(alive, map_width, map_height)
+        fire_system.rain_cover = cover  # FireSystem.update bỏ qua lan lửa trong vùng mưa
+        
+        # Dập lửa trong vùng mưa mỗi giây (mặt nạ áp lên trạng thái lửa)
+        if game_time - self.last_storm_extinguish >= 1000:
+            self.last_storm_extinguish = game_time
+            for pos in fire_system.fires_under(cover):
+                if random.random() < STORM_EXTINGUISH_CHANCE:
+                    fire_system.extinguish_tile(pos, map_data)
     
     def start_rain(self, game_time, game_log, fire_system):
         """Bắt đầu trận mưa"""
@@ -46,18 +106,52 @@ class RainSystem:
         self.rain_start_time = game_time
         self.rain_duration = random.randint(RAIN_MIN_DURATION, RAIN_MAX_DURATION)
         self.last_extinguish_time = game_time
+        self.last_particle_time = game_time
+        
+        # Vùng được làm ướt: cả bản đồ nếu nhỏ, bản đồ lớn thì quanh đám cháy
+        self.rain_region = self.get_rain_region(fire_system)
         
-        # Tạm dừng lửa lan rộng
+        # Tạm dừng lửa lan rộng (tới khi tạnh)
         fire_system.spreading_paused = True
+        fire_system.resume_time = game_time + self.rain_duration
         
         game_log.append("Trời bắt đầu mưa!")
         if len(game_log) > 10:
             game_log.pop(0)
     
+    def get_rain_region(self, fire_system):
+        """(row0, row1, col0, col1) vùng mưa toàn cục làm ướt"""
+        width, height = fire_system.map_width, fire_system.map_height
+        if width * height <= WETNESS_FULL_MAP_TILES:
+            return (0, height, 0, width)
+        if not fire_system.fire_tiles:
+            return None
+        cols = [col for col, _ in fire_system.fire_tiles]
+        rows = [row for _, row in fire_system.fire_tiles]
+        margin = WETNESS_RAIN_MARGIN
+        return (min(rows) - margin, max(rows) + margin + 1, min(cols) - margin, max(cols) + margin + 1)
+    
+    def update_wetness(self, game_time, fire_system):
+        """Mưa làm ướt (toàn cục + vùng ô bão), rồi độ ẩm cả khung khô dần một lượt"""
+        wetness = fire_system.wetness
+        dt = min(max(game_time - self.last_wetness_time, 0), 100) / 1000.0
+        self.last_wetness_time = game_time
+        if wetness is None:
+            return
+        amount = WETNESS_RAIN_RATE * dt
+        if self.is_raining and self.rain_region is not None:
+            wetness.wet(*self.rain_region, amount)
+        cover = fire_system.rain_cover
+        if cover is not None:
+            wetness.wet(cover.row0, cover.row1, cover.col0, cover.col1, amount, cover.mask)
+        wetness.decay(dt)
+    
     def stop_rain(self, game_log, fire_system):
         """Dừng mưa"""
         self.is_raining = False
         self.rain_particles.clear()
+        if self.particles is not None:
+            self.particles.clear()
         
         # Tiếp tục lửa lan rộng
         fire_system.spreading_paused = False
@@ -73,19 +167,16 @@ class RainSystem:
             fire_tiles = list(fire_system.fire_tiles)
             
             if len(fire_tiles) > 0:
+                map_width, map_height = get_map_size(map_data)
+                
                 # Dập ngẫu nhiên một số ô lửa
                 extinguish_count = min(RAIN_EXTINGUISH_RATE, len(fire_tiles))
                 tiles_to_extinguish = random.sample(fire_tiles, extinguish_count)
                 
                 for (fx, fy) in tiles_to_extinguish:
-                    # Xóa lửa khỏi fire system
-                    if (fx, fy) in fire_system.fire_tiles:
-                        fire_system.fire_tiles.remove((fx, fy))
-                    
-                    # Đổi lại thành cỏ
-                    if 0 <= fy < MAP_HEIGHT and 0 <= fx < MAP_WIDTH:
-                        if map_data[fy][fx] == TILE_FIRE:
-                            map_data[fy][fx] = TILE_GRASS
+                    # Xóa lửa khỏi fire system và đổi lại thành cỏ
+                    if 0 <= fy < map_height and 0 <= fx < map_width:
+                        fire_system.extinguish_tile((fx, fy), map_data)
                 
                 # Log thông báo (không spam)
                 if game_time - self.last_extinguish_time >= 3000:
@@ -96,28 +187,31 @@ class RainSystem:
             self.last_extinguish_time = game_time
     
     def update_rain_particles(self, game_time):
-        """Cập nhật hạt mưa cho visual effect"""
-        # Tạo hạt mưa mới
-        if len(self.rain_particles) < 200:  # Giới hạn số hạt
+        """Cập nhật hạt mưa cho visual effect (tích phân theo thời gian thực giữa hai frame)"""
+        dt = min(max(game_time - self.last_particle_time, 0), 100) / 1000.0
+        self.last_particle_time = game_time
+        
+        if self.particles is not None:
+            self.particles.update(dt, RAIN_DROP_RATE)
+            return
+        
+        # Không có NumPy: list nhỏ [x, y, speed]
+        if len(self.rain_particles) < RAIN_FALLBACK_MAX_DROPS:  # Giới hạn số hạt
             for _ in range(10):
-                particle = {
-                    'x': random.randint(0, VIEWPORT_WIDTH),
-                    'y': random.randint(-50, 0),
-                    'speed': random.randint(400, 600)
-                }
-                self.rain_particles.append(particle)
-        
-        # Di chuyển hạt mưa xuống
-        for particle in self.rain_particles[:]:
-            particle['y'] += particle['speed'] * 0.016  # ~60 FPS
-            
-            # Xóa hạt mưa khi ra khỏi màn hình
-            if particle['y'] > VIEWPORT_HEIGHT:
-                self.rain_particles.remove(particle)
+                self.rain_particles.append([random.randint(0, VIEWPORT_WIDTH),
+                                            random.randint(-50, 0),
+                                            random.randint(400, 600)])
+        
+        # Di chuyển hạt mưa xuống, bỏ hạt ra khỏi màn hình (lọc một lượt)
+        for particle in self.rain_particles:
+            particle[1] += particle[2] * dt
+        self.rain_particles = [p for p in self.rain_particles if p[1] <= VIEWPORT_HEIGHT]
     
     def get_rain_particles(self):
-        """Trả về danh sách hạt mưa để vẽ"""
-        return self.rain_particles
+        """Trả về list (x, y) các hạt mưa trên màn hình để vẽ"""
+        if self.particles is not None:
+            return self.particles.visible()
+        return [(int(p[0]), int(p[1])) for p in self.rain_particles]
     
     def get_remaining_time(self, game_time):
         """Trả về thời gian mưa còn lại (giây)"""
@@ -0,0 +1,257 @@
+"""
+Reference Engines - Bản gốc (trước tối ưu) của hạt mưa, spawn_boat và các tìm đường của PathHelper
+Giữ lại để differential_harness so sánh với bản hiện tại. Không dùng trong game.
+"""
+import heapq
+import random
+import pygame
+from collections import deque
+from settings import *
+from world import get_map_size
+from pathfinding import make_cost_fn
+import rain
+import rescue
+import helper
+
+class RainSystem(rain.RainSystem):
+    """Hạt mưa dạng dict, bước cố định ~60 FPS, xoá bằng list.remove"""
+    def __init__(self):
+        super().__init__()
+        self.particles = None
+        # Hạt mưa bản gốc rút random toàn cục - dùng bộ sinh riêng để
+        # không làm lệch chuỗi ngẫu nhiên của bão/mưa so với bản tối ưu
+        self.particle_rng = random.Random(0)
+
+    def update_rain_particles(self, game_time):
+        """Cập nhật hạt mưa cho visual effect"""
+        rng = self.particle_rng
+        # Tạo hạt mưa mới
+        if len(self.rain_particles) < 200:  # Giới hạn số hạt
+            for _ in range(10):
+                particle = {
+                    'x': rng.randint(0, VIEWPORT_WIDTH),
+                    'y': rng.randint(-50, 0),
+                    'speed': rng.randint(400, 600)
+                }
+                self.rain_particles.append(particle)
+
+        # Di chuyển hạt mưa xuống
+        for particle in self.rain_particles[:]:
+            particle['y'] += particle['speed'] * 0.016  # ~60 FPS
+
+            # Xóa hạt mưa khi ra khỏi màn hình
+            if particle['y'] > VIEWPORT_HEIGHT:
+                self.rain_particles.remove(particle)
+
+    def get_rain_particles(self):
+        """Trả về danh sách hạt mưa để vẽ"""
+        return [(int(p['x']), int(p['y'])) for p in self.rain_particles]
+
+
+class RescueSystem(rescue.RescueSystem):
+    """spawn_boat gốc: quét toàn bộ ô cát + một DFS cho mỗi ô ứng viên"""
+    def spawn_boat(self, map_data, player_pos=None):
+        """Đặt thuyền ở vị trí ngẫu nhiên có thể đi đến được (dùng DFS)"""
+        map_width, map_height = get_map_size(map_data)
+
+        def has_water(col, row):
+            for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                nx, ny = col + dx, row + dy
+                if 0 <= nx < map_width and 0 <= ny < map_height:
+                    # Quần đảo: chỉ xét ô đã sinh (giống CoastIndex) để không sinh thêm chunk
+                    if hasattr(map_data, "is_loaded") and not map_data.is_loaded(nx, ny):
+                        continue
+                    if map_data.get_tile(nx, ny) == TILE_WATER:
+                        return True
+            return False
+
+        # Bước 1: Tìm tất cả các ô cát gần nước
+        if hasattr(map_data, "data"):
+            sand = [(col, row) for row in range(map_height) for col in range(map_width)
+                    if map_data.get_tile(col, row) == TILE_SAND]
+        else:
+            # Quần đảo: không quét được toàn bản đồ -> ô cát trên các chunk đã sinh (thứ tự hàng)
+            sand = [map_data.pos(idx) for idx in sorted(map_data.tile_index.lists[TILE_SAND])]
+        valid_sand_positions = [(col, row) for col, row in sand if has_water(col, row)]
+
+        # Bước 2: Dùng DFS kiểm tra vị trí nào có thể đi đến được từ player
+        def dfs_can_reach(start_col, start_row, target_col, target_row):
+            """Kiểm tra xem có đường đi từ start đến target không (DFS)"""
+            if start_col == target_col and start_row == target_row:
+                return True
+
+            visited = set()
+            stack = [(start_col, start_row)]  # DFS dùng stack
+            visited.add((start_col, start_row))
+
+            while stack:
+                col, row = stack.pop()  # Pop từ cuối (LIFO)
+
+                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+                    nx, ny = col + dx, row + dy
+
+                    if 0 <= nx < map_width and 0 <= ny < map_height:
+                        if (nx, ny) not in visited:
+                            tile = map_data.get_tile(nx, ny)
+                            if tile not in [TILE_WATER, TILE_TREE, TILE_ROCK]:
+                                visited.add((nx, ny))
+
+                                if nx == target_col and ny == target_row:
+                                    return True
+
+                                stack.append((nx, ny))
+
+            return False
+
+        # Bước 3: Lọc các vị trí có thể đi đến được
+        if player_pos is None:
+            player_pos = (map_width // 2, map_height // 2)
+        start_col, start_row = player_pos
+        if map_data.get_tile(start_col, start_row) in [TILE_WATER, TILE_TREE, TILE_ROCK]:
+            reachable_positions = []
+        else:
+            reachable_positions = [(col, row) for col, row in valid_sand_positions
+                                   if dfs_can_reach(start_col, start_row, col, row)]
+
+        # Bước 4: Chọn ngẫu nhiên một vị trí
+        if reachable_positions:
+            self.boat_position = random.choice(reachable_positions)
+        elif valid_sand_positions:
+            # Fallback: chọn bất kỳ vị trí cát nào
+            self.boat_position = random.choice(valid_sand_positions)
+        else:
+            return
+        col, row = self.boat_position
+        map_data[row][col] = TILE_BOAT
+
+
+class PathHelper(helper.PathHelper):
+    """BFS/Dijkstra gốc: hàng đợi chép nguyên đường đi, mỗi mảnh ghép một lần BFS"""
+    def find_all_pieces_bfs(self, player_pos, map_data, piece_positions, first_only=False):
+        """
+        Thuật toán BFS tìm đường đến TẤT CẢ các mảnh ghép
+        Trả về: dict{piece_pos: path} - đường đi từ player đến mỗi piece
+        (first_only: chỉ giữ mảnh ghép có đường ngắn nhất)
+        """
+        if not piece_positions:
+            return {}
+
+        start_col, start_row = player_pos
+        map_width, map_height = get_map_size(map_data)
+        all_paths = {}
+
+        # Tìm đường đến từng mảnh ghép
+        for target_piece in piece_positions:
+            queue = deque([(start_col, start_row, [])])
+            visited = set()
+            visited.add((start_col, start_row))
+            found_path = None
+
+            while queue:
+                col, row, path = queue.popleft()
+
+                if (col, row) == target_piece:
+                    found_path = path
+                    break
+
+                for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                    nx, ny = col + dx, row + dy
+
+                    if 0 <= nx < map_width and 0 <= ny < map_height:
+                        if (nx, ny) not in visited:
+                            tile = map_data.get_tile(nx, ny)
+                            if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
+                                visited.add((nx, ny))
+                                new_path = path + [(nx, ny)]
+                                queue.append((nx, ny, new_path))
+
+            if found_path:
+                all_paths[target_piece] = found_path
+
+        if first_only and all_paths:
+            nearest = min(all_paths, key=lambda piece: len(all_paths[piece]))
+            return {nearest: all_paths[nearest]}
+        return all_paths
+
+    def find_safe_path_bfs(self, player_pos, map_data, fire_system, game_time=0):
+        """
+        Thuật toán BFS tìm đường ngắn nhất đến vùng an toàn
+        Vùng an toàn = cách xa lửa ít nhất 3 ô
+        Bỏ qua ô sẽ cháy trước khi player đi tới (fire_system.eta)
+        """
+        start_col, start_row = player_pos
+        map_width, map_height = get_map_size(map_data)
+
+        queue = deque([(start_col, start_row, [])])
+        visited = set()
+        visited.add((start_col, start_row))
+
+        while queue:
+            col, row, path = queue.popleft()
+
+            is_safe = fire_system.distance_to_fire((col, row)) >= 4
+
+            if is_safe and path:
+                return path
+
+            for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                nx, ny = col + dx, row + dy
+
+                if 0 <= nx < map_width and 0 <= ny < map_height:
+                    if (nx, ny) not in visited:
+                        tile = map_data.get_tile(nx, ny)
+                        if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
+                            if fire_system.eta((nx, ny)) <= game_time + (len(path) + 1) * PLAYER_STEP_TIME:
+                                continue
+                            visited.add((nx, ny))
+                            new_path = path + [(nx, ny)]
+                            queue.append((nx, ny, new_path))
+
+        return []
+
+    def find_path_to_boat(self, map_data, player_pos, rescue_system, player, game_log, fire_system=None):
+        """
+        Phím 3 - Tìm đường đến thuyền: Dijkstra gốc (không heuristic, hàng đợi chép nguyên đường đi)
+        với cùng hàm chi phí make_cost_fn như A* hiện tại
+        Có fire_system thì tránh các ô sẽ cháy trước khi player đi tới
+        """
+        if not rescue_system.boat_arrived or not rescue_system.boat_position:
+            return
+
+        start_col, start_row = player_pos
+        target = rescue_system.boat_position
+        map_width, map_height = get_map_size(map_data)
+        cost_fn = make_cost_fn(fire_system)
+
+        heap = [(0, (start_col, start_row), [])]
+        best = {(start_col, start_row): 0}
+
+        boat_path = []
+        game_time = pygame.time.get_ticks()
+
+        while heap:
+            cost, (col, row), path = heapq.heappop(heap)
+
+            if (col, row) == target:
+                boat_path = path
+                break
+            if cost > best[(col, row)]:
+                continue
+
+            for dx, dy in [(1, 0), (0, 1), (-1, 0), (0, -1)]:
+                nx, ny = col + dx, row + dy
+
+                if 0 <= nx < map_width and 0 <= ny < map_height:
+                    tile = map_data.get_tile(nx, ny)
+                    if tile not in [TILE_WATER, TILE_TREE, TILE_FIRE, TILE_ROCK]:
+                        if fire_system and fire_system.eta((nx, ny)) <= game_time + (len(path) + 1) * PLAYER_STEP_TIME:
+                            continue
+                        new_cost = cost + cost_fn((nx, ny), tile)
+                        if new_cost < best.get((nx, ny), float('inf')):
+                            best[(nx, ny)] = new_cost
+                            heapq.heappush(heap, (new_cost, (nx, ny), path + [(nx, ny)]))
+
+        if boat_path:
+            self.escape_path = boat_path
+            self.escape_path_visible = True
+            self.escape_path_time = pygame.time.get_ticks()
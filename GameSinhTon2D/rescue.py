@@ -1,10 +1,11 @@
 import random
 from settings import *
+from world import get_map_size
 
 class RescueSystem:
     def __init__(self, pieces_required=TOTAL_PIECES, boat_time=BOAT_ARRIVAL_TIME):
         self.pieces_collected = 0
-        self.piece_positions = []  # List of (col, row)
+        self.items = None  # ItemRegistry của bản đồ - mảnh ghép là các ô TILE_PIECE trong sổ
         
         # Level-specific parameters
         self.pieces_required = pieces_required
@@ -30,27 +31,63 @@ class RescueSystem:
         # Win state
         self.escaped = False
     
-    def place_pieces(self, map_data):
-        """Đặt N mảnh ghép ngẫu nhiên trên bản đồ (N = pieces_required)"""
-        valid_tiles = []
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                # Chỉ đặt trên cỏ hoặc hoa
-                if map_data[row][col] in [TILE_GRASS, TILE_FLOWER]:
-                    valid_tiles.append((col, row))
+    @property
+    def piece_positions(self):
+        """Danh sách (col, row) các mảnh ghép còn trên bản đồ (sắp xếp - không dùng mỗi frame)"""
+        return self.items.positions(TILE_PIECE) if self.items is not None else []
+    
+    def place_pieces(self, map_data, rng=random, start_pos=None):
+        """
+        Đặt N mảnh ghép ngẫu nhiên trên bản đồ (N = pieces_required)
+        
+        Args:
+            start_pos: Vị trí xuất phát - nếu có, ưu tiên ô đi tới được từ đây
         
-        # Chọn N vị trí ngẫu nhiên
-        if len(valid_tiles) >= self.pieces_required:
-            self.piece_positions = random.sample(valid_tiles, self.pieces_required)
-            for col, row in self.piece_positions:
-                map_data[row][col] = TILE_PIECE
+        Raises:
+            ValueError: Bản đồ không đủ ô cỏ/hoa cho N mảnh ghép (build_level sinh đảo khác)
+        """
+        piece_types = [TILE_GRASS, TILE_FLOWER]
+        index = map_data.tile_index
+        available = sum(index.count(tile_type) for tile_type in piece_types)
+        if available < self.pieces_required:
+            raise ValueError(f"Chỉ có {available} ô cỏ/hoa cho {self.pieces_required} mảnh ghép")
+        if start_pos is None:
+            # Chọn N vị trí ngẫu nhiên trên cỏ hoặc hoa (lấy mẫu từ chỉ mục tile)
+            positions = index.sample_many(piece_types, self.pieces_required, rng)
+        else:
+            # Lấy mẫu loại trừ: kiểm tra cùng vùng liên thông là O(1)
+            connectivity = map_data.connectivity
+            chosen = []
+            for _ in range(self.pieces_required * SAFE_POSITION_SAMPLES):
+                if len(chosen) == self.pieces_required:
+                    break
+                pos = index.sample(piece_types, rng)
+                if pos is None:
+                    break
+                if pos not in chosen and connectivity.same_component(pos, start_pos):
+                    chosen.append(pos)
+            else:
+                # Vùng xuất phát quá nhỏ so với đảo: lọc toàn bộ chỉ mục
+                reachable = [pos for tile_type in piece_types for pos in index.positions(tile_type)
+                             if connectivity.same_component(pos, start_pos)]
+                chosen = rng.sample(reachable, min(len(reachable), self.pieces_required))
+            if len(chosen) < self.pieces_required:
+                # Vùng xuất phát không đủ ô: bù bằng ô cỏ/hoa bất kỳ (có thể tới được khi lửa đốt cây chặn)
+                taken = set(chosen)
+                others = [pos for tile_type in piece_types for pos in index.positions(tile_type)
+                          if pos not in taken]
+                chosen += rng.sample(others, self.pieces_required - len(chosen))
+            positions = chosen
+        self.items = map_data.items
+        for col, row in positions:
+            map_data.set_tile(col, row, TILE_PIECE)
     
     def check_piece_pickup(self, player, map_data, game_log):
         """Kiểm tra xem player có nhặt được mảnh ghép không"""
         player_pos = (player.grid_x, player.grid_y)
         
-        if player_pos in self.piece_positions:
-            self.piece_positions.remove(player_pos)
+        # Tra sổ vật phẩm O(1) - ghi lại ô cỏ sẽ tự xoá mảnh ghép khỏi sổ
+        if map_data.items.contains(player_pos, TILE_PIECE):
             self.pieces_collected += 1
             map_data[player.grid_y][player.grid_x] = TILE_GRASS
             game_log.append(f"Nhặt được mảnh ghép! ({self.pieces_collected}/{self.pieces_required})")
@@ -71,8 +108,13 @@ class RescueSystem:
             if len(game_log) > 10:
                 game_log.pop(0)
     
-    def update(self, game_time, map_data, game_log, fire_system=None):
-        """Cập nhật trạng thái cứu hộ"""
+    def update(self, game_time, map_data, game_log, fire_system=None, player_pos=None):
+        """
+        Cập nhật trạng thái cứu hộ
+        
+        Args:
+            player_pos: Vị trí player - thuyền cập bến ở chỗ player đi tới được
+        """
         # Kiểm tra và đẩy vật phẩm ra ngoài nếu bị lửa bao quanh
         if fire_system:
             self.check_and_push_items(map_data, fire_system, game_log)
@@ -92,81 +134,60 @@ class RescueSystem:
             if game_time - self.boat_arrival_start >= self.boat_arrival_time:
                 self.boat_arrived = True
                 # Đặt thuyền ở bờ biển (tìm ô cát gần nước)
-                self.spawn_boat(map_data)
+                self.spawn_boat(map_data, player_pos, game_log)
                 game_log.append("Thuyền đã đến! Hãy chạy đến thuyền!")
                 if len(game_log) > 10:
                     game_log.pop(0)
     
-    def spawn_boat(self, map_data):
-        """Đặt thuyền ở vị trí ngẫu nhiên có thể đi đến được (dùng BFS)"""
-        from collections import deque
-        
-        # Bước 1: Tìm tất cả các ô cát gần nước (nước không phải đá)
-        valid_sand_positions = []
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                if map_data[row][col] == TILE_SAND:
-                    # Kiểm tra có nước lân cận không (không phải đá ngầm)
-                    has_water = False
-                    for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                        nx, ny = col + dx, row + dy
-                        if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                            if map_data[ny][nx] == TILE_WATER:
-                                has_water = True
-                                break
-                    if has_water:
-                        valid_sand_positions.append((col, row))
-        
-        # Bước 2: Dùng DFS kiểm tra vị trí nào có thể đi đến được từ trung tâm đảo
-        def dfs_can_reach(start_col, start_row, target_col, target_row, map_data):
-            """Kiểm tra xem có đường đi từ start đến target không (DFS)"""
-            if start_col == target_col and start_row == target_row:
-                return True
-            
-            visited = set()
-            stack = [(start_col, start_row)]  # DFS dùng stack
-            visited.add((start_col, start_row))
-            
-            while stack:
-                col, row = stack.pop()  # Pop từ cuối (LIFO)
-                
-                for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-                    nx, ny = col + dx, row + dy
-                    
-                    if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                        if (nx, ny) not in visited:
-                            tile = map_data[ny][nx]
-                            # Có thể đi qua: cỏ, cát, hoa, mảnh ghép, lửa, health
-                            if tile not in [TILE_WATER, TILE_TREE, TILE_ROCK]:
-                                visited.add((nx, ny))
-                                
-                                if nx == target_col and ny == target_row:
-                                    return True
-                                
-                                stack.append((nx, ny))
-            
-            return False
+    def spawn_boat(self, map_data, player_pos=None, game_log=None):
+        """
+        Đặt thuyền ở vị trí ngẫu nhiên trên bờ biển mà player đi tới được
         
-        # Bước 3: Lọc các vị trí có thể đi đến được
-        center_x, center_y = MAP_WIDTH // 2, MAP_HEIGHT // 2
-        reachable_positions = []
+        Args:
+            player_pos: Vị trí player (None = trung tâm bản đồ)
+            game_log: Nhật ký game - báo khi không bờ nào đi tới được
+        """
+        # Bước 1: Các ô cát sát nước (nước không phải đá) - dựng sẵn khi tạo bản đồ
+        valid_sand_positions = map_data.coast.positions()
         
-        for col, row in valid_sand_positions:
-            if dfs_can_reach(center_x, center_y, col, row, map_data):
-                reachable_positions.append((col, row))
+        # Bước 2: Một lần flood fill vùng của player, giao với tập bờ biển - tra nhãn O(1)/ô
+        if player_pos is None:
+            map_width, map_height = get_map_size(map_data)
+            player_pos = (map_width // 2, map_height // 2)
+        connectivity = map_data.connectivity
+        comp = self._player_component(connectivity, player_pos)
+        reachable_positions = [pos for pos in valid_sand_positions
+                               if connectivity.in_component(pos, comp)] if comp is not None else []
         
-        # Bước 4: Chọn ngẫu nhiên một vị trí
+        # Bước 3: Chọn ngẫu nhiên một vị trí
         if reachable_positions:
             self.boat_position = random.choice(reachable_positions)
-            col, row = self.boat_position
-            map_data[row][col] = TILE_BOAT
-            print(f"Thuyền đậu tại ({col}, {row})")
+        elif valid_sand_positions:
+            # Fallback: không bờ nào đi tới được - vẫn đặt thuyền nhưng báo cho người chơi
+            self.boat_position = random.choice(valid_sand_positions)
+            if game_log is not None:
+                game_log.append("Không có bờ biển nào đi tới được - thuyền đậu ở bờ xa!")
+                if len(game_log) > 10:
+                    game_log.pop(0)
         else:
-            # Fallback: chọn bất kỳ vị trí cát nào
-            if valid_sand_positions:
-                self.boat_position = random.choice(valid_sand_positions)
-                col, row = self.boat_position
-                map_data[row][col] = TILE_BOAT
+            return
+        col, row = self.boat_position
+        map_data[row][col] = TILE_BOAT
+        print(f"Thuyền đậu tại ({col}, {row})")
+    
+    def _player_component(self, connectivity, player_pos):
+        """
+        Vùng liên thông của player - ô đang đứng bị chặn (vd. cây mọc lại) thì lấy vùng của ô kề đi được
+        
+        Returns:
+            int hoặc None nếu cả ô đứng lẫn 4 ô kề đều bị chặn
+        """
+        col, row = player_pos
+        for pos in [(col, row), (col + 1, row), (col, row + 1), (col - 1, row), (col, row - 1)]:
+            comp = connectivity.component_of(pos)
+            if comp is not None:
+                return comp
+        return None
     
     def check_near_boat(self, player, game_time):
         """Kiểm tra player có gần thuyền không"""
@@ -218,8 +239,8 @@ class RescueSystem:
         """Kiểm tra và đẩy vật phẩm ra ngoài khi bị lửa bao quanh"""
         items_to_push = []
         
-        # Kiểm tra từng mảnh ghép
-        for pos in list(self.piece_positions):
+        # Kiểm tra từng mảnh ghép (duyệt thẳng nhóm trong sổ - chỉ ghi tile sau vòng lặp)
+        for pos in map_data.items.bucket(TILE_PIECE):
             col, row = pos
             if self.is_surrounded_by_fire(col, row, fire_system):
                 items_to_push.append(pos)
@@ -230,13 +251,9 @@ class RescueSystem:
             # Tìm vị trí mới ngẫu nhiên
             new_pos = self.find_random_safe_position(map_data, fire_system)
             if new_pos:
-                # Xóa vật phẩm ở vị trí cũ
-                self.piece_positions.remove(pos)
+                # Dời vật phẩm sang vị trí mới (sổ vật phẩm cập nhật theo tile)
                 map_data[row][col] = TILE_GRASS
-                
-                # Đặt vật phẩm ở vị trí mới
                 new_col, new_row = new_pos
-                self.piece_positions.append(new_pos)
                 map_data[new_row][new_col] = TILE_PIECE
                 
                 game_log.append(f"Mảnh ghép bị đẩy ra vị trí mới!")
@@ -249,35 +266,39 @@ class RescueSystem:
         fire_count = 0
         for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
             nx, ny = col + dx, row + dy
-            if 0 <= nx < MAP_WIDTH and 0 <= ny < MAP_HEIGHT:
-                if fire_system.is_position_in_fire((nx, ny)):
-                    fire_count += 1
+            # Ô ngoài biên không bao giờ cháy nên không cần kiểm tra biên
+            if fire_system.is_position_in_fire((nx, ny)):
+                fire_count += 1
         
         # Nếu 3/4 hướng bị lửa = bị bao quanh
         return fire_count >= 3
     
     def find_random_safe_position(self, map_data, fire_system):
         """Tìm vị trí ngẫu nhiên an toàn (không có lửa, có thể đi được)"""
-        valid_positions = []
+        # Chỉ đặt trên cỏ hoặc hoa, không có lửa xung quanh
+        safe_types = [TILE_GRASS, TILE_FLOWER]
+        index = map_data.tile_index
         
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                pos = (col, row)
-                tile = map_data[row][col]
-                
-                # Chỉ đặt trên cỏ hoặc hoa, không có lửa xung quanh
-                if tile in [TILE_GRASS, TILE_FLOWER]:
-                    if not fire_system.is_position_in_fire(pos):
-                        # Kiểm tra không có lửa gần (ít nhất 3 ô)
-                        min_dist = float('inf')
-                        for fire_pos in fire_system.fire_tiles:
-                            dist = abs(fire_pos[0] - col) + abs(fire_pos[1] - row)
-                            min_dist = min(min_dist, dist)
-                        
-                        if min_dist >= 3:  # Ít nhất 3 ô cách lửa
-                            valid_positions.append(pos)
+        # Lấy mẫu loại trừ: chọn đều trên cỏ/hoa rồi giữ ô an toàn
+        # -> vẫn là phân phối đều trên các ô hợp lệ, không cần quét bản đồ
+        for _ in range(SAFE_POSITION_SAMPLES):
+            pos = index.sample(safe_types)
+            if pos is None:
+                return None
+            if self.is_safe_position(pos, fire_system):
+                return pos
+        
+        # Hiếm: lửa phủ gần hết đảo -> duyệt toàn bộ ô cỏ/hoa trong chỉ mục
+        valid_positions = [pos for tile_type in safe_types for pos in index.positions(tile_type)
+                           if self.is_safe_position(pos, fire_system)]
         
         # Chọn ngẫu nhiên
         if valid_positions:
             return random.choice(valid_positions)
         return None
+    
+    def is_safe_position(self, pos, fire_system):
+        """Ô không cháy và cách lửa ít nhất 3 ô"""
+        if fire_system.is_position_in_fire(pos):
+            return False
+        return fire_system.distance_to_fire(pos) >= 3  # Ít nhất 3 ô cách lửa
@@ -75,6 +75,28 @@ WARNING_BLINK_SPEED = 300
 FIRE_WARNING_TIME = 3000
 HEAT_WARNING_DISTANCE = 3
 HEAT_DANGER_DISTANCE = 6
+FIRE_ETA_HORIZON = 30000       # Bản đồ thời điểm lửa tới chỉ tính trong N ms tới
+FIRE_ETA_DANGER_TIME = 4000    # Lửa tới ô đang đứng trong N ms -> cảnh báo đỏ
+FIRE_ETA_WARNING_TIME = 10000  # Lửa tới ô đang đứng trong N ms -> cảnh báo vàng
+FIRE_FIELD_MAX_DISTANCE = 16  # Trường khoảng cách lửa chỉ lưu tới N ô (xa hơn = an toàn)
+FIRE_SPREAD_CHANCE = 0.6   # Cơ hội lan sang mỗi ô kề trong một lượt lan
+FIRE_ENGINE = "sets"       # "sets" (set/dict) hoặc "numpy" (mảng dày) - chọn lại theo level
+
+# Fire Particles (tàn lửa / khói)
+FIRE_PARTICLE_CAPACITY = 2048        # Kích thước pool hạt (cấp phát một lần)
+FIRE_PARTICLE_MIN_BUDGET = 128       # Ngân sách hạt không giảm dưới mức này
+FIRE_PARTICLE_TARGET_FRAME_MS = 1000 / FPS * 1.2  # Frame chậm hơn mức này -> giảm ngân sách hạt
+FIRE_PARTICLE_RATE = 4               # Số hạt mỗi ô cháy phát ra mỗi giây
+FIRE_PARTICLE_SMOKE_RATIO = 0.35     # Tỉ lệ hạt khói (còn lại là tàn lửa)
+FIRE_PARTICLE_FADE_STEPS = 6         # Số bước mờ dần của sprite hạt
+
+# Pathfinding (A* route)
+PATH_TILE_COSTS = {TILE_SAND: 2}  # Chi phí bước vào ô theo loại (mặc định 1) - phải >= 1
+PATH_FIRE_AVOID_DISTANCE = 3      # Ô cách lửa ít hơn mức này bị phạt thêm
+PATH_FIRE_COST = 4                # Chi phí phạt mỗi ô gần lửa hơn
+
+# Item Registry
+ITEM_GRID_CELL = 16             # Cạnh ô lưới thô của sổ vật phẩm (ô bản đồ)
 
 # Rescue System
 TOTAL_PIECES = 4
@@ -92,6 +114,7 @@ STAMINA_REGEN = 1
 HEALTH_RESTORE = 25
 
 # Pathfinding
+PLAYER_STEP_TIME = 250  # Ước lượng thời gian đi 1 ô (ms) - so với thời điểm lửa tới khi tìm đường
 MAX_BFS_DEPTH = 50
 MAX_DFS_DEPTH = 30
 PATH_DISPLAY_DURATION = 5000
@@ -100,6 +123,12 @@ PATH_DISPLAY_DURATION = 5000
 HELPER_STAMINA_COST = 30
 HELPER_ESCAPE_HP_THRESHOLD = 50
 HELPER_DISPLAY_TIME = 5000
+SAFE_POSITION_SAMPLES = 32  # Số lần lấy mẫu trước khi duyệt toàn bộ chỉ mục
+START_MIN_COMPONENT_SIZE = 100  # Điểm xuất phát phải thuộc vùng đi được có ít nhất N ô
+TILE_JOURNAL_MAX_ENTRIES = 4096  # Nhật ký thay đổi tile giữ tối đa N mục chưa được đọc
+FIRE_FORECAST_SAMPLES = 32       # Số lần mô phỏng Monte Carlo khi dự báo lửa lan
+FIRE_FORECAST_TICKS = 3          # Số lượt lan lửa được dự báo
+FIRE_FORECAST_DANGER_PROB = 0.25 # Ô có xác suất bắt lửa từ mức này trở lên được cảnh báo
 
 # Rescue System Additional
 FLARE_DELAY = 2000
@@ -119,6 +148,9 @@ TREE_DENSITY = 0.15
 ROCK_DENSITY = 0.08
 FLOWER_DENSITY = 0.05
 HEALTH_SPAWN_COUNT = 10
+STAMINA_SPAWN_COUNT = 8
+ROCK_SPAWN_COUNT = 50
+ROCK_SPAWN_CHANCE = 0.05
 
 # Day Night Cycle
 DAY_DURATION = 240000
@@ -130,6 +162,30 @@ RAIN_CHANCE = 1.0
 RAIN_MIN_DURATION = 5000
 RAIN_MAX_DURATION = 5000
 RAIN_EXTINGUISH_RATE = 2
+RAIN_DROP_RATE = 4000           # Số giọt mưa mới mỗi giây (~5000 giọt trên màn hình)
+RAIN_PARTICLE_CAPACITY = 6000   # Kích thước vòng đệm giọt mưa
+RAIN_FALLBACK_MAX_DROPS = 200   # Số giọt tối đa khi không có NumPy
+
+# Storm Cells (mưa giông cục bộ trôi trên bản đồ)
+STORM_CHECK_INTERVAL = 20000    # Chu kỳ xét tạo ô bão mới (ms)
+STORM_CHANCE = 0.5              # Xác suất tạo ô bão mỗi lần xét
+STORM_MAX_CELLS = 3             # Số ô bão tối đa cùng lúc
+STORM_MIN_RADIUS = 4            # Bán kính vùng mưa (ô)
+STORM_MAX_RADIUS = 8
+STORM_MIN_SPEED = 0.5           # Tốc độ trôi (ô/giây)
+STORM_MAX_SPEED = 1.5
+STORM_MIN_DURATION = 15000      # Thời gian tồn tại (ms)
+STORM_MAX_DURATION = 25000
+STORM_EXTINGUISH_CHANCE = 0.3   # Xác suất mỗi ô lửa trong vùng mưa bị dập mỗi giây
+
+# Wetness (độ ẩm sau mưa)
+WETNESS_RAIN_RATE = 0.5         # Độ ẩm tăng mỗi giây dưới mưa (0..1)
+WETNESS_DECAY_TIME = 20000      # Hằng số thời gian khô dần (ms) - sau 20s còn ~37%
+WETNESS_SPREAD_FACTOR = 0.9     # Ô ẩm hoàn toàn: xác suất lan lửa giảm 90%
+WETNESS_MIN = 0.02              # Dưới mức này coi như đã khô
+WETNESS_FULL_MAP_TILES = 250000 # Bản đồ nhỏ hơn: mưa toàn cục làm ướt cả bản đồ, lớn hơn: quanh đám cháy
+WETNESS_RAIN_MARGIN = 20        # Nới khung đám cháy (ô) khi làm ướt bản đồ lớn
+WETNESS_TINT_LEVELS = 4         # Số mức tô màu ô ẩm (mỗi mức một overlay dựng sẵn)
 
 # Turtle Enemy
 TURTLE_ATTACK_RANGE = 3
@@ -138,3 +194,29 @@ TURTLE_ATTACK_COOLDOWN = 2000
 TURTLE_MOVE_SPEED = 500
 TURTLE_HP = 20
 TURTLE_COUNT_LEVEL2 = 10
+
+# Seed & Map Cache
+LEVEL_SEED = None              # None = đảo mới mỗi lần; số cố định (vd. ngày YYYYMMDD) = thử thách chung
+LEVEL_MAX_REROLLS = 5          # Số lần sinh đảo khác khi đảo không đủ chỗ đặt mảnh ghép
+MAP_GENERATOR_VERSION = 2      # Tăng khi đổi thuật toán sinh bản đồ (cache cũ tự bị bỏ qua)
+MAP_PLACEMENT_VERSION = 1      # Tăng khi đổi cách đặt mảnh ghép (place_pieces, điểm xuất phát) - cache cũ tự bị bỏ qua
+MAP_CACHE_ENABLED = True
+MAP_CACHE_DIR = "map_cache"    # Thư mục cache bản đồ (đường dẫn tương đối tính từ thư mục mã nguồn game)
+MAP_CACHE_MAX_FILES = 64       # Giữ tối đa N file, xoá file cũ nhất
+
+# Dựng trước level (level_prefetch.py)
+PREFETCH_DEBUG = False         # In thống kê hit/chờ/miss mỗi lần lấy level dựng sẵn
+
+# Sinh bản đồ rất lớn theo tile (nhiều tiến trình)
+MAP_GEN_TILE_SIZE = 512                 # Cạnh mỗi tile (ô)
+MAP_GEN_TILED_MIN_TILES = 1024 * 1024   # Bản đồ từ chừng này ô trở lên thì sinh theo tile
+
+# Chunked World (Archipelago)
+WORLD_MODE = "island"           # "island" = đảo đơn 100x80, "archipelago" = quần đảo chia chunk
+ARCHIPELAGO_WIDTH = 4096
+ARCHIPELAGO_HEIGHT = 4096
+ARCHIPELAGO_CELL_SIZE = 96      # Mỗi ô lưới có tối đa 1 đảo
+ARCHIPELAGO_EMPTY_CHANCE = 0.3  # Xác suất ô lưới không có đảo
+CHUNK_SIZE = 32
+CHUNK_LOAD_RADIUS = 2           # Số chunk quanh camera/agent được sinh trước
+CHUNK_EVICT_RADIUS = 4          # Chunk chưa bị sửa xa hơn khoảng này sẽ bị giải phóng
@@ -0,0 +1,133 @@
+"""
+Storm - Các ô mưa giông cục bộ trôi trên bản đồ
+Mỗi ô bão có vùng mưa hình elip; lửa trong vùng mưa ngừng lan và bị dập dần.
+Vùng mưa của mọi ô bão được gộp thành một mặt nạ bool trong khung bao chung,
+nên nhiều ô bão cùng lúc tốn gần như một trận mưa.
+"""
+import math
+import random
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - không có thì tra từng ô bằng phương trình elip
+    np = None
+
+class StormCell:
+    def __init__(self, col, row, radius_x, radius_y, vx, vy, end_time):
+        """
+        Args:
+            col, row: Tâm ô bão (toạ độ ô, số thực)
+            radius_x, radius_y: Bán trục elip (ô)
+            vx, vy: Vận tốc trôi (ô/giây)
+            end_time: Thời điểm ô bão tan (ms, game_time)
+        """
+        self.col = col
+        self.row = row
+        self.radius_x = radius_x
+        self.radius_y = radius_y
+        self.vx = vx
+        self.vy = vy
+        self.end_time = end_time
+
+    def move(self, dt):
+        self.col += self.vx * dt
+        self.row += self.vy * dt
+
+    def contains(self, col, row):
+        dx = (col - self.col) / self.radius_x
+        dy = (row - self.row) / self.radius_y
+        return dx * dx + dy * dy <= 1.0
+
+    def bounds(self):
+        """(col0, row0, col1, row1) - khung bao nguyên, col1/row1 không tính"""
+        return (math.floor(self.col - self.radius_x), math.floor(self.row - self.radius_y),
+                math.ceil(self.col + self.radius_x) + 1, math.ceil(self.row + self.radius_y) + 1)
+
+
+class RainCover:
+    def __init__(self, cells, map_width, map_height):
+        """
+        Vùng đang có mưa = hợp vùng mưa của các ô bão, dựng lại mỗi frame
+
+        Args:
+            cells: list StormCell đang hoạt động (không rỗng)
+            map_width, map_height: Kích thước bản đồ - mặt nạ bị cắt theo biên
+        """
+        self.cells = cells
+        boxes = [cell.bounds() for cell in cells]
+        self.col0 = max(0, min(box[0] for box in boxes))
+        self.row0 = max(0, min(box[1] for box in boxes))
+        self.col1 = max(self.col0, min(map_width, max(box[2] for box in boxes)))
+        self.row1 = max(self.row0, min(map_height, max(box[3] for box in boxes)))
+        self.mask = None  # bool (row1-row0, col1-col0)
+        if np is not None:
+            self.mask = np.zeros((self.row1 - self.row0, self.col1 - self.col0), dtype=bool)
+            rows = np.arange(self.row0, self.row1, dtype=np.float32)[:, None]
+            cols = np.arange(self.col0, self.col1, dtype=np.float32)[None, :]
+            for cell, (c0, r0, c1, r1) in zip(cells, boxes):
+                # Chỉ tính trong khung bao của từng ô bão
+                rs = slice(max(r0, self.row0) - self.row0, max(min(r1, self.row1) - self.row0, 0))
+                cs = slice(max(c0, self.col0) - self.col0, max(min(c1, self.col1) - self.col0, 0))
+                dy = (rows[rs] - cell.row) / cell.radius_y
+                dx = (cols[:, cs] - cell.col) / cell.radius_x
+                self.mask[rs, cs] |= dx * dx + dy * dy <= 1.0
+
+    def covers(self, col, row):
+        """Ô (col, row) có đang mưa không"""
+        if not (self.col0 <= col < self.col1 and self.row0 <= row < self.row1):
+            return False
+        if self.mask is not None:
+            return bool(self.mask[row - self.row0, col - self.col0])
+        return any(cell.contains(col, row) for cell in self.cells)
+
+    def window(self, rows, cols):
+        """
+        Mặt nạ mưa của vùng (slice hàng, slice cột) của bản đồ - cùng kích thước vùng đó
+
+        Args:
+            rows, cols: slice có start/stop xác định (như FireSystemNP._window)
+        """
+        out = np.zeros((rows.stop - rows.start, cols.stop - cols.start), dtype=bool)
+        r0, r1 = max(rows.start, self.row0), min(rows.stop, self.row1)
+        c0, c1 = max(cols.start, self.col0), min(cols.stop, self.col1)
+        if r0 < r1 and c0 < c1:
+            out[r0 - rows.start:r1 - rows.start, c0 - cols.start:c1 - cols.start] = \
+                self.mask[r0 - self.row0:r1 - self.row0, c0 - self.col0:c1 - self.col0]
+        return out
+
+    def select(self, positions):
+        """Các (col, row) trong positions đang bị mưa - tra mặt nạ một lượt cho cả danh sách"""
+        positions = list(positions)
+        if not positions:
+            return []
+        if self.mask is None:
+            return [pos for pos in positions if self.covers(*pos)]
+        pos = np.asarray(positions, dtype=np.int64)
+        cols = pos[:, 0] - self.col0
+        rows = pos[:, 1] - self.row0
+        inside = (cols >= 0) & (cols < self.mask.shape[1]) & (rows >= 0) & (rows < self.mask.shape[0])
+        idx = np.flatnonzero(inside)
+        idx = idx[self.mask[rows[idx], cols[idx]]]
+        return [positions[i] for i in idx.tolist()]
+
+
+def spawn_storm_cell(fire_system, game_time):
+    """
+    Tạo một ô bão gần đám cháy (tâm lệch ngẫu nhiên khỏi một ô đang cháy), trôi theo hướng ngẫu nhiên
+
+    Returns:
+        StormCell, hoặc None nếu chưa có lửa
+    """
+    if not fire_system.fire_tiles:
+        return None
+    col, row = random.choice(sorted(fire_system.fire_tiles))
+    offset = STORM_MAX_RADIUS * 2
+    radius = random.uniform(STORM_MIN_RADIUS, STORM_MAX_RADIUS)
+    angle = random.uniform(0, 2 * math.pi)
+    speed = random.uniform(STORM_MIN_SPEED, STORM_MAX_SPEED)
+    return StormCell(col + random.uniform(-offset, offset), row + random.uniform(-offset, offset),
+                     radius, radius * random.uniform(0.6, 1.0),
+                     math.cos(angle) * speed, math.sin(angle) * speed,
+                     game_time + random.randint(STORM_MIN_DURATION, STORM_MAX_DURATION))
@@ -0,0 +1,33 @@
+"""Cấu hình pytest: chạy không cần cửa sổ, import module game từ GameSinhTon2D/"""
+import os
+import sys
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from settings import *
+from tile_grid import TileGrid
+import map_cache
+
+ALL_TILES = (TILE_WATER, TILE_SAND, TILE_GRASS, TILE_TREE, TILE_ROCK, TILE_FIRE, TILE_PIECE,
+             TILE_FLOWER, TILE_BOAT, TILE_HEALTH, TILE_STAMINA)
+
+def random_grid(rng, width, height, weights=None):
+    """
+    TileGrid ngẫu nhiên cho các test so với quét toàn bản đồ / BFS đơn giản
+
+    Args:
+        weights: {mã tile: trọng số} - None = đều trên ALL_TILES
+    """
+    weights = weights or dict.fromkeys(ALL_TILES, 1)
+    tiles = rng.choices(list(weights), weights=list(weights.values()), k=width * height)
+    return TileGrid(width, height, bytes(tiles))
+
+@pytest.fixture(autouse=True)
+def map_cache_dir(tmp_path, monkeypatch):
+    """Cache bản đồ của test nằm trong thư mục tạm, không ghi vào map_cache/ của game"""
+    cache_dir = tmp_path / "map_cache"
+    monkeypatch.setattr(map_cache, "CACHE_DIR", str(cache_dir))
+    return cache_dir
@@ -0,0 +1,41 @@
+"""Đọc không sinh chunk và nhãn vùng liên thông khi chunk mới được sinh (chunk_world.py)"""
+import random
+from settings import *
+from chunk_world import ChunkedWorld
+from connectivity import Connectivity
+
+def loaded_walkable(world, rng, count):
+    tiles = [(col, row) for col, row, tile in world.iter_loaded_tiles()
+             if tile not in (TILE_WATER, TILE_TREE, TILE_ROCK)]
+    return rng.sample(tiles, min(count, len(tiles)))
+
+def test_searches_do_not_generate_chunks():
+    world = ChunkedWorld(512, 512, seed=5, chunk_size=16)
+    world.ensure_around(256, 256, radius=1)
+    generated = world.chunks_generated
+    for pos in loaded_walkable(world, random.Random(1), 20):
+        world.connectivity.component_size(pos)
+        world.connectivity.component_at_least(pos, 10_000)
+    assert world.chunks_generated == generated
+    assert world.peek_tile(0, 0) == TILE_WATER and not world.is_loaded(0, 0)
+
+def test_labels_follow_new_chunks():
+    rng = random.Random(8)
+    for seed in range(4):
+        world = ChunkedWorld(512, 512, seed=seed, chunk_size=16)
+        world.ensure_around(256, 256, radius=1)
+        conn = world.connectivity
+        old = loaded_walkable(world, rng, 10_000)
+        for pos in old:
+            conn.component_of(pos)  # Gán nhãn mọi vùng trước khi sinh thêm chunk
+
+        world.ensure_around(256, 256, radius=2)
+        fresh = Connectivity(world, dense=False)
+        labelled = set(old)
+        new = [pos for pos in loaded_walkable(world, rng, 10_000) if pos not in labelled]
+        for a in rng.sample(old, 40):
+            comp = conn.component_of(a)
+            assert conn.size[comp] == fresh.component_size(a)
+            for b in rng.sample(new, 40):
+                # in_component không gán nhãn: ô của chunk mới phải đã nằm trong vùng kề
+                assert conn.in_component(b, comp) == fresh.same_component(a, b)
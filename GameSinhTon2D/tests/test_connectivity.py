@@ -0,0 +1,48 @@
+"""Nhãn vùng liên thông (connectivity.py) sau khi tile đổi"""
+from settings import *
+from tile_grid import TileGrid
+
+W, S, G, T = TILE_WATER, TILE_SAND, TILE_GRASS, TILE_TREE
+
+def make_strip():
+    """Hàng W,G,G,T,G,S,W bao quanh bởi nước (7x3)"""
+    return TileGrid.from_rows([
+        [W] * 7,
+        [W, G, G, T, G, S, W],
+        [W] * 7,
+    ])
+
+def test_burnt_barrier_joins_unlabelled_side():
+    grid = make_strip()
+    conn = grid.connectivity
+    comp = conn.component_of((1, 1))
+    assert conn.component_size((1, 1)) == 2
+
+    grid.set_tile(3, 1, TILE_FIRE)  # Cây cháy -> đi được
+
+    comp = conn.component_of((1, 1))
+    assert conn.in_component((5, 1), comp)
+    assert conn.in_component((4, 1), comp)
+    assert conn.component_size((1, 1)) == 5
+
+def test_burnt_barrier_joins_labelled_sides():
+    grid = make_strip()
+    conn = grid.connectivity
+    assert not conn.same_component((1, 1), (5, 1))
+
+    grid.set_tile(3, 1, TILE_FIRE)
+
+    assert conn.same_component((1, 1), (5, 1))
+    assert conn.component_size((5, 1)) == 5
+
+def test_component_at_least_matches_component_size():
+    for labelled in (False, True):
+        grid = make_strip()
+        conn = grid.connectivity
+        if labelled:
+            conn.component_of((1, 1))
+        for min_size in range(5):
+            assert conn.component_at_least((1, 1), min_size) == (2 >= min_size)
+            assert conn.component_at_least((4, 1), min_size) == (2 >= min_size)
+        assert not conn.component_at_least((3, 1), 1)  # Ô cây bị chặn
+    assert conn.component_at_least((4, 1), 2) and conn._get_label(4 + 7) == -1  # Không gán nhãn
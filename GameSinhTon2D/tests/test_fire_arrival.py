@@ -0,0 +1,89 @@
+"""Bản đồ thời điểm lửa tới (fire_field.FireArrivalMap) và viền lửa của FireSystemNP, so với tính lại từ đầu"""
+import random
+import pytest
+from settings import *
+from fire import FireSystem
+from fire_field import FireArrivalMap
+from fire_np import FireSystemNP, np
+from conftest import random_grid
+
+TILE_WEIGHTS = {TILE_GRASS: 60, TILE_TREE: 15, TILE_FLOWER: 5, TILE_SAND: 10, TILE_WATER: 6, TILE_ROCK: 4,
+                TILE_PIECE: 1, TILE_HEALTH: 1, TILE_STAMINA: 1}
+ITEM_TILES = (TILE_PIECE, TILE_HEALTH, TILE_STAMINA)
+
+class CheckedArrivalMap(FireArrivalMap):
+    """Sau mỗi lần sửa tăng dần: so số lượt lan của từng ô với một lần Dijkstra mới"""
+    def __init__(self):
+        super().__init__()
+        self.checks = 0
+
+    def update(self, fire_system, map_data, changes):
+        super().update(fire_system, map_data, changes)
+        fresh = FireArrivalMap(self.horizon)
+        fresh.next_tick, fresh.first_tick = self.next_tick, self.first_tick
+        fresh.interval, fresh.max_tick = self.interval, self.max_tick
+        fresh.recompute(fire_system, map_data, 0)
+        map_data.journal.unsubscribe(fresh.sub_id)
+        assert self.ticks == fresh.ticks
+        self.checks += 1
+
+def run_fire(engine_class, seed, ticks=400, on_tick=None):
+    """Chạy engine trên bản đồ ngẫu nhiên: lan ngẫu nhiên, mưa dập lửa, mưa tạm dừng lan, nhặt/đặt vật phẩm"""
+    rng = random.Random(seed)
+    random.seed(seed)
+    map_data = random_grid(rng, 40, 30, TILE_WEIGHTS)
+    config = {"fire_spread_interval": 500, "fire_start_delay": 0, "fire_spawn_points": 3,
+              "fire_spread_chance": 0.6, "fire_seed": seed}
+    fire = engine_class(config)
+    fire.arrival = CheckedArrivalMap()
+    for tick in range(1, ticks + 1):
+        game_time = tick * 100
+        map_data.journal.begin_frame(game_time)
+        if tick % 80 == 0:
+            # Mưa: tạm dừng lan 1.5 giây
+            fire.spreading_paused = True
+            fire.resume_time = game_time + 1500
+        elif fire.spreading_paused and game_time >= fire.resume_time:
+            fire.spreading_paused = False
+        fire.update(map_data, game_time)
+        if tick % 7 == 0 and fire.fire_tiles:
+            fire.extinguish_tile(rng.choice(sorted(fire.fire_tiles)), map_data)
+        if tick % 3 == 0:
+            # Ô đổi loại như trong game: nhặt vật phẩm (-> cỏ), đặt/đẩy vật phẩm lên cỏ
+            col, row = rng.randrange(map_data.width), rng.randrange(map_data.height)
+            tile = map_data.get_tile(col, row)
+            if (col, row) not in fire.fire_tiles and (col, row) not in fire.warning_tiles:
+                if tile in ITEM_TILES:
+                    map_data.set_tile(col, row, TILE_GRASS)
+                elif tile in (TILE_GRASS, TILE_FLOWER):
+                    map_data.set_tile(col, row, rng.choice(ITEM_TILES))
+        if on_tick is not None:
+            on_tick(fire, map_data)
+    return fire
+
+def test_arrival_map_matches_full_recompute():
+    for seed in range(3):
+        fire = run_fire(FireSystem, seed)
+        assert fire.fire_tiles and fire.arrival.checks > 50
+
+@pytest.mark.skipif(np is None, reason="cần NumPy")
+def test_arrival_map_matches_full_recompute_numpy_engine():
+    fire = run_fire(FireSystemNP, 4)
+    assert fire.fire_tiles and fire.arrival.checks > 50
+
+@pytest.mark.skipif(np is None, reason="cần NumPy")
+def test_numpy_frontier_matches_scan():
+    flammable = (TILE_GRASS, TILE_TREE, TILE_FLOWER)
+
+    def check(fire, map_data):
+        expected = set()
+        for col, row in fire.fire_tiles:
+            for nb in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+                if map_data.in_bounds(*nb) and map_data.get_tile(*nb) in flammable and \
+                        nb not in fire.fire_tiles and nb not in fire.warning_tiles:
+                    expected.add((col, row))
+                    break
+        assert fire.get_spread_sources() == expected
+
+    for seed in range(3):
+        run_fire(FireSystemNP, seed, ticks=200, on_tick=check)
@@ -0,0 +1,45 @@
+"""Trường khoảng cách lửa (fire_field.py) so với BFS đa nguồn tính lại từ đầu"""
+import random
+from collections import deque
+from fire_field import FireDistanceField
+
+def full_distances(width, height, sources, max_distance):
+    """BFS đa nguồn trên lưới trống, cắt ở max_distance"""
+    dist = {pos: 0 for pos in sources}
+    queue = deque(sources)
+    while queue:
+        col, row = queue.popleft()
+        d = dist[(col, row)]
+        if d == max_distance:
+            continue
+        for nb in ((col + 1, row), (col - 1, row), (col, row + 1), (col, row - 1)):
+            if 0 <= nb[0] < width and 0 <= nb[1] < height and nb not in dist:
+                dist[nb] = d + 1
+                queue.append(nb)
+    return dist
+
+def check_field(field, width, height, sources):
+    expected = full_distances(width, height, sources, field.max_distance)
+    for row in range(height):
+        for col in range(width):
+            assert field.distance_to_fire((col, row)) == expected.get((col, row), float('inf'))
+    for d in range(field.max_distance + 1):
+        assert field.tiles_at_distance(d) == {pos for pos, v in expected.items() if v == d}
+
+def test_distance_field_matches_full_bfs_after_random_edits():
+    for dense in (True, False):
+        rng = random.Random(5)
+        width, height = 30, 20
+        field = FireDistanceField(width, height, dense=dense, max_distance=6)
+        sources = set()
+        for step in range(400):
+            pos = (rng.randrange(width), rng.randrange(height))
+            if pos in sources and rng.random() < 0.6:
+                field.remove_source(pos)
+                sources.discard(pos)
+            else:
+                field.add_source(pos)
+                sources.add(pos)
+            if step % 40 == 0:
+                check_field(field, width, height, sources)
+        check_field(field, width, height, sources)
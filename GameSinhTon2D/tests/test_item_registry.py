@@ -0,0 +1,72 @@
+"""Sổ vật phẩm (item_registry.py) so với quét toàn bản đồ sau các lần ghi ngẫu nhiên"""
+import random
+from settings import *
+from item_registry import ITEM_TILE_TYPES
+from conftest import ALL_TILES, random_grid
+
+# Đủ vật phẩm để nearest duyệt lưới thô (nhiều hơn NEAREST_SCAN_LIMIT)
+TILE_WEIGHTS = {TILE_GRASS: 12, TILE_SAND: 3, TILE_WATER: 3, TILE_TREE: 2,
+                TILE_PIECE: 1, TILE_HEALTH: 1, TILE_STAMINA: 1}
+
+def scan(grid, tile_type):
+    return {(col, row) for row in range(grid.height) for col in range(grid.width)
+            if grid.get_tile(col, row) == tile_type}
+
+def scan_nearest(grid, pos, tile_type, max_distance=None):
+    keys = [(abs(col - pos[0]) + abs(row - pos[1]), row, col) for col, row in scan(grid, tile_type)]
+    keys = [key for key in keys if max_distance is None or key[0] <= max_distance]
+    return (min(keys)[2], min(keys)[1]) if keys else None
+
+def random_edit(grid, rng):
+    grid.set_tile(rng.randrange(grid.width), rng.randrange(grid.height), rng.choice(ALL_TILES))
+
+def test_buckets_match_scan_after_random_edits():
+    rng = random.Random(5)
+    grid = random_grid(rng, 37, 29, TILE_WEIGHTS)
+    items = grid.items
+    for step in range(1500):
+        random_edit(grid, rng)
+        if step % 100 == 0:
+            for tile_type in ITEM_TILE_TYPES:
+                expected = scan(grid, tile_type)
+                assert set(items.bucket(tile_type)) == expected
+                assert items.positions(tile_type) == sorted(expected)
+                assert all(items.item_at(pos) == tile_type for pos in expected)
+
+def test_nearest_matches_scan():
+    rng = random.Random(9)
+    grid = random_grid(rng, 70, 55, TILE_WEIGHTS)
+    items = grid.items
+    for _ in range(300):
+        for _ in range(10):
+            random_edit(grid, rng)
+        pos = (rng.randrange(grid.width), rng.randrange(grid.height))
+        tile_type = rng.choice(ITEM_TILE_TYPES)
+        max_distance = rng.choice((None, 3, 12))
+        assert items.nearest(pos, tile_type, max_distance) == scan_nearest(grid, pos, tile_type, max_distance)
+
+def test_nearest_with_few_items():
+    rng = random.Random(13)
+    grid = random_grid(rng, 40, 30, {TILE_GRASS: 1})
+    for _ in range(5):
+        grid.set_tile(rng.randrange(grid.width), rng.randrange(grid.height), TILE_PIECE)
+    for _ in range(100):
+        pos = (rng.randrange(grid.width), rng.randrange(grid.height))
+        assert grid.items.nearest(pos, TILE_PIECE) == scan_nearest(grid, pos, TILE_PIECE)
+    assert grid.items.nearest((0, 0), TILE_HEALTH) is None
+
+def test_in_rect_matches_scan():
+    rng = random.Random(17)
+    grid = random_grid(rng, 50, 40, TILE_WEIGHTS)
+    for _ in range(500):
+        random_edit(grid, rng)
+    for _ in range(100):
+        col0, row0 = rng.randrange(grid.width), rng.randrange(grid.height)
+        col1, row1 = rng.randint(col0 + 1, grid.width), rng.randint(row0 + 1, grid.height)
+        tile_type = rng.choice((None,) + ITEM_TILE_TYPES)
+        expected = {((col, row), grid.get_tile(col, row)) for row in range(row0, row1) for col in range(col0, col1)
+                    if grid.get_tile(col, row) in ITEM_TILE_TYPES
+                    and (tile_type is None or grid.get_tile(col, row) == tile_type)}
+        result = grid.items.in_rect(col0, row0, col1, row1, tile_type)
+        assert len(result) == len(expected)
+        assert set(result) == expected
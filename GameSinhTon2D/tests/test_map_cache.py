@@ -0,0 +1,19 @@
+"""Cache đảo theo seed (map_cache.py) qua build_level"""
+from settings import *
+from level_manager import LevelManager
+from level_prefetch import build_level
+
+def level_config(seed):
+    config = LevelManager().get_level_config()
+    config["seed"] = seed
+    return config
+
+def test_cached_island_matches_fresh_build(map_cache_dir):
+    map_data, _, _, rescue, _, _ = build_level(level_config(42))
+    files = list(map_cache_dir.iterdir())
+    assert len(files) == 1 and f"_pl{MAP_PLACEMENT_VERSION}_" in files[0].name
+
+    cached_map, _, _, cached_rescue, _, _ = build_level(level_config(42))
+    assert bytes(cached_map.data) == bytes(map_data.data)
+    assert cached_rescue.piece_positions == rescue.piece_positions
+    assert len(cached_rescue.piece_positions) == cached_rescue.pieces_required
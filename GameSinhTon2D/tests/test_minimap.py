@@ -0,0 +1,28 @@
+"""Minimap cuộn theo player (ui.py) so với vẽ lại toàn bộ"""
+import random
+import pygame
+from settings import *
+from ui import UI
+from conftest import ALL_TILES, random_grid
+
+def minimap_bytes(map_data, window, ui=None):
+    if ui is None:
+        ui = UI.__new__(UI)  # Chỉ cần cache minimap, không cần cửa sổ / font
+        ui.minimap_cache = None
+    return pygame.image.tobytes(ui.get_minimap_surface(map_data, window), "RGBA")
+
+def test_scrolled_minimap_matches_full_redraw():
+    rng = random.Random(21)
+    grid = random_grid(rng, MAP_WIDTH + 40, MAP_HEIGHT + 30)
+    ui = UI.__new__(UI)
+    ui.minimap_cache = None
+    col0, row0 = 20, 15
+    for step in range(60):
+        for _ in range(rng.randrange(4)):
+            grid.set_tile(rng.randrange(grid.width), rng.randrange(grid.height), rng.choice(ALL_TILES))
+        # Player đi vài ô mỗi bước, thỉnh thoảng nhảy xa (vẽ lại toàn bộ)
+        jump = 60 if step % 17 == 0 else 3
+        col0 = max(0, min(grid.width - MAP_WIDTH, col0 + rng.randint(-jump, jump)))
+        row0 = max(0, min(grid.height - MAP_HEIGHT, row0 + rng.randint(-jump, jump)))
+        window = (col0, row0, MAP_WIDTH, MAP_HEIGHT)
+        assert minimap_bytes(grid, window, ui) == minimap_bytes(grid, window)
@@ -0,0 +1,136 @@
+"""Bộ tìm đường dùng chung (pathfinding.py)"""
+import heapq
+import random
+from settings import *
+from tile_grid import TileGrid
+from pathfinding import GridSearch, make_cost_fn, PATH_BLOCKED_TILES
+from conftest import random_grid
+
+W, S, G = TILE_WATER, TILE_SAND, TILE_GRASS
+
+def make_detour_map():
+    """Đường thẳng qua cát (1,1)->(4,1) hoặc vòng qua hàng cỏ bên dưới"""
+    return TileGrid.from_rows([
+        [W] * 6,
+        [W, G, S, S, G, W],
+        [W, G, G, G, G, W],
+        [W] * 6,
+    ])
+
+class FireAt:
+    """fire_system giả: chỉ cần distance_to_fire (Manhattan tới các ô cháy)"""
+    def __init__(self, fires):
+        self.fires = fires
+
+    def distance_to_fire(self, pos):
+        return min(abs(pos[0] - c) + abs(pos[1] - r) for c, r in self.fires)
+
+def test_route_unweighted_is_shortest():
+    path = GridSearch().route(make_detour_map(), (1, 1), (4, 1))
+    assert path == [(2, 1), (3, 1), (4, 1)]
+
+def test_route_weighted_detours_around_sand():
+    cost_fn = make_cost_fn(tile_costs={TILE_SAND: 3})
+    path = GridSearch().route(make_detour_map(), (1, 1), (4, 1), cost_fn)
+    assert path == [(1, 2), (2, 2), (3, 2), (4, 2), (4, 1)]
+
+def test_route_weighted_detours_away_from_fire():
+    cost_fn = make_cost_fn(FireAt([(2, 3), (3, 3)]), tile_costs={})
+    path = GridSearch().route(make_detour_map(), (1, 2), (4, 2), cost_fn)
+    assert path == [(1, 1), (2, 1), (3, 1), (4, 1), (4, 2)]
+
+
+# ==================== SO VỚI BFS/DIJKSTRA ĐƠN GIẢN ====================
+RANDOM_WEIGHTS = {G: 6, S: 2, TILE_TREE: 1, TILE_ROCK: 1, TILE_FIRE: 1, W: 1}
+
+def open_neighbors(grid, pos):
+    col, row = pos
+    for nb in ((col + 1, row), (col, row + 1), (col - 1, row), (col, row - 1)):
+        if grid.in_bounds(*nb) and grid.get_tile(*nb) not in PATH_BLOCKED_TILES:
+            yield nb
+
+def naive_costs(grid, start, cost_fn=None):
+    """Chi phí nhỏ nhất từ start tới mọi ô (cost_fn None = số bước, tức BFS)"""
+    best = {start: 0}
+    heap = [(0, start)]
+    while heap:
+        cost, pos = heapq.heappop(heap)
+        if cost > best[pos]:
+            continue
+        for nb in open_neighbors(grid, pos):
+            new = cost + (cost_fn(nb, grid.get_tile(*nb)) if cost_fn else 1)
+            if new < best.get(nb, float('inf')):
+                best[nb] = new
+                heapq.heappush(heap, (new, nb))
+    return best
+
+def path_cost(grid, start, path, cost_fn=None):
+    """Chi phí của path; kiểm tra từng bước liền kề và đi được"""
+    prev, cost = start, 0
+    for pos in path:
+        assert abs(pos[0] - prev[0]) + abs(pos[1] - prev[1]) == 1
+        assert grid.get_tile(*pos) not in PATH_BLOCKED_TILES
+        cost += cost_fn(pos, grid.get_tile(*pos)) if cost_fn else 1
+        prev = pos
+    return cost
+
+def random_open_tile(rng, grid):
+    while True:
+        pos = (rng.randrange(grid.width), rng.randrange(grid.height))
+        if grid.get_tile(*pos) not in PATH_BLOCKED_TILES:
+            return pos
+
+def test_bfs_matches_naive_bfs():
+    rng = random.Random(2)
+    search = GridSearch()  # Dùng lại bộ đệm giữa các lượt và các kích thước bản đồ
+    for trial in range(60):
+        grid = random_grid(rng, rng.choice((12, 25)), rng.choice((9, 20)), RANDOM_WEIGHTS)
+        start = random_open_tile(rng, grid)
+        dist = naive_costs(grid, start)
+        goals = {random_open_tile(rng, grid) for _ in range(6)} - {start}
+
+        found = search.bfs(grid, start, goals=goals, first_only=False)
+        assert set(found) == {goal for goal in goals if goal in dist}
+        assert [dist[goal] for goal in found] == sorted(dist[goal] for goal in found)
+        for goal in found:
+            path = search.path_to(goal)
+            assert path[-1] == goal and path_cost(grid, start, path) == dist[goal]
+
+        nearest = search.bfs(grid, start, goals=goals)
+        reachable = [dist[goal] for goal in goals if goal in dist]
+        assert [dist[goal] for goal in nearest] == ([min(reachable)] if reachable else [])
+
+def test_bfs_can_enter_matches_naive_gate():
+    rng = random.Random(4)
+    search = GridSearch()
+    for trial in range(30):
+        grid = random_grid(rng, 20, 15, RANDOM_WEIGHTS)
+        start = random_open_tile(rng, grid)
+        # Cổng theo số bước: ô có (col + row) % 5 == 0 bị chặn nếu tới sau 4 bước
+        gate = lambda pos, d: not ((pos[0] + pos[1]) % 5 == 0 and d > 4)
+        found = search.bfs(grid, start, is_goal=lambda pos, d: d == 7, can_enter=gate)
+        # BFS đơn giản với cùng cổng (đánh dấu khi đưa vào hàng đợi)
+        dist, queue = {start: 0}, [start]
+        for pos in queue:
+            for nb in open_neighbors(grid, pos):
+                if nb not in dist and gate(nb, dist[pos] + 1):
+                    dist[nb] = dist[pos] + 1
+                    queue.append(nb)
+        assert bool(found) == any(d == 7 for d in dist.values())
+        if found:
+            assert len(search.path_to(found[0])) == 7
+
+def test_route_matches_naive_search():
+    rng = random.Random(6)
+    search = GridSearch()
+    cost_fn = make_cost_fn(FireAt([(3, 3), (15, 8)]))
+    for trial in range(80):
+        grid = random_grid(rng, rng.choice((15, 30)), rng.choice((10, 22)), RANDOM_WEIGHTS)
+        start, goal = random_open_tile(rng, grid), random_open_tile(rng, grid)
+        for fn in (None, cost_fn):
+            best = naive_costs(grid, start, fn)
+            path = search.route(grid, start, goal, fn)
+            if goal == start or goal not in best:
+                assert path == []
+            else:
+                assert path[-1] == goal and path_cost(grid, start, path, fn) == best[goal]
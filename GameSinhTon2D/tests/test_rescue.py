@@ -0,0 +1,67 @@
+"""Đặt thuyền cứu hộ (rescue.py)"""
+import random
+import pytest
+from settings import *
+from tile_grid import TileGrid
+from rescue import RescueSystem
+
+W, S, G, T = TILE_WATER, TILE_SAND, TILE_GRASS, TILE_TREE
+
+def make_map():
+    """Dải cỏ bị cây chặn, bờ biển (5,1) sau cây và một cồn cát lẻ (1,3) không tới được"""
+    return TileGrid.from_rows([
+        [W] * 7,
+        [W, G, G, T, G, S, W],
+        [W] * 7,
+        [W, S, W, W, W, W, W],
+        [W] * 7,
+    ])
+
+def test_boat_lands_behind_burnt_barrier():
+    for seed in range(20):
+        random.seed(seed)
+        grid = make_map()
+        grid.connectivity.component_of((1, 1))  # Vùng của player đã có nhãn trước khi cây cháy
+        grid.set_tile(3, 1, TILE_FIRE)
+
+        rescue = RescueSystem()
+        rescue.spawn_boat(grid, (1, 1))
+
+        assert rescue.boat_position == (5, 1)
+        assert grid.get_tile(5, 1) == TILE_BOAT
+
+def test_boat_uses_neighbour_region_when_player_tile_blocked():
+    for seed in range(20):
+        random.seed(seed)
+        grid = make_map()
+        rescue = RescueSystem()
+        rescue.spawn_boat(grid, (3, 1))  # Player đứng trên ô cây, ô kề (4,1) thấy bờ (5,1)
+
+        assert rescue.boat_position == (5, 1)
+
+def test_unreachable_boat_is_reported():
+    random.seed(0)
+    grid = make_map()
+    game_log = []
+    rescue = RescueSystem()
+    rescue.spawn_boat(grid, (1, 1), game_log)  # Cây (3,1) chặn, cồn cát (1,3) cũng không tới được
+
+    assert rescue.boat_position in [(1, 3), (5, 1)]
+    assert len(game_log) == 1
+
+def test_place_pieces_fills_from_outside_small_start_region():
+    grid = make_map()  # Vùng của player chỉ có 2 ô cỏ, phía sau cây có thêm 1 ô
+    rescue = RescueSystem(pieces_required=3)
+    rescue.place_pieces(grid, random.Random(1), start_pos=(1, 1))
+
+    assert sorted(rescue.piece_positions) == [(1, 1), (2, 1), (4, 1)]
+    assert rescue.pieces_required == 3
+
+def test_place_pieces_refuses_map_without_room():
+    grid = make_map()  # Chỉ có 3 ô cỏ trên cả bản đồ
+    rescue = RescueSystem(pieces_required=5)
+    with pytest.raises(ValueError):
+        rescue.place_pieces(grid, random.Random(1), start_pos=(1, 1))
+
+    assert grid.tile_index.count(TILE_PIECE) == 0
+    assert rescue.pieces_required == 5
@@ -0,0 +1,32 @@
+"""TileGrid (tile_grid.py) so với bản đồ list of lists"""
+import random
+from settings import *
+from tile_grid import TileGrid
+from conftest import ALL_TILES, random_grid
+
+def test_row_view_matches_list_of_lists():
+    rng = random.Random(3)
+    grid = random_grid(rng, 23, 17)
+    rows = grid.to_rows()
+    for _ in range(500):
+        col, row = rng.randrange(grid.width), rng.randrange(grid.height)
+        tile = rng.choice(ALL_TILES)
+        grid[row][col] = tile
+        rows[row][col] = tile
+        assert grid.get_tile(col, row) == tile
+    assert grid.to_rows() == rows
+    assert [list(r) for r in grid] == rows
+
+def test_indexes_attach_on_first_use():
+    grid = TileGrid(4, 3, bytes([TILE_GRASS]) * 12)
+    assert grid.observers == []
+    grid.set_tile(1, 1, TILE_SAND)  # Chưa có chỉ mục nào phải cập nhật
+
+    index = grid.tile_index
+    assert grid.observers == [index] and grid.tile_index is index
+    assert index.count(TILE_SAND) == 1
+    grid.set_tile(2, 1, TILE_SAND)
+    assert index.count(TILE_SAND) == 2
+
+    items = grid.items  # Dựng từ tile_index đã gắn
+    assert grid.observers == [index, items]
@@ -0,0 +1,33 @@
+"""Chỉ mục theo loại tile (tile_index.py) so với quét toàn bản đồ sau các lần ghi ngẫu nhiên"""
+import random
+from settings import *
+from tile_index import INDEXED_TILE_TYPES
+from conftest import ALL_TILES, random_grid
+
+def test_tile_index_matches_scan_after_random_edits():
+    rng = random.Random(7)
+    grid = random_grid(rng, 23, 17)
+    index = grid.tile_index
+    for step in range(2000):
+        grid.set_tile(rng.randrange(grid.width), rng.randrange(grid.height), rng.choice(ALL_TILES))
+        if step % 100 == 0:
+            for tile_type in INDEXED_TILE_TYPES:
+                assert sorted(index.lists[tile_type]) == grid.where(tile_type)
+    for tile_type in INDEXED_TILE_TYPES:
+        assert sorted(index.lists[tile_type]) == grid.where(tile_type)
+        assert index.count(tile_type) == grid.count(tile_type)
+    for idx, tile in enumerate(grid.data):
+        for tile_type in INDEXED_TILE_TYPES:
+            assert index.contains(idx, tile_type) == (tile == tile_type)
+
+def test_tile_index_in_rect_matches_scan():
+    rng = random.Random(11)
+    grid = random_grid(rng, 23, 17)
+    for _ in range(300):
+        grid.set_tile(rng.randrange(grid.width), rng.randrange(grid.height), rng.choice(ALL_TILES))
+    for _ in range(50):
+        col0, row0 = rng.randrange(-3, grid.width), rng.randrange(-3, grid.height)
+        col1, row1 = col0 + rng.randrange(1, 15), row0 + rng.randrange(1, 15)
+        expected = sorted((col, row) for col, row, tile in grid.iter_tiles()
+                          if tile == TILE_GRASS and col0 <= col < col1 and row0 <= row < row1)
+        assert sorted(grid.tile_index.in_rect(TILE_GRASS, col0, row0, col1, row1)) == expected
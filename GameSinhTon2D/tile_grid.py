@@ -0,0 +1,181 @@
+"""
+Tile Grid - Bản đồ lưu phẳng trong bytearray (1 byte/ô, hàng nối tiếp nhau)
+Chỉ số phẳng: idx = row * width + col
+Các chỉ mục (tile_index, connectivity, ...) không nằm trong lưới: chúng được dựng khi lần đầu
+được đọc và gắn vào danh sách observer - mỗi lần ghi tile chỉ báo cho các chỉ mục đã gắn.
+"""
+import importlib
+
+# Chỉ mục dựng lười: tên thuộc tính -> "module:Class" (Class.for_grid(grid) dựng từ dữ liệu hiện tại)
+LAZY_INDEXES = {
+    "tile_index": "tile_index:TileIndex",        # Vị trí theo loại tile
+    "connectivity": "connectivity:Connectivity",  # Nhãn vùng liên thông của ô đi được
+    "coast": "coast_index:CoastIndex",            # Ô cát sát nước (nơi thuyền cập bến)
+    "items": "item_registry:ItemRegistry",        # Sổ vật phẩm theo vị trí + lưới thô
+    "journal": "tile_journal:TileJournal",        # Nhật ký thay đổi tile cho các hệ thống đăng ký
+}
+
+class TileRow:
+    """View một hàng của TileGrid để giữ cú pháp map_data[row][col]"""
+    __slots__ = ("grid", "offset")
+
+    def __init__(self, grid, row):
+        self.grid = grid
+        self.offset = row * grid.width
+
+    def __getitem__(self, col):
+        return self.grid.data[self.offset + col]
+
+    def __setitem__(self, col, tile):
+        # Đi qua set_idx để mọi thay đổi đều qua một chỗ
+        self.grid.set_idx(self.offset + col, tile)
+
+    def __len__(self):
+        return self.grid.width
+
+    def __iter__(self):
+        return iter(self.grid.data[self.offset:self.offset + self.grid.width])
+
+
+class TileGrid:
+    def __init__(self, width, height, data=None):
+        """
+        Args:
+            width, height: Kích thước bản đồ (ô)
+            data: bytes/bytearray width*height mã tile (None = toàn nước)
+        """
+        self.width = width
+        self.height = height
+        if data is None:
+            self.data = bytearray(width * height)
+        else:
+            if len(data) != width * height:
+                raise ValueError(f"TileGrid cần {width * height} byte, nhận {len(data)}")
+            self.data = bytearray(data)
+        self._rows = [TileRow(self, row) for row in range(height)]
+        
+        # Chỉ mục đã gắn - mỗi cái có on_change(idx, old, new), gọi trong set_idx
+        self.observers = []
+
+    def __getattr__(self, name):
+        """Lần đầu đọc một chỉ mục trong LAZY_INDEXES: dựng, gắn vào observers và lưu thành thuộc tính"""
+        spec = LAZY_INDEXES.get(name)
+        if spec is None:
+            raise AttributeError(f"'TileGrid' object has no attribute '{name}'")
+        module_name, class_name = spec.split(":")
+        index = getattr(importlib.import_module(module_name), class_name).for_grid(self)
+        self.attach(index)
+        setattr(self, name, index)
+        return index
+
+    def attach(self, observer):
+        """Nhận on_change(idx, old, new) sau mỗi lần ghi tile"""
+        self.observers.append(observer)
+        return observer
+
+    def detach(self, observer):
+        self.observers.remove(observer)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Tạo TileGrid từ bản đồ list of lists"""
+        height = len(rows)
+        width = len(rows[0]) if height else 0
+        data = bytearray()
+        for row in rows:
+            data.extend(row)
+        return cls(width, height, data)
+
+    def to_rows(self):
+        """Chuyển về list of lists (dùng cho debug/so sánh)"""
+        w = self.width
+        return [list(self.data[r * w:(r + 1) * w]) for r in range(self.height)]
+
+    # ==================== TƯƠNG THÍCH map_data[row][col] ====================
+    def __getitem__(self, row):
+        return self._rows[row]
+
+    def __len__(self):
+        return self.height
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    # ==================== TRUY CẬP THEO (col, row) ====================
+    def in_bounds(self, col, row):
+        return 0 <= col < self.width and 0 <= row < self.height
+
+    def get_tile(self, col, row):
+        return self.data[row * self.width + col]
+
+    def peek_tile(self, col, row, default=None):
+        return self.data[row * self.width + col]
+
+    def set_tile(self, col, row, tile):
+        self.set_idx(row * self.width + col, tile)
+
+    def get_row_slice(self, row, col0, col1):
+        """bytes chứa tile của hàng row, cột [col0, col1) - đọc hàng loạt cho việc vẽ"""
+        offset = row * self.width
+        return bytes(self.data[offset + col0:offset + col1])
+
+    # ==================== TRUY CẬP THEO CHỈ SỐ PHẲNG ====================
+    def index(self, col, row):
+        return row * self.width + col
+
+    def pos(self, idx):
+        """Chỉ số phẳng -> (col, row)"""
+        return idx % self.width, idx // self.width
+
+    def get_idx(self, idx):
+        return self.data[idx]
+
+    def peek_idx(self, idx, default=None):
+        """Giống ChunkedWorld.peek_idx - bản đồ dày thì mọi ô đều đã có"""
+        return self.data[idx]
+
+    def set_idx(self, idx, tile):
+        """Mọi thao tác ghi tile đều đi qua đây"""
+        old = self.data[idx]
+        if old == tile:
+            return
+        self.data[idx] = tile
+        for observer in self.observers:
+            observer.on_change(idx, old, tile)
+
+    def neighbors4(self, idx):
+        """Chỉ số phẳng của 4 ô lân cận (trái, phải, trên, dưới) nằm trong bản đồ"""
+        w = self.width
+        col = idx % w
+        result = []
+        if col > 0:
+            result.append(idx - 1)
+        if col < w - 1:
+            result.append(idx + 1)
+        if idx >= w:
+            result.append(idx - w)
+        if idx + w < len(self.data):
+            result.append(idx + w)
+        return result
+
+    # ==================== TRUY VẤN HÀNG LOẠT ====================
+    def count(self, tile_type):
+        """Đếm số ô thuộc loại tile_type"""
+        return self.data.count(tile_type)
+
+    def where(self, tile_type):
+        """Danh sách chỉ số phẳng của các ô thuộc loại tile_type"""
+        result = []
+        needle = bytes((tile_type,))
+        find = self.data.find
+        idx = find(needle)
+        while idx != -1:
+            result.append(idx)
+            idx = find(needle, idx + 1)
+        return result
+
+    def iter_tiles(self):
+        """Duyệt (col, row, tile) theo thứ tự hàng"""
+        w = self.width
+        for idx, tile in enumerate(self.data):
+            yield idx % w, idx // w, tile
@@ -0,0 +1,171 @@
+"""
+Tile Index - Chỉ mục vị trí theo loại tile, cập nhật mỗi lần ghi tile
+Cho phép lấy mẫu ngẫu nhiên O(1) và truy vấn "ô loại T trong hình chữ nhật"
+mà không cần quét toàn bản đồ.
+"""
+import random
+from array import array
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Nước chiếm phần lớn bản đồ và không có truy vấn nào cần nó -> không đánh chỉ mục
+INDEXED_TILE_TYPES = (TILE_SAND, TILE_GRASS, TILE_TREE, TILE_ROCK, TILE_FIRE, TILE_PIECE,
+                      TILE_FLOWER, TILE_BOAT, TILE_HEALTH, TILE_STAMINA)
+
+class TileIndex:
+    def __init__(self, width, height, dense=True):
+        """
+        Args:
+            width, height: Kích thước bản đồ (chỉ số phẳng idx = row * width + col)
+            dense: True = slot lưu trong mảng width*height (TileGrid),
+                   False = slot lưu trong dict (ChunkedWorld, bản đồ rất lớn)
+        """
+        self.width = width
+        self.height = height
+        self.dense = dense
+        # Mỗi ô chỉ thuộc đúng 1 loại -> dùng chung 1 bảng slot:
+        # slot[idx] = vị trí của idx trong danh sách loại của nó (-1 = không có)
+        self.slot = array('i', [-1]) * (width * height) if dense else {}
+        self.lists = {tile_type: array('i') for tile_type in INDEXED_TILE_TYPES}
+
+    @classmethod
+    def for_grid(cls, grid):
+        """Chỉ mục dựng từ tile hiện tại của TileGrid (TileGrid gắn vào observers)"""
+        index = cls(grid.width, grid.height)
+        index.build(grid.data)
+        return index
+
+    def build(self, data):
+        """Xây chỉ mục từ bytearray tile (gọi 1 lần khi tạo bản đồ)"""
+        if np is not None and self.dense:
+            self._build_np(data)
+            return
+        for tile_type, lst in self.lists.items():
+            del lst[:]
+            needle = bytes((tile_type,))
+            find = data.find
+            idx = find(needle)
+            while idx != -1:
+                self.slot[idx] = len(lst)
+                lst.append(idx)
+                idx = find(needle, idx + 1)
+
+    def _build_np(self, data):
+        """Bản NumPy của build(): lọc theo loại tile trên toàn mảng"""
+        tiles = np.frombuffer(data, dtype=np.uint8)
+        slot = np.frombuffer(self.slot, dtype=np.int32)  # View ghi được vào array('i')
+        for tile_type in self.lists:
+            idxs = np.flatnonzero(tiles == tile_type).astype(np.int32)
+            slot[idxs] = np.arange(len(idxs), dtype=np.int32)
+            self.lists[tile_type] = array('i', idxs.tobytes())
+
+    # ==================== CẬP NHẬT ====================
+    def add(self, idx, tile_type):
+        lst = self.lists.get(tile_type)
+        if lst is None:
+            return
+        self.slot[idx] = len(lst)
+        lst.append(idx)
+
+    def remove(self, idx, tile_type):
+        lst = self.lists.get(tile_type)
+        if lst is None:
+            return
+        # Đổi chỗ với phần tử cuối rồi pop - O(1)
+        i = self.slot[idx]
+        last = lst[-1]
+        lst[i] = last
+        self.slot[last] = i
+        lst.pop()
+        if self.dense:
+            self.slot[idx] = -1
+        else:
+            del self.slot[idx]
+
+    def move(self, idx, old_type, new_type):
+        """Cập nhật khi ô idx đổi từ old_type sang new_type"""
+        self.remove(idx, old_type)
+        self.add(idx, new_type)
+
+    on_change = move  # Observer của TileGrid
+
+    # ==================== TRUY VẤN ====================
+    def count(self, tile_type):
+        return len(self.lists.get(tile_type, ()))
+
+    def contains(self, idx, tile_type):
+        lst = self.lists.get(tile_type)
+        if lst is None:
+            return False
+        i = self.slot[idx] if self.dense else self.slot.get(idx, -1)
+        return 0 <= i < len(lst) and lst[i] == idx
+
+    def positions(self, tile_type):
+        """Danh sách (col, row) của mọi ô loại tile_type"""
+        w = self.width
+        return [(idx % w, idx // w) for idx in self.lists.get(tile_type, ())]
+
+    def sample(self, tile_types, rng=random):
+        """
+        Lấy ngẫu nhiên đều 1 ô thuộc một trong các loại tile_types - O(số loại)
+
+        Returns:
+            (col, row) hoặc None nếu không có ô nào
+        """
+        lists = [self.lists[t] for t in tile_types if t in self.lists]
+        total = sum(len(lst) for lst in lists)
+        if total == 0:
+            return None
+        r = rng.randrange(total)
+        for lst in lists:
+            if r < len(lst):
+                idx = lst[r]
+                return (idx % self.width, idx // self.width)
+            r -= len(lst)
+        return None
+
+    def sample_many(self, tile_types, count, rng=random):
+        """
+        Lấy count ô khác nhau (ngẫu nhiên đều) thuộc các loại tile_types
+
+        Returns:
+            list (col, row) - rỗng nếu không đủ count ô
+        """
+        lists = [self.lists[t] for t in tile_types if t in self.lists]
+        total = sum(len(lst) for lst in lists)
+        if total < count:
+            return []
+        result = []
+        for r in rng.sample(range(total), count):
+            for lst in lists:
+                if r < len(lst):
+                    idx = lst[r]
+                    result.append((idx % self.width, idx // self.width))
+                    break
+                r -= len(lst)
+        return result
+
+    def in_rect(self, tile_type, col0, row0, col1, row1):
+        """
+        Các ô loại tile_type trong hình chữ nhật [col0, col1) x [row0, row1)
+        Duyệt hình chữ nhật hoặc danh sách loại - tuỳ cái nào nhỏ hơn
+        """
+        col0, row0 = max(0, col0), max(0, row0)
+        col1, row1 = min(self.width, col1), min(self.height, row1)
+        if col0 >= col1 or row0 >= row1:
+            return []
+        lst = self.lists.get(tile_type, ())
+        w = self.width
+        if (col1 - col0) * (row1 - row0) < len(lst):
+            return [(col, row) for row in range(row0, row1) for col in range(col0, col1)
+                    if self.contains(row * w + col, tile_type)]
+        result = []
+        for idx in lst:
+            col, row = idx % w, idx // w
+            if col0 <= col < col1 and row0 <= row < row1:
+                result.append((col, row))
+        return result
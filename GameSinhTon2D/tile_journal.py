@@ -0,0 +1,72 @@
+"""
+Tile Journal - Nhật ký thay đổi tile
+Mọi lần ghi tile (set_idx / set_tile của bản đồ) ghi thêm một mục (pos, old, new, time).
+Các hệ thống đăng ký (minimap, pathfinder, renderer...) tự rút các mục mới của mình
+thay vì quét lại toàn bộ bản đồ.
+"""
+from settings import *
+
+class TileJournal:
+    def __init__(self, width, max_entries=TILE_JOURNAL_MAX_ENTRIES):
+        """
+        Args:
+            width: Chiều rộng bản đồ (đổi chỉ số phẳng -> (col, row))
+            max_entries: Số mục tối đa giữ cho subscriber chậm - vượt quá thì subscriber phải dựng lại
+        """
+        self.width = width
+        self.max_entries = max_entries
+        self.time = 0          # Thời điểm game hiện tại - đặt bởi begin_frame()
+        self.entries = []      # [(pos, old, new, time)]
+        self.base = 0          # Số thứ tự (toàn cục) của entries[0]
+        self.cursors = {}      # {subscriber_id: số thứ tự mục kế tiếp cần đọc}
+        self.next_id = 0
+
+    @classmethod
+    def for_grid(cls, grid):
+        """Nhật ký cho TileGrid (TileGrid gắn vào observers)"""
+        return cls(grid.width)
+
+    def record(self, idx, old, new):
+        """Gọi từ set_idx/set_tile mỗi khi một ô đổi giá trị"""
+        if self.cursors:
+            self.entries.append(((idx % self.width, idx // self.width), old, new, self.time))
+
+    on_change = record  # Observer của TileGrid
+
+    def begin_frame(self, game_time):
+        """Đầu mỗi frame: đặt thời gian cho các mục mới, bỏ các mục mọi subscriber đã đọc"""
+        self.time = game_time
+        if not self.entries:
+            return
+        oldest = min(self.cursors.values()) if self.cursors else self.base + len(self.entries)
+        # Subscriber chậm quá max_entries mục: bỏ qua, lần rút kế tiếp sẽ báo tràn
+        oldest = max(oldest, self.base + len(self.entries) - self.max_entries)
+        drop = oldest - self.base
+        if drop > 0:
+            del self.entries[:drop]
+            self.base = oldest
+
+    # ==================== SUBSCRIBER ====================
+    def subscribe(self):
+        """Đăng ký nhận thay đổi từ thời điểm này - trả về mã subscriber"""
+        sub_id = self.next_id
+        self.next_id += 1
+        self.cursors[sub_id] = self.base + len(self.entries)
+        return sub_id
+
+    def unsubscribe(self, sub_id):
+        self.cursors.pop(sub_id, None)
+
+    def drain(self, sub_id):
+        """
+        Lấy các thay đổi mới kể từ lần rút trước
+
+        Returns:
+            list [(pos, old, new, time)], hoặc None nếu đã bỏ lỡ mục (phải dựng lại toàn bộ)
+        """
+        cursor = self.cursors[sub_id]
+        end = self.base + len(self.entries)
+        self.cursors[sub_id] = end
+        if cursor < self.base:
+            return None
+        return self.entries[cursor - self.base:]
@@ -1,6 +1,7 @@
 import pygame
 import random
 from settings import *
+from world import get_map_size, get_spawn_bounds
 
 class TurtleEnemy:
     def __init__(self, x, y):
@@ -43,7 +44,8 @@ class TurtleEnemy:
     
     def can_move_to(self, x, y, map_data):
         """Kiểm tra có thể di chuyển đến ô (x, y)"""
-        if x < 0 or x >= MAP_WIDTH or y < 0 or y >= MAP_HEIGHT:
+        map_width, map_height = get_map_size(map_data)
+        if x < 0 or x >= map_width or y < 0 or y >= map_height:
             return False
         
         tile = map_data[y][x]
@@ -206,21 +208,25 @@ class TurtleEnemy:
         pygame.draw.circle(screen, (150, 200, 255), (screen_x, screen_y), 3)
 
 
-def spawn_turtles(map_data, count=10):
+def spawn_turtles(map_data, count=10, rng=random):
     """
     Spawn turtle enemies trên bản đồ
+    rng: bộ sinh ngẫu nhiên (Random có seed để level tái lập được)
     Returns: list of TurtleEnemy
     """
     turtles = []
     attempts = 0
     max_attempts = 1000
+    col0, row0, col1, row1 = get_spawn_bounds(map_data)
+    if col1 - col0 <= 10 or row1 - row0 <= 10:
+        return turtles
     
     while len(turtles) < count and attempts < max_attempts:
         attempts += 1
         
         # Random position
-        x = random.randint(5, MAP_WIDTH - 5)
-        y = random.randint(5, MAP_HEIGHT - 5)
+        x = rng.randint(col0 + 5, col1 - 5)
+        y = rng.randint(row0 + 5, row1 - 5)
         
         # Check if valid spawn location
         tile = map_data[y][x]
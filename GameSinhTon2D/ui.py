@@ -4,6 +4,8 @@ import math
 from settings import *
 from utils import draw_text
 from score import format_time
+from world import get_map_size
+from particles import FireParticles, np
 
 class UI:
     def __init__(self, screen):
@@ -16,6 +18,27 @@ class UI:
         
         self.viewport_area = self.screen.subsurface(self.rect_viewport)
         
+        # Vùng bản đồ đang hiển thị trên minimap (col0, row0, cols, rows)
+        self.minimap_window = (0, 0, MAP_WIDTH, MAP_HEIGHT)
+        # Ảnh nền minimap đã vẽ sẵn - chỉ vẽ lại ô đổi (rút từ nhật ký tile của map)
+        self.minimap_cache = None
+        
+        # Tàn lửa / khói trên ô cháy trong viewport (cần NumPy)
+        self.fire_particles = FireParticles() if np is not None else None
+        self.last_frame_time = None
+        self.overlay_cache = {}  # {(r, g, b, a): Surface ô màu trong suốt} - không tạo Surface mỗi frame
+        
+        # Mưa: sprite vệt mưa, lớp phủ, nền + font nhãn - tạo một lần
+        self.rain_streak = pygame.Surface((1, 10))
+        self.rain_streak.fill((150, 200, 255))  # Màu xanh nhạt
+        self.rain_overlay = pygame.Surface((VIEWPORT_WIDTH, VIEWPORT_HEIGHT), pygame.SRCALPHA)
+        self.rain_overlay.fill((100, 150, 200, 30))  # Xanh dương nhạt
+        self.rain_bg = pygame.Surface((130, 30), pygame.SRCALPHA)
+        self.rain_bg.fill((0, 100, 200, 180))
+        self.font_rain = None
+        self.rain_label = (None, None)  # (chuỗi, Surface đã render)
+        self.storm_sprites = {}  # {(w, h) pixel: Surface elip vùng mưa giông}
+        
         # Load menu background
         self.menu_bg = None
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -71,19 +94,32 @@ class UI:
         start_row = int(camera_y // TILE_SIZE)
         end_row = int((camera_y + VIEWPORT_HEIGHT) // TILE_SIZE) + 1
         
+        map_width, map_height = get_map_size(map_data)
         start_col = max(0, start_col)
-        end_col = min(MAP_WIDTH, end_col)
+        end_col = min(map_width, end_col)
         start_row = max(0, start_row)
-        end_row = min(MAP_HEIGHT, end_row)
+        end_row = min(map_height, end_row)
         
         # Lấy warning tiles từ fire system
-        warning_tiles = []
+        warning_tiles = set()
         if fire_system:
-            warning_tiles = fire_system.get_warning_tiles_visual(game_time)
+            warning_tiles = fire_system.get_warning_tiles_visual(
+                game_time, (start_col, start_row, end_col, end_row))
 
+        visible_fire = []  # Ô cháy trong viewport - nguồn phát tàn lửa/khói
+        
+        # Độ ẩm sau mưa của viewport, lượng tử hoá thành mức tô màu (một phép mảng mỗi frame)
+        wet_levels = None
+        wetness = fire_system.wetness if fire_system else None
+        if wetness is not None and wetness.active and start_row < end_row and start_col < end_col:
+            wet = wetness.window(slice(start_row, end_row), slice(start_col, end_col))
+            wet_levels = (wet * WETNESS_TINT_LEVELS).astype(np.uint8).tolist()
+        
         for row in range(start_row, end_row):
+            row_tiles = map_data.get_row_slice(row, start_col, end_col)
+            row_wet = wet_levels[row - start_row] if wet_levels is not None else None
             for col in range(start_col, end_col):
-                tile = map_data[row][col]
+                tile = row_tiles[col - start_col]
                 dx = (col * TILE_SIZE) - camera_x
                 dy = (row * TILE_SIZE) - camera_y
                 
@@ -115,12 +151,12 @@ class UI:
                         if g_img:
                             self.viewport_area.blit(g_img, (dx, dy))
                         self.viewport_area.blit(img, (dx, dy))
-                        # Hiệu ứng nhấp nháy lửa
+                        visible_fire.append((col, row))
+                        # Hiệu ứng nhấp nháy lửa - lõi đám cháy (nhiều ô cháy kề) sáng hơn
                         flicker = (game_time // 100) % 3
                         if flicker == 0:
-                            s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                            s.fill((255, 100, 0, 40))
-                            self.viewport_area.blit(s, (dx, dy))
+                            density = fire_system.get_fire_density((col, row)) if fire_system else 0
+                            self.viewport_area.blit(self.get_overlay((255, 100, 0, 40 + density * 10)), (dx, dy))
                     
                     elif tile == TILE_PIECE:
                         # Vẽ nền cỏ dưới mảnh ghép + hiệu ứng lấp lánh
@@ -128,12 +164,6 @@ class UI:
                         if g_img:
                             self.viewport_area.blit(g_img, (dx, dy))
                         self.viewport_area.blit(img, (dx, dy))
-                        # Hiệu ứng lấp lánh
-                        sparkle = (game_time // 300) % 2
-                        if sparkle == 0:
-                            s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                            s.fill((255, 255, 100, 50))
-                            self.viewport_area.blit(s, (dx, dy))
                     
                     elif tile == TILE_HEALTH:
                         # Vẽ nền cỏ dưới vật phẩm hồi máu + hiệu ứng pulse
@@ -141,12 +171,6 @@ class UI:
                         if g_img:
                             self.viewport_area.blit(g_img, (dx, dy))
                         self.viewport_area.blit(img, (dx, dy))
-                        # Hiệu ứng pulse xanh
-                        pulse = (game_time // 400) % 2
-                        if pulse == 0:
-                            s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                            s.fill((0, 255, 100, 40))
-                            self.viewport_area.blit(s, (dx, dy))
                     
                     elif tile == TILE_BOAT:
                         # Vẽ nền cát dưới thuyền + hiệu ứng vàng nổi bật
@@ -179,12 +203,6 @@ class UI:
                         else:
                             pygame.draw.rect(self.viewport_area, (0, 200, 255), 
                                            (dx + 10, dy + 10, TILE_SIZE - 20, TILE_SIZE - 20))
-                        # Hiệu ứng pulse xanh cyan
-                        pulse = (game_time // 350) % 2
-                        if pulse == 0:
-                            s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                            s.fill((0, 200, 255, 50))
-                            self.viewport_area.blit(s, (dx, dy))
                     
                     else:
                         self.viewport_area.blit(img, (dx, dy))
@@ -192,6 +210,10 @@ class UI:
                     color = COLORS.get(tile, (255,255,255))
                     pygame.draw.rect(self.viewport_area, color, (dx, dy, TILE_SIZE, TILE_SIZE))
                 
+                # Tô xanh nhẹ ô còn ẩm sau mưa (overlay theo mức, dựng sẵn)
+                if row_wet is not None and row_wet[col - start_col] and tile != TILE_WATER:
+                    self.viewport_area.blit(self.get_overlay((40, 80, 140, 12 * row_wet[col - start_col])), (dx, dy))
+                
                 # Vẽ warning overlay cho tiles sắp cháy
                 if (col, row) in warning_tiles:
                     s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
@@ -201,6 +223,25 @@ class UI:
                     pygame.draw.rect(self.viewport_area, (255, 200, 0), 
                                    (dx, dy, TILE_SIZE, TILE_SIZE), 3)
 
+        # Hiệu ứng vật phẩm (lấp lánh / pulse) - liệt kê vật phẩm trong viewport từ sổ vật phẩm
+        item_effects = {
+            TILE_PIECE: ((game_time // 300) % 2 == 0, (255, 255, 100, 50)),   # Mảnh ghép lấp lánh
+            TILE_HEALTH: ((game_time // 400) % 2 == 0, (0, 255, 100, 40)),   # Hồi máu pulse xanh
+            TILE_STAMINA: ((game_time // 350) % 2 == 0, (0, 200, 255, 50)),  # Stamina pulse xanh cyan
+        }
+        for (col, row), item_type in map_data.items.in_rect(start_col, start_row, end_col, end_row):
+            visible, color = item_effects[item_type]
+            if visible and game_assets.get(item_type):
+                self.viewport_area.blit(self.get_overlay(color), (col * TILE_SIZE - camera_x, row * TILE_SIZE - camera_y))
+        
+        # Tàn lửa / khói (pool hạt, ngân sách theo thời gian frame)
+        if self.fire_particles is not None:
+            frame_ms = game_time - self.last_frame_time if self.last_frame_time is not None else 0
+            frame_ms = min(max(frame_ms, 0), 100)  # Bỏ qua khoảng dừng dài (pause, đổi màn)
+            self.fire_particles.update(visible_fire, frame_ms / 1000.0, frame_ms)
+            self.fire_particles.draw(self.viewport_area, camera_x, camera_y)
+        self.last_frame_time = game_time
+
         # 3. Draw Player (Smooth position)
         px = player.pixel_x - camera_x
         py = player.pixel_y - camera_y
@@ -249,7 +290,7 @@ class UI:
         
         # Heat Zone Warning Overlay
         if fire_system:
-            _, _, heat_level = fire_system.check_player_damage(player, game_time)
+            heat_level = fire_system.get_heat_level((player.grid_x, player.grid_y), game_time)
             
             if heat_level == 2:  # Danger zone - màu đỏ nhấp nháy
                 pulse = (game_time // 200) % 2
@@ -269,34 +310,32 @@ class UI:
                     pygame.draw.rect(self.viewport_area, (255, 200, 0), 
                                    (0, 0, VIEWPORT_WIDTH, VIEWPORT_HEIGHT), 5)
 
+        # STORM CELLS - elip xanh mờ trên vùng mưa giông
+        if rain_system and rain_system.storm_cells:
+            for cell in rain_system.storm_cells:
+                sprite = self.get_storm_sprite(cell)
+                x = int((cell.col + 0.5 - cell.radius_x) * TILE_SIZE) - camera_x
+                y = int((cell.row + 0.5 - cell.radius_y) * TILE_SIZE) - camera_y
+                self.viewport_area.blit(sprite, (x, y))
+        
         # RAIN VISUAL EFFECTS
         if rain_system and rain_system.is_raining:
-            # 1. Vẽ hạt mưa (particles)
-            rain_particles = rain_system.get_rain_particles()
-            for particle in rain_particles:
-                # Vẽ giọt mưa (đường thẳng ngắn)
-                pygame.draw.line(
-                    self.viewport_area,
-                    (150, 200, 255),  # Màu xanh nhạt
-                    (int(particle['x']), int(particle['y'])),
-                    (int(particle['x']), int(particle['y'] + 10)),
-                    1
-                )
+            # 1. Vẽ hạt mưa (vệt ngắn) - một lần blits với sprite dựng sẵn
+            streak = self.rain_streak
+            self.viewport_area.blits([(streak, pos) for pos in rain_system.get_rain_particles()], doreturn=False)
             
             # 2. Overlay xanh mờ để tạo cảm giác mưa
-            rain_overlay = pygame.Surface((VIEWPORT_WIDTH, VIEWPORT_HEIGHT), pygame.SRCALPHA)
-            rain_overlay.fill((100, 150, 200, 30))  # Xanh dương nhạt
-            self.viewport_area.blit(rain_overlay, (0, 0))
+            self.viewport_area.blit(self.rain_overlay, (0, 0))
             
-            # 3. Hiển thị trạng thái mưa
+            # 3. Hiển thị trạng thái mưa (chỉ render lại chữ khi số giây đổi)
             remaining_time = rain_system.get_remaining_time(game_time)
             rain_text = f"Mưa - {remaining_time}s"
-            rain_bg = pygame.Surface((130, 30), pygame.SRCALPHA)
-            rain_bg.fill((0, 100, 200, 180))
-            self.viewport_area.blit(rain_bg, (VIEWPORT_WIDTH - 140, 10))
-            font_rain = pygame.font.SysFont('Segoe UI', 16, bold=True)
-            rain_surface = font_rain.render(rain_text, True, (255, 255, 255))
-            self.viewport_area.blit(rain_surface, (VIEWPORT_WIDTH - 135, 15))
+            if self.rain_label[0] != rain_text:
+                if self.font_rain is None:
+                    self.font_rain = pygame.font.SysFont('Segoe UI', 16, bold=True)
+                self.rain_label = (rain_text, self.font_rain.render(rain_text, True, (255, 255, 255)))
+            self.viewport_area.blit(self.rain_bg, (VIEWPORT_WIDTH - 140, 10))
+            self.viewport_area.blit(self.rain_label[1], (VIEWPORT_WIDTH - 135, 15))
 
 
         # 5. Draw Borders & Sidebars
@@ -503,49 +542,151 @@ class UI:
         return volume_buttons
 
 
+    def get_overlay(self, color):
+        """Surface một ô tô màu color (RGBA) - tạo một lần cho mỗi màu rồi dùng lại"""
+        surface = self.overlay_cache.get(color)
+        if surface is None:
+            surface = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+            surface.fill(color)
+            self.overlay_cache[color] = surface
+        return surface
+    
+    def get_storm_sprite(self, cell):
+        """Elip vùng mưa của ô bão (kích thước pixel) - tạo một lần cho mỗi kích thước"""
+        size = (max(2, int(cell.radius_x * 2 * TILE_SIZE)), max(2, int(cell.radius_y * 2 * TILE_SIZE)))
+        sprite = self.storm_sprites.get(size)
+        if sprite is None:
+            if len(self.storm_sprites) > 16:
+                self.storm_sprites.clear()  # Ô bão cũ đã tan
+            sprite = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.ellipse(sprite, (100, 150, 200, 45), sprite.get_rect())
+            pygame.draw.ellipse(sprite, (150, 200, 255, 120), sprite.get_rect(), 2)
+            self.storm_sprites[size] = sprite
+        return sprite
+    
+    def get_minimap_window(self, map_data, player):
+        """
+        Vùng bản đồ hiển thị trên minimap: tối đa MAP_WIDTH x MAP_HEIGHT ô quanh player
+        (bản đồ đảo 100x80 thì là toàn bộ bản đồ)
+        """
+        map_width, map_height = get_map_size(map_data)
+        cols = min(map_width, MAP_WIDTH)
+        rows = min(map_height, MAP_HEIGHT)
+        col0 = max(0, min(player.grid_x - cols // 2, map_width - cols))
+        row0 = max(0, min(player.grid_y - rows // 2, map_height - rows))
+        return col0, row0, cols, rows
+    
+    def _draw_minimap_rect(self, base, window, col0, row0, col1, row1, map_data):
+        """Vẽ lại các ô [col0, col1) x [row0, row1) lên ảnh nền minimap (1 pixel mỗi ô)"""
+        win_col0, win_row0 = window[0], window[1]
+        for row in range(row0, row1):
+            row_tiles = map_data.get_row_slice(row, col0, col1)
+            for col in range(col0, col1):
+                base.set_at((col - win_col0, row - win_row0), COLORS.get(row_tiles[col - col0], (100, 100, 100)))
+    
+    def get_minimap_surface(self, map_data, window):
+        """
+        Ảnh minimap (các ô) của vùng window
+        Ảnh nền 1 pixel mỗi ô: vẽ toàn bộ khi đổi map / đổi kích thước vùng; vùng trượt theo player
+        thì cuộn ảnh nền và chỉ vẽ dải ô mới lộ ra; còn lại chỉ vẽ lại các ô có trong nhật ký tile
+        """
+        cache = self.minimap_cache
+        if cache is None or cache["map"] is not map_data:
+            if cache is not None:
+                cache["map"].journal.unsubscribe(cache["sub"])
+            cache = {"map": map_data, "sub": map_data.journal.subscribe(), "window": None,
+                     "base": None, "surface": None}
+            self.minimap_cache = cache
+        
+        changes = map_data.journal.drain(cache["sub"])
+        base = cache["base"]
+        old = cache["window"]
+        col0, row0, cols, rows = window
+        col1, row1 = col0 + cols, row0 + rows
+        
+        if changes is None or old is None or old[2:] != window[2:] or \
+                abs(col0 - old[0]) >= cols or abs(row0 - old[1]) >= rows:
+            base = pygame.Surface((cols, rows), pygame.SRCALPHA)
+            base.fill((0, 0, 0, 100))  # Nền đen mờ thay vì đen đậm
+            self._draw_minimap_rect(base, window, col0, row0, col1, row1, map_data)
+            cache["base"] = base
+        elif old == window and not changes:
+            return cache["surface"]
+        else:
+            dx, dy = col0 - old[0], row0 - old[1]
+            if dx or dy:
+                # Cuộn ảnh nền, vẽ dải cột / hàng mới lộ ra
+                base.scroll(-dx, -dy)
+                if dx > 0:
+                    self._draw_minimap_rect(base, window, col1 - dx, row0, col1, row1, map_data)
+                elif dx < 0:
+                    self._draw_minimap_rect(base, window, col0, row0, col0 - dx, row1, map_data)
+                if dy > 0:
+                    self._draw_minimap_rect(base, window, col0, row1 - dy, col1, row1, map_data)
+                elif dy < 0:
+                    self._draw_minimap_rect(base, window, col0, row0, col1, row0 - dy, map_data)
+            # Chỉ vẽ lại các ô đã đổi trong vùng minimap
+            for (col, row), _, new, _ in changes:
+                if col0 <= col < col1 and row0 <= row < row1:
+                    base.set_at((col - col0, row - row0), COLORS.get(new, (100, 100, 100)))
+        cache["window"] = window
+        cache["surface"] = pygame.transform.scale(base, (MINIMAP_WIDTH, MINIMAP_HEIGHT))
+        return cache["surface"]
+    
     def draw_minimap(self, map_data, player):
-        # Tạo surface cho minimap với alpha
-        minimap = pygame.Surface((MINIMAP_WIDTH, MINIMAP_HEIGHT), pygame.SRCALPHA)
-        minimap.fill((0, 0, 0, 100))  # Nền đen mờ thay vì đen đậm
+        col0, row0, cols, rows = self.get_minimap_window(map_data, player)
+        self.minimap_window = (col0, row0, cols, rows)
+        
+        # Vẽ lên viewport (góc trên bên trái của viewport)
+        self.viewport_area.blit(self.get_minimap_surface(map_data, self.minimap_window), (MINIMAP_X, MINIMAP_Y))
         
         # Tỉ lệ thu nhỏ
-        scale_x = MINIMAP_WIDTH / (MAP_WIDTH * TILE_SIZE)
-        scale_y = MINIMAP_HEIGHT / (MAP_HEIGHT * TILE_SIZE)
-        
-        # Kích thước mỗi ô trên minimap
-        mini_tile_w = max(1, int(TILE_SIZE * scale_x))
-        mini_tile_h = max(1, int(TILE_SIZE * scale_y))
-        
-        # Vẽ từng ô
-        for row in range(MAP_HEIGHT):
-            for col in range(MAP_WIDTH):
-                tile = map_data[row][col]
-                color = COLORS.get(tile, (100, 100, 100))
-                
-                mx = int(col * TILE_SIZE * scale_x)
-                my = int(row * TILE_SIZE * scale_y)
-                pygame.draw.rect(minimap, color, (mx, my, mini_tile_w, mini_tile_h))
+        scale_x = MINIMAP_WIDTH / (cols * TILE_SIZE)
+        scale_y = MINIMAP_HEIGHT / (rows * TILE_SIZE)
         
         # Vẽ vị trí player (chấm đỏ)
-        px = int(player.pixel_x * scale_x)
-        py = int(player.pixel_y * scale_y)
-        pygame.draw.circle(minimap, (255, 0, 0), (px, py), 4)
+        px = int((player.pixel_x - col0 * TILE_SIZE) * scale_x) + MINIMAP_X
+        py = int((player.pixel_y - row0 * TILE_SIZE) * scale_y) + MINIMAP_Y
+        pygame.draw.circle(self.viewport_area, (255, 0, 0), (px, py), 4)
         
-        # Viền minimap - Bright cyan for better visibility
-        pygame.draw.rect(minimap, (100, 220, 255), (0, 0, MINIMAP_WIDTH, MINIMAP_HEIGHT), 3)
-        pygame.draw.rect(minimap, (150, 255, 255), (1, 1, MINIMAP_WIDTH-2, MINIMAP_HEIGHT-2), 1)
+        # Mảnh ghép còn lại (chấm vàng) - chỉ các vật phẩm trong vùng minimap
+        for (col, row), _ in map_data.items.in_rect(col0, row0, col0 + cols, row0 + rows, TILE_PIECE):
+            ix = int((col - col0 + 0.5) * TILE_SIZE * scale_x) + MINIMAP_X
+            iy = int((row - row0 + 0.5) * TILE_SIZE * scale_y) + MINIMAP_Y
+            pygame.draw.circle(self.viewport_area, (255, 230, 0), (ix, iy), 3)
         
-        # Vẽ lên viewport (góc trên bên trái của viewport)
-        self.viewport_area.blit(minimap, (MINIMAP_X, MINIMAP_Y))
+        # Viền minimap - Bright cyan for better visibility
+        pygame.draw.rect(self.viewport_area, (100, 220, 255), (MINIMAP_X, MINIMAP_Y, MINIMAP_WIDTH, MINIMAP_HEIGHT), 3)
+        pygame.draw.rect(self.viewport_area, (150, 255, 255), (MINIMAP_X + 1, MINIMAP_Y + 1, MINIMAP_WIDTH-2, MINIMAP_HEIGHT-2), 1)
+    
+    def draw_storms_on_minimap(self, storm_cells):
+        """Vẽ viền vùng mưa của các ô bão trên minimap"""
+        if not storm_cells:
+            return
+        col0, row0, cols, rows = self.minimap_window
+        scale_x = MINIMAP_WIDTH / (cols * TILE_SIZE)
+        scale_y = MINIMAP_HEIGHT / (rows * TILE_SIZE)
+        self.viewport_area.set_clip((MINIMAP_X, MINIMAP_Y, MINIMAP_WIDTH, MINIMAP_HEIGHT))
+        for cell in storm_cells:
+            x = int((cell.col + 0.5 - cell.radius_x - col0) * TILE_SIZE * scale_x) + MINIMAP_X
+            y = int((cell.row + 0.5 - cell.radius_y - row0) * TILE_SIZE * scale_y) + MINIMAP_Y
+            w = max(2, int(cell.radius_x * 2 * TILE_SIZE * scale_x))
+            h = max(2, int(cell.radius_y * 2 * TILE_SIZE * scale_y))
+            pygame.draw.ellipse(self.viewport_area, (150, 200, 255), (x, y, w, h), 1)
+        self.viewport_area.set_clip(None)
     
     def draw_boat_on_minimap(self, boat_position):
         """Vẽ icon thuyền trên minimap"""
         if boat_position:
-            scale_x = MINIMAP_WIDTH / (MAP_WIDTH * TILE_SIZE)
-            scale_y = MINIMAP_HEIGHT / (MAP_HEIGHT * TILE_SIZE)
+            col0, row0, cols, rows = self.minimap_window
+            if not (col0 <= boat_position[0] < col0 + cols and row0 <= boat_position[1] < row0 + rows):
+                return  # Thuyền nằm ngoài vùng minimap
+            
+            scale_x = MINIMAP_WIDTH / (cols * TILE_SIZE)
+            scale_y = MINIMAP_HEIGHT / (rows * TILE_SIZE)
             
-            bx = int(boat_position[0] * TILE_SIZE * scale_x) + MINIMAP_X
-            by = int(boat_position[1] * TILE_SIZE * scale_y) + MINIMAP_Y
+            bx = int((boat_position[0] - col0) * TILE_SIZE * scale_x) + MINIMAP_X
+            by = int((boat_position[1] - row0) * TILE_SIZE * scale_y) + MINIMAP_Y
             
             # Vẽ icon thuyền (hình tam giác + thanh ngang)
             pygame.draw.polygon(self.viewport_area, (139, 90, 43), [
@@ -798,8 +939,10 @@ class UI:
                     
                     # Chỉ vẽ nếu trong viewport
                     if -TILE_SIZE < dx < VIEWPORT_WIDTH and -TILE_SIZE < dy < VIEWPORT_HEIGHT:
+                        # Ô càng dễ cháy (xác suất dự báo cao) càng đậm
+                        alpha = int(40 + 60 * path_helper.get_danger_probability((col, row)))
                         s = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
-                        s.fill((255, 100, 0, 100))  # Cam
+                        s.fill((255, 100, 0, alpha))  # Cam
                         self.viewport_area.blit(s, (dx, dy))
                         # Vẽ viền cảnh báo
                         pygame.draw.rect(self.viewport_area, (255, 50, 0), 
@@ -309,3 +309,11 @@ def _draw_level_button(screen, btn_rect, mouse_pos, level_num, is_unlocked, high
         # Level number below lock
         draw_text(screen, str(level_num), btn_rect.centerx, btn_rect.centery + 45,
                  font_body, (100, 100, 100), center=True)
+
+def draw_loading_screen(screen, font_title, font_body, text="Đang dựng đảo..."):
+    """Màn hình chờ khi level dựng trước chưa xong (vẽ một lần trước khi chặn chờ)"""
+    screen.fill(COLOR_MENU_BG)
+    draw_text(screen, text, TOTAL_SCREEN_WIDTH // 2, TOTAL_SCREEN_HEIGHT // 2 - 20,
+             font_title, COLOR_TEXT_TITLE, center=True)
+    draw_text(screen, "Vui lòng chờ trong giây lát", TOTAL_SCREEN_WIDTH // 2, TOTAL_SCREEN_HEIGHT // 2 + 30,
+             font_body, COLOR_TEXT_BODY, center=True)
@@ -0,0 +1,101 @@
+"""
+Wetness - Độ ẩm từng ô sau mưa
+Mưa (toàn cục hoặc ô bão) làm tăng độ ẩm, độ ẩm giảm dần theo hàm mũ mỗi tick bằng
+một phép nhân mảng. Ô ẩm khó bắt lửa hơn: xác suất lan nhân với 1 - WETNESS_SPREAD_FACTOR * độ ẩm.
+Chỉ lưu khung chữ nhật bao các vùng từng bị mưa (không cấp phát cả bản đồ quần đảo).
+"""
+import math
+from settings import *
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - FireSystem không tạo WetnessMap khi không có
+    np = None
+
+class WetnessMap:
+    def __init__(self, width, height):
+        """
+        Args:
+            width, height: Kích thước bản đồ (ô) - khung độ ẩm bị cắt theo biên
+        """
+        self.width = width
+        self.height = height
+        self.row0 = 0
+        self.col0 = 0
+        self.values = None  # float32 (h, w) từ (row0, col0), 0..1 - None = khô hoàn toàn
+        self.peak = 0.0     # Chặn trên của độ ẩm lớn nhất (không cần quét mảng để biết đã khô)
+
+    @property
+    def active(self):
+        return self.values is not None
+
+    def _ensure(self, row0, row1, col0, col1):
+        """Nới khung để chứa vùng [row0, row1) x [col0, col1) (cấp phát lại hiếm khi xảy ra)"""
+        if self.values is None:
+            self.row0, self.col0 = row0, col0
+            self.values = np.zeros((row1 - row0, col1 - col0), dtype=np.float32)
+            return
+        h, w = self.values.shape
+        new_row0, new_col0 = min(row0, self.row0), min(col0, self.col0)
+        new_row1, new_col1 = max(row1, self.row0 + h), max(col1, self.col0 + w)
+        if (new_row0, new_col0, new_row1, new_col1) == (self.row0, self.col0, self.row0 + h, self.col0 + w):
+            return
+        values = np.zeros((new_row1 - new_row0, new_col1 - new_col0), dtype=np.float32)
+        values[self.row0 - new_row0:self.row0 - new_row0 + h, self.col0 - new_col0:self.col0 - new_col0 + w] = self.values
+        self.values = values
+        self.row0, self.col0 = new_row0, new_col0
+
+    def wet(self, row0, row1, col0, col1, amount, mask=None):
+        """
+        Tăng độ ẩm vùng [row0, row1) x [col0, col1) thêm amount (tối đa 1)
+
+        Args:
+            mask: bool cùng kích thước vùng - chỉ làm ướt các ô True (None = cả vùng)
+        """
+        r0, r1 = max(0, row0), min(self.height, row1)
+        c0, c1 = max(0, col0), min(self.width, col1)
+        if r0 >= r1 or c0 >= c1 or amount <= 0:
+            return
+        self._ensure(r0, r1, c0, c1)
+        region = self.values[r0 - self.row0:r1 - self.row0, c0 - self.col0:c1 - self.col0]
+        if mask is None:
+            region += amount
+        else:
+            region += mask[r0 - row0:r1 - row0, c0 - col0:c1 - col0] * np.float32(amount)
+        np.minimum(region, 1.0, out=region)
+        self.peak = min(1.0, self.peak + amount)
+
+    def decay(self, dt):
+        """Độ ẩm giảm theo hàm mũ (hằng số thời gian WETNESS_DECAY_TIME) - một phép nhân cho cả khung"""
+        if self.values is None:
+            return
+        factor = math.exp(-dt * 1000.0 / WETNESS_DECAY_TIME)
+        np.multiply(self.values, factor, out=self.values)
+        self.peak *= factor
+        if self.peak < WETNESS_MIN:
+            self.values = None  # Đã khô - bỏ khung
+            self.peak = 0.0
+
+    def at(self, col, row):
+        """Độ ẩm của ô (col, row), 0 nếu khô"""
+        if self.values is None:
+            return 0.0
+        r, c = row - self.row0, col - self.col0
+        h, w = self.values.shape
+        if 0 <= r < h and 0 <= c < w:
+            return float(self.values[r, c])
+        return 0.0
+
+    def window(self, rows, cols):
+        """Độ ẩm của vùng (slice hàng, slice cột) - float32 cùng kích thước vùng, 0 ngoài khung"""
+        out = np.zeros((rows.stop - rows.start, cols.stop - cols.start), dtype=np.float32)
+        if self.values is None:
+            return out
+        h, w = self.values.shape
+        r0, r1 = max(rows.start, self.row0), min(rows.stop, self.row0 + h)
+        c0, c1 = max(cols.start, self.col0), min(cols.stop, self.col0 + w)
+        if r0 < r1 and c0 < c1:
+            out[r0 - rows.start:r1 - rows.start, c0 - cols.start:c1 - cols.start] = \
+                self.values[r0 - self.row0:r1 - self.row0, c0 - self.col0:c1 - self.col0]
+        return out
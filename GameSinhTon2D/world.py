@@ -1,8 +1,43 @@
+import os
 import random
 import math
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 from settings import *
+from tile_grid import TileGrid
 
-def generate_island_map(width, height):
+try:
+    import numpy as np
+except ImportError:
+    # NumPy là tuỳ chọn - không có thì dùng vòng lặp thuần Python
+    np = None
+
+# Phiên bản bộ sinh bản đồ - cùng seed + cùng phiên bản => cùng bản đồ.
+# Hai bản NumPy/thuần Python dùng bộ sinh số ngẫu nhiên khác nhau nên có mã riêng.
+GENERATOR_VERSION = f"{'np' if np is not None else 'py'}{MAP_GENERATOR_VERSION}"
+
+def generate_island_map(width, height, seed=None, workers=None):
+    """
+    Sinh bản đồ đảo - dùng bản NumPy nếu có, ngược lại dùng bản thuần Python
+    Bản đồ rất lớn (>= MAP_GEN_TILED_MIN_TILES ô) được sinh theo tile trên nhiều tiến trình
+
+    Args:
+        width, height: Kích thước bản đồ (ô)
+        seed: Seed (int) - cùng seed cho cùng bản đồ, None = ngẫu nhiên
+        workers: Số tiến trình cho chế độ sinh theo tile (None = số CPU)
+
+    Returns:
+        TileGrid: Bản đồ (vẫn truy cập được bằng map_data[row][col])
+    """
+    if np is not None:
+        if width * height >= MAP_GEN_TILED_MIN_TILES:
+            return generate_island_map_tiled(width, height, seed, workers)
+        return generate_island_map_np(width, height, seed)
+    return generate_island_map_py(width, height, seed)
+
+def generate_island_map_py(width, height, seed=None):
+    # Bộ sinh riêng cho bản đồ - không phụ thuộc trạng thái chung của module random
+    rng = random.Random(seed)
     new_map = []
     center_x = width // 2
     center_y = height // 2
@@ -18,7 +53,7 @@ def generate_island_map(width, height):
             # Chia cho (max_dist * 0.65) để đảo to hơn một chút
             norm_dist = dist / (max_dist * 0.65)
             
-            noise = random.uniform(-0.15, 0.15)
+            noise = rng.uniform(-0.15, 0.15)
             val = norm_dist + noise
             
             # Quy định các lớp địa hình dựa trên giá trị val (càng nhỏ càng gần tâm -> đất liền)
@@ -33,7 +68,7 @@ def generate_island_map(width, height):
             
             # Thêm cây ngẫu nhiên trên cỏ
             if tile == TILE_GRASS:
-                rnd = random.random()
+                rnd = rng.random()
                 if rnd < 0.15: # 15% Cây
                     tile = TILE_TREE
                 elif rnd < 0.20: # 5% Hoa (15-20)
@@ -42,53 +77,341 @@ def generate_island_map(width, height):
             row.append(tile)
         new_map.append(row)
     
+    grid = TileGrid.from_rows(new_map)
+    
     # Thêm vật phẩm hồi máu
-    spawn_health_items(new_map)
+    spawn_health_items(grid, rng)
     
     # Thêm hộp hồi Stamina
-    spawn_stamina_items(new_map)
+    spawn_stamina_items(grid, rng)
     
     # Thêm đá ngầm trong nước
-    spawn_rocks(new_map)
+    spawn_rocks(grid, rng)
     
-    return new_map
-
-def spawn_health_items(map_data):
-    """Đặt vật phẩm hồi máu ngẫu nhiên trên bản đồ"""
-    valid_tiles = []
-    for row in range(MAP_HEIGHT):
-        for col in range(MAP_WIDTH):
-            if map_data[row][col] == TILE_GRASS:
-                valid_tiles.append((col, row))
-    
-    if len(valid_tiles) >= HEALTH_SPAWN_COUNT:
-        positions = random.sample(valid_tiles, HEALTH_SPAWN_COUNT)
-        for col, row in positions:
-            map_data[row][col] = TILE_HEALTH
+    return grid
+
+# ==================== NUMPY: SINH BẢN ĐỒ THEO MẢNG ====================
+def generate_island_map_np(width, height, seed=None):
+    """
+    Sinh bản đồ đảo bằng các phép toán trên toàn mảng (NumPy)
+
+    Args:
+        width, height: Kích thước bản đồ (ô)
+        seed: Seed cho numpy.random.Generator (None = ngẫu nhiên)
+
+    Returns:
+        TileGrid: Bản đồ với mã tile giống settings.py
+    """
+    rng = np.random.default_rng(seed)
+    tiles = generate_terrain_np(rng, 0, 0, width, height, width, height)
+    spawn_items_np(tiles, rng)
+    return TileGrid(width, height, tiles.tobytes())
+
+def generate_terrain_np(rng, x0, y0, w, h, map_width, map_height):
+    """
+    Sinh địa hình (nước/cát/cỏ/cây/hoa) cho vùng [x0, x0+w) x [y0, y0+h)
+    của một bản đồ kích thước map_width x map_height
+
+    Returns:
+        np.ndarray (h, w) dtype uint8
+    """
+    center_x = map_width // 2
+    center_y = map_height // 2
+    max_dist = math.sqrt(center_x**2 + center_y**2)
+
+    # Trường khoảng cách từ tâm đảo (broadcast cột x hàng)
+    ys = np.arange(y0, y0 + h, dtype=np.float32)[:, None]
+    xs = np.arange(x0, x0 + w, dtype=np.float32)[None, :]
+    dist = np.sqrt((xs - center_x) ** 2 + (ys - center_y) ** 2)
+
+    val = dist / np.float32(max_dist * 0.65)
+    val += rng.uniform(-0.15, 0.15, size=(h, w)).astype(np.float32)
+
+    # Các lớp địa hình theo ngưỡng
+    tiles = np.full((h, w), TILE_GRASS, dtype=np.uint8)
+    tiles[val > 0.65] = TILE_SAND
+    tiles[val > 0.8] = TILE_WATER
+
+    # Cây 15%, hoa 5% trên cỏ
+    rnd = rng.random((h, w), dtype=np.float32)
+    grass = tiles == TILE_GRASS
+    tiles[grass & (rnd < 0.15)] = TILE_TREE
+    tiles[grass & (rnd >= 0.15) & (rnd < 0.20)] = TILE_FLOWER
+    return tiles
+
+def spawn_items_np(tiles, rng):
+    """Đặt vật phẩm hồi máu, hộp Stamina và đá ngầm trên mảng tiles (sửa tại chỗ)"""
+    flat = tiles.reshape(-1)
+
+    # Máu + Stamina: chọn các ô cỏ khác nhau trong một lần lấy mẫu
+    spawn_pickups_np(flat, rng)
+
+    # Đá ngầm: mỗi ô nước có 5% cơ hội, lấy tối đa ROCK_SPAWN_COUNT ô đầu tiên
+    hits = np.flatnonzero((flat == TILE_WATER) & (rng.random(flat.size, dtype=np.float32) < ROCK_SPAWN_CHANCE))
+    flat[hits[:ROCK_SPAWN_COUNT]] = TILE_ROCK
+
+def spawn_pickups_np(flat, rng):
+    """Đặt vật phẩm hồi máu + hộp Stamina trên các ô cỏ khác nhau (mảng phẳng, sửa tại chỗ)"""
+    grass_idx = np.flatnonzero(flat == TILE_GRASS)
+    if len(grass_idx) >= HEALTH_SPAWN_COUNT:
+        stamina_count = STAMINA_SPAWN_COUNT if len(grass_idx) >= HEALTH_SPAWN_COUNT + STAMINA_SPAWN_COUNT else 0
+        chosen = rng.choice(grass_idx, HEALTH_SPAWN_COUNT + stamina_count, replace=False)
+        flat[chosen[:HEALTH_SPAWN_COUNT]] = TILE_HEALTH
+        flat[chosen[HEALTH_SPAWN_COUNT:]] = TILE_STAMINA
+
+# ==================== NUMPY: SINH THEO TILE TRÊN NHIỀU TIẾN TRÌNH ====================
+# Mã tạm đánh dấu "ô nước có thể có đá ngầm" - tiến trình chính chọn ROCK_SPAWN_COUNT ô đầu tiên
+ROCK_CANDIDATE = 255
+
+def get_generation_tiles(width, height, tile_size=MAP_GEN_TILE_SIZE):
+    """Chia bản đồ thành các tile (tx, ty, x0, y0, w, h)"""
+    tiles = []
+    for ty, y0 in enumerate(range(0, height, tile_size)):
+        for tx, x0 in enumerate(range(0, width, tile_size)):
+            tiles.append((tx, ty, x0, y0, min(tile_size, width - x0), min(tile_size, height - y0)))
+    return tiles
+
+def generate_tile_np(seed, tile, map_width, map_height):
+    """
+    Sinh một tile địa hình - seed riêng của tile chỉ phụ thuộc (seed, tx, ty)
+    nên kết quả không đổi dù chạy bao nhiêu tiến trình
+
+    Returns:
+        np.ndarray (h, w) dtype uint8 (ô nước có thể có đá = ROCK_CANDIDATE)
+    """
+    tx, ty, x0, y0, w, h = tile
+    rng = np.random.default_rng([seed, tx, ty])
+    tiles = generate_terrain_np(rng, x0, y0, w, h, map_width, map_height)
+    tiles[(tiles == TILE_WATER) & (rng.random((h, w), dtype=np.float32) < ROCK_SPAWN_CHANCE)] = ROCK_CANDIDATE
+    return tiles
+
+def _generate_tile_shm(shm_name, seed, tile, map_width, map_height):
+    """Tiến trình con: sinh tile và ghi thẳng vào shared memory (không pickle mảng)"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray((map_height, map_width), dtype=np.uint8, buffer=shm.buf)
+        tx, ty, x0, y0, w, h = tile
+        out[y0:y0 + h, x0:x0 + w] = generate_tile_np(seed, tile, map_width, map_height)
+        del out
+    finally:
+        shm.close()
+
+def generate_island_map_tiled(width, height, seed=None, workers=None):
+    """
+    Sinh bản đồ đảo theo tile bằng ProcessPoolExecutor, kết quả trả qua shared memory
+
+    Args:
+        width, height: Kích thước bản đồ (ô)
+        seed: Seed (int) - None = ngẫu nhiên
+        workers: Số tiến trình (None = số CPU, 1 = sinh ngay trong tiến trình hiện tại)
+
+    Returns:
+        TileGrid: Giống hệt nhau với mọi giá trị workers
+    """
+    if seed is None:
+        seed = random.getrandbits(63)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    tiles = get_generation_tiles(width, height)
 
-def spawn_rocks(map_data):
+    if workers <= 1:
+        data = np.empty((height, width), dtype=np.uint8)
+        for tile in tiles:
+            tx, ty, x0, y0, w, h = tile
+            data[y0:y0 + h, x0:x0 + w] = generate_tile_np(seed, tile, width, height)
+        return _finish_tiled_map(data, seed, width, height)
+
+    shm = shared_memory.SharedMemory(create=True, size=width * height)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tiles))) as pool:
+            futures = [pool.submit(_generate_tile_shm, shm.name, seed, tile, width, height) for tile in tiles]
+            for future in futures:
+                future.result()  # Đưa lỗi của tiến trình con lên
+        data = np.ndarray((height, width), dtype=np.uint8, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+    return _finish_tiled_map(data, seed, width, height)
+
+def _finish_tiled_map(data, seed, width, height):
+    """Bước toàn cục sau khi ghép tile: đá ngầm, vật phẩm (cần nhìn cả bản đồ)"""
+    flat = data.reshape(-1)
+    candidates = np.flatnonzero(flat == ROCK_CANDIDATE)
+    flat[candidates] = TILE_WATER
+    flat[candidates[:ROCK_SPAWN_COUNT]] = TILE_ROCK
+
+    rng = np.random.default_rng([seed, 1 << 32])  # Luồng số ngẫu nhiên riêng cho vật phẩm
+    spawn_pickups_np(flat, rng)
+    return TileGrid(width, height, flat.tobytes())
+
+def spawn_health_items(map_data, rng=random):
+    """Đặt vật phẩm hồi máu ngẫu nhiên trên bản đồ (lấy mẫu từ chỉ mục ô cỏ)"""
+    positions = map_data.tile_index.sample_many([TILE_GRASS], HEALTH_SPAWN_COUNT, rng)
+    for col, row in positions:
+        map_data.set_tile(col, row, TILE_HEALTH)
+
+def spawn_rocks(map_data, rng=random):
     """Đặt đá ngầm ngẫu nhiên trong nước"""
     rock_count = 0
-    target_rocks = 50  # Số lượng đá ngầm
+    target_rocks = ROCK_SPAWN_COUNT  # Số lượng đá ngầm
     
-    for row in range(MAP_HEIGHT):
-        for col in range(MAP_WIDTH):
+    for row in range(len(map_data)):
+        for col in range(len(map_data[row])):
             if map_data[row][col] == TILE_WATER:
                 # 5% cơ hội có đá ngầm
-                if random.random() < 0.05 and rock_count < target_rocks:
+                if rng.random() < ROCK_SPAWN_CHANCE and rock_count < target_rocks:
                     map_data[row][col] = TILE_ROCK
                     rock_count += 1
 
-def spawn_stamina_items(map_data):
-    """Đặt hộp hồi Stamina ngẫu nhiên trên cỏ"""
-    valid_tiles = []
-    for row in range(MAP_HEIGHT):
-        for col in range(MAP_WIDTH):
-            if map_data[row][col] == TILE_GRASS:
-                valid_tiles.append((col, row))
-    
-    stamina_count = 8  # Số lượng hộp Stamina
-    if len(valid_tiles) >= stamina_count:
-        positions = random.sample(valid_tiles, stamina_count)
-        for col, row in positions:
-            map_data[row][col] = TILE_STAMINA
+def spawn_stamina_items(map_data, rng=random):
+    """Đặt hộp hồi Stamina ngẫu nhiên trên cỏ (lấy mẫu từ chỉ mục ô cỏ)"""
+    stamina_count = STAMINA_SPAWN_COUNT  # Số lượng hộp Stamina
+    positions = map_data.tile_index.sample_many([TILE_GRASS], stamina_count, rng)
+    for col, row in positions:
+        map_data.set_tile(col, row, TILE_STAMINA)
+
+# ==================== QUẦN ĐẢO: SINH THEO CHUNK ====================
+def get_archipelago_island(seed, gx, gy, center_cell=None):
+    """
+    Đảo của ô lưới (gx, gy) trong quần đảo - xác định hoàn toàn bởi seed
+
+    Returns:
+        (center_x, center_y, radius) hoặc None nếu ô lưới là biển
+    """
+    cell = ARCHIPELAGO_CELL_SIZE
+    if (gx, gy) == center_cell:
+        # Ô chứa tâm thế giới luôn có đảo lớn để người chơi xuất phát
+        return (gx * cell + cell / 2, gy * cell + cell / 2, cell * 0.45)
+
+    rnd = random.Random(f"{seed}:{gx}:{gy}")
+    if rnd.random() < ARCHIPELAGO_EMPTY_CHANCE:
+        return None
+    radius = rnd.uniform(0.2, 0.45) * cell
+    center_x = gx * cell + rnd.uniform(radius, cell - radius)
+    center_y = gy * cell + rnd.uniform(radius, cell - radius)
+    return (center_x, center_y, radius)
+
+def _chunk_islands(seed, x0, y0, size, world_width, world_height):
+    """Các đảo có thể chạm tới vùng chunk (ô lưới chứa chunk và lân cận)"""
+    cell = ARCHIPELAGO_CELL_SIZE
+    center_cell = ((world_width // 2) // cell, (world_height // 2) // cell)
+    islands = []
+    for gy in range(y0 // cell - 1, (y0 + size - 1) // cell + 2):
+        for gx in range(x0 // cell - 1, (x0 + size - 1) // cell + 2):
+            island = get_archipelago_island(seed, gx, gy, center_cell)
+            if island:
+                islands.append(island)
+    return islands
+
+def generate_chunk(seed, chunk_x, chunk_y, size, world_width, world_height):
+    """
+    Sinh một chunk size x size của bản đồ quần đảo
+
+    Kết quả chỉ phụ thuộc (seed, chunk_x, chunk_y) nên chunk bị giải phóng
+    có thể sinh lại y hệt.
+
+    Returns:
+        bytearray size*size (theo hàng) chứa mã tile
+    """
+    if np is not None:
+        return generate_chunk_np(seed, chunk_x, chunk_y, size, world_width, world_height)
+
+    x0, y0 = chunk_x * size, chunk_y * size
+    islands = _chunk_islands(seed, x0, y0, size, world_width, world_height)
+    rnd = random.Random(f"{seed}:chunk:{chunk_x}:{chunk_y}")
+    # Giữ mật độ vật phẩm tương đương bản đồ đảo 100x80
+    health_chance = HEALTH_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+    stamina_chance = STAMINA_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+    rock_chance = ROCK_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+
+    tiles = bytearray(size * size)  # Mặc định TILE_WATER (0)
+    for y in range(y0, y0 + size):
+        for x in range(x0, x0 + size):
+            if x >= world_width or y >= world_height:
+                continue
+            val = float('inf')
+            for ix, iy, radius in islands:
+                dist = math.sqrt((x - ix)**2 + (y - iy)**2)
+                val = min(val, dist / radius * 0.8)
+            val += rnd.uniform(-0.15, 0.15)
+
+            if val > 0.8:
+                tile = TILE_ROCK if rnd.random() < rock_chance else TILE_WATER
+            elif val > 0.65:
+                tile = TILE_SAND
+            else:
+                tile = TILE_GRASS
+                r = rnd.random()
+                if r < 0.15:
+                    tile = TILE_TREE
+                elif r < 0.20:
+                    tile = TILE_FLOWER
+                elif r < 0.20 + health_chance:
+                    tile = TILE_HEALTH
+                elif r < 0.20 + health_chance + stamina_chance:
+                    tile = TILE_STAMINA
+            tiles[(y - y0) * size + (x - x0)] = tile
+    return tiles
+
+def generate_chunk_np(seed, chunk_x, chunk_y, size, world_width, world_height):
+    """Bản NumPy của generate_chunk"""
+    x0, y0 = chunk_x * size, chunk_y * size
+    islands = _chunk_islands(seed, x0, y0, size, world_width, world_height)
+    rng = np.random.default_rng([seed, chunk_x, chunk_y])
+    health_chance = HEALTH_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+    stamina_chance = STAMINA_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+    rock_chance = ROCK_SPAWN_COUNT / (MAP_WIDTH * MAP_HEIGHT)
+
+    ys = np.arange(y0, y0 + size, dtype=np.float32)[:, None]
+    xs = np.arange(x0, x0 + size, dtype=np.float32)[None, :]
+    val = np.full((size, size), np.inf, dtype=np.float32)
+    for ix, iy, radius in islands:
+        dist = np.sqrt((xs - ix) ** 2 + (ys - iy) ** 2) * np.float32(0.8 / radius)
+        np.minimum(val, dist, out=val)
+    val += rng.uniform(-0.15, 0.15, size=(size, size)).astype(np.float32)
+
+    tiles = np.full((size, size), TILE_GRASS, dtype=np.uint8)
+    tiles[val > 0.65] = TILE_SAND
+    tiles[val > 0.8] = TILE_WATER
+
+    rnd = rng.random((size, size), dtype=np.float32)
+    grass = tiles == TILE_GRASS
+    tiles[grass & (rnd < 0.15)] = TILE_TREE
+    tiles[grass & (rnd >= 0.15) & (rnd < 0.20)] = TILE_FLOWER
+    tiles[grass & (rnd >= 0.20) & (rnd < 0.20 + health_chance)] = TILE_HEALTH
+    tiles[grass & (rnd >= 0.20 + health_chance) & (rnd < 0.20 + health_chance + stamina_chance)] = TILE_STAMINA
+    tiles[(tiles == TILE_WATER) & (rng.random((size, size), dtype=np.float32) < rock_chance)] = TILE_ROCK
+
+    # Phần chunk nằm ngoài biên thế giới là biển
+    tiles[:, max(0, world_width - x0):] = TILE_WATER
+    tiles[max(0, world_height - y0):, :] = TILE_WATER
+    return bytearray(tiles.tobytes())
+
+# ==================== TIỆN ÍCH TRUY CẬP BẢN ĐỒ ====================
+def get_map_size(map_data):
+    """Trả về (width, height) của bản đồ - TileGrid, ChunkedWorld hoặc list of lists"""
+    if hasattr(map_data, "width"):
+        return map_data.width, map_data.height
+    return len(map_data[0]), len(map_data)
+
+def iter_tiles(map_data):
+    """
+    Duyệt (col, row, tile) trên bản đồ
+    Với ChunkedWorld chỉ duyệt các chunk đã sinh (không sinh thêm chunk mới)
+    """
+    if hasattr(map_data, "iter_loaded_tiles"):
+        yield from map_data.iter_loaded_tiles()
+        return
+    if hasattr(map_data, "iter_tiles"):
+        yield from map_data.iter_tiles()
+        return
+    for row, tiles in enumerate(map_data):
+        for col, tile in enumerate(tiles):
+            yield col, row, tile
+
+def get_spawn_bounds(map_data):
+    """Vùng (col0, row0, col1, row1) dùng để spawn quái - với ChunkedWorld là vùng đã sinh"""
+    if hasattr(map_data, "get_loaded_bounds"):
+        return map_data.get_loaded_bounds()
+    width, height = get_map_size(map_data)
+    return 0, 0, width, height